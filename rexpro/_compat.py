@@ -14,6 +14,7 @@ binary_types = (six.binary_type, )
 float_types = (float, )
 array_types = (tuple, list)
 int_to_byte = six.int2byte
+intern = six.moves.intern
 
 # iterator functions
 iterkeys = six.iterkeys
@@ -27,4 +28,11 @@ with_metaclass = six.with_metaclass
 print_ = six.print_
 
 Queue = six.moves.queue.Queue
-xrange = six.moves.range
\ No newline at end of file
+QueueEmpty = six.moves.queue.Empty
+xrange = six.moves.range
+izip = six.moves.zip
+
+try:
+    from collections.abc import Sequence
+except ImportError:  # pragma: no cover
+    from collections import Sequence
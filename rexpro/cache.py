@@ -0,0 +1,612 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import time
+
+import msgpack
+
+from rexpro import exceptions
+from rexpro.elements import Element
+from rexpro.messages import bytearray_to_text
+from rexpro.packing import default as pack_default
+from rexpro._compat import iteritems, itervalues, text_type, xrange
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+class LRUCache(object):
+    """ Thread-safe least recently used cache whose entries expire after a time to live """
+
+    def __init__(self, max_size=10000, ttl=5.0, clock=time.time):
+        """
+        :param max_size: the maximum number of entries, the least recently used entries are evicted beyond it
+        :type max_size: int
+        :param ttl: the default number of seconds entries stay valid
+        :type ttl: float
+        :param clock: the function returning the current time in seconds
+        :type clock: callable
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """ Returns the cached value for the given key, or the default if it's missing or expired """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < self.clock():
+                return default
+            # re-insert as the most recently used entry
+            self._entries[key] = entry
+            return value
+
+    def remaining_ttl(self, key):
+        """ Returns the number of seconds the entry of the given key stays valid, None if it's missing or expired
+
+        :rtype: float
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        remaining = entry[0] - self.clock() if entry is not None else None
+        return remaining if remaining is not None and remaining >= 0 else None
+
+    def set(self, key, value, ttl=None):
+        """ Caches the given value
+
+        :param ttl: the number of seconds the entry stays valid (defaults to the cache ttl)
+        :type ttl: float
+        """
+        expires = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """ Removes the given key from the cache """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """ Removes every entry """
+        with self._lock:
+            self._entries.clear()
+
+
+class ElementCache(LRUCache):
+    """ Identity map of the vertices and edges seen in script responses, keyed by (graph name, element type, id)
+
+    Share one instance between the pools of a process by passing it as their ``element_cache``, every element
+    decoded from a response is then stored, and ``pool.get_vertex`` / ``pool.get_vertices`` consult it before
+    going to rexster. The elements read or written in a client side transaction are stored once it commits.
+    """
+
+    VERTEX = 'vertex'
+    EDGE = 'edge'
+
+    def get_element(self, graph_name, element_type, element_id, default=None):
+        """ Returns the cached element
+
+        :param graph_name: the graph the element belongs to
+        :type graph_name: str
+        :param element_type: 'vertex' or 'edge'
+        :type element_type: str
+        :param element_id: the element id
+        """
+        return self.get((graph_name, element_type, element_id), default)
+
+    def invalidate(self, graph_name, element_type, element_id):
+        """ Removes the cached element, call it after writing to the element
+
+        :param graph_name: the graph the element belongs to
+        :type graph_name: str
+        :param element_type: 'vertex' or 'edge'
+        :type element_type: str
+        :param element_id: the element id
+        """
+        self.delete((graph_name, element_type, element_id))
+
+    def store_element(self, graph_name, element):
+        """ Caches the given element if it is a serialized vertex or edge
+
+        :param graph_name: the graph the element belongs to
+        :type graph_name: str
+        :param element: a decoded element or the rexster serialization of one
+        :type element: dict | rexpro.elements.Element
+        :returns: whether the element was stored
+        :rtype: bool
+        """
+        element_type = element.get('_type')
+        if element_type not in (self.VERTEX, self.EDGE) or '_id' not in element:
+            return False
+        self.set((graph_name, element_type, element['_id']), element)
+        return True
+
+    def store_results(self, graph_name, results):
+        """ Caches every vertex and edge found in the given script results
+
+        :param graph_name: the graph the results come from
+        :type graph_name: str
+        :param results: decoded script results
+        """
+        pending = [results]
+        while pending:
+            value = pending.pop()
+            if isinstance(value, (list, tuple)):
+                pending.extend(value)
+            elif isinstance(value, (dict, Element)):
+                if not self.store_element(graph_name, value) and isinstance(value, dict):
+                    pending.extend(itervalues(value))
+
+
+def result_cache_key(graph_name, script, params=None, language=None):
+    """ Returns the result cache key of a script request
+
+    :param graph_name: the graph the script runs against
+    :type graph_name: str
+    :param script: the gremlin script
+    :type script: str
+    :param params: the script parameters
+    :type params: dict
+    :param language: the script language
+    :type language: str
+    :rtype: str
+    """
+    params = sorted(iteritems(params or {}))
+    data = msgpack.dumps([graph_name, language, script, params], default=_encode_default)
+    return hashlib.sha1(data).hexdigest()
+
+
+def _encode_default(value):
+    if isinstance(value, Element):
+        return value.to_dict()
+    return pack_default(value)
+
+
+def encode_results(results):
+    """ Serializes script results for a result cache backend, decoded elements are stored as their rexster
+    serialization
+
+    :param results: decoded script results
+    :rtype: bytes
+    """
+    return msgpack.dumps(results, default=_encode_default)
+
+
+def decode_results(data, object_hook=None):
+    """ Deserializes script results stored by ``encode_results``
+
+    :param data: the cached value
+    :type data: bytes
+    :param object_hook: the msgpack object hook, ie. ``elements.decode_element``
+    :type object_hook: callable
+    """
+    return bytearray_to_text(msgpack.loads(data, object_hook=object_hook))
+
+
+class SharedMemoryCache(object):
+    """ Result cache backend living in a memory-mapped file, shared by every process on the host that opens it
+
+    The file holds a fixed number of fixed-size slots, grouped in buckets of ``BUCKET_SIZE`` consecutive slots.
+    A key is hashed to a bucket and stored in the first of its slots holding the same key, an empty or expired slot,
+    or failing that the slot closest to expiring. Writers take an ``fcntl`` lock on the bucket's byte range, readers
+    don't lock: every slot carries a sequence number bumped before and after each write, a read that sees it odd or
+    changed is retried.
+
+    Values larger than a slot are not cached. Pass an instance as the pools' ``result_cache``, with the same path
+    in every worker process::
+
+        pool = RexProSyncConnectionPool(host, port, 'graph', result_cache=SharedMemoryCache('/dev/shm/rexpro'))
+    """
+
+    MAGIC = b'RXPC'
+    VERSION = 1
+    HEADER = struct.Struct('<4sIII')
+    HEADER_SIZE = 64
+    # sequence number, key hash, expiration timestamp, value length
+    SLOT_HEADER = struct.Struct('<I16sdI')
+    BUCKET_SIZE = 8
+    READ_RETRIES = 16
+
+    def __init__(self, path, slots=4096, slot_size=4096, clock=time.time):
+        """
+        :param path: the file backing the cache, preferably on a tmpfs (ie. /dev/shm)
+        :type path: str
+        :param slots: the number of slots, used only when creating the file
+        :type slots: int
+        :param slot_size: the size of a slot in bytes, the largest cached value is ``SLOT_HEADER.size`` bytes smaller
+                          (used only when creating the file)
+        :type slot_size: int
+        :param clock: the function returning the current time in seconds
+        :type clock: callable
+        """
+        if fcntl is None:
+            raise exceptions.RexProException("SharedMemoryCache requires fcntl file locks")
+        if slot_size <= self.SLOT_HEADER.size:
+            raise exceptions.RexProException("slot_size must be larger than {}".format(self.SLOT_HEADER.size))
+        self.path = path
+        self.clock = clock
+        self._lock = Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                self.slots, self.slot_size = self._init_file(-(-slots // self.BUCKET_SIZE) * self.BUCKET_SIZE,
+                                                             slot_size)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(self._fd, self.HEADER_SIZE + self.slots * self.slot_size)
+        except Exception:
+            os.close(self._fd)
+            raise
+        self.buckets = self.slots // self.BUCKET_SIZE
+
+    def _init_file(self, slots, slot_size):
+        """ Writes the header of a new file, or reads the geometry of an existing one """
+        header = os.read(self._fd, self.HEADER.size)
+        if len(header) == self.HEADER.size:
+            magic, version, slots, slot_size = self.HEADER.unpack(header)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise exceptions.RexProException("{} is not a rexpro cache file".format(self.path))
+            return slots, slot_size
+        os.ftruncate(self._fd, self.HEADER_SIZE + slots * slot_size)
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, self.HEADER.pack(self.MAGIC, self.VERSION, slots, slot_size))
+        return slots, slot_size
+
+    def close(self):
+        """ Unmaps the cache file """
+        self._map.close()
+        os.close(self._fd)
+
+    def _hash(self, key):
+        if isinstance(key, text_type):
+            key = key.encode('UTF-8')
+        digest = hashlib.sha1(key).digest()
+        return digest[:16], struct.unpack_from('<I', digest, 16)[0] % self.buckets
+
+    def _slot_offset(self, bucket, i):
+        return self.HEADER_SIZE + (bucket * self.BUCKET_SIZE + i) * self.slot_size
+
+    def _read_slot(self, offset):
+        """ Returns a consistent (key hash, expiration, value) snapshot of the slot, or None if it keeps changing """
+        data = self._map
+        for _ in xrange(self.READ_RETRIES):
+            seq, key_hash, expires, length = self.SLOT_HEADER.unpack_from(data, offset)
+            if seq & 1:
+                continue
+            start = offset + self.SLOT_HEADER.size
+            value = data[start:start + min(length, self.slot_size - self.SLOT_HEADER.size)]
+            if self.SLOT_HEADER.unpack_from(data, offset)[0] == seq:
+                return key_hash, expires, value
+        return None
+
+    def _find(self, key):
+        """ Returns the (expiration, value) of the slot holding the given key, None if no slot holds it """
+        key_hash, bucket = self._hash(key)
+        for i in xrange(self.BUCKET_SIZE):
+            snapshot = self._read_slot(self._slot_offset(bucket, i))
+            if snapshot is not None and snapshot[0] == key_hash:
+                return snapshot[1:]
+        return None
+
+    def get(self, key, default=None):
+        """ Returns the cached value for the given key, or the default if it's missing or expired
+
+        :rtype: bytes
+        """
+        found = self._find(key)
+        return found[1] if found is not None and found[0] >= self.clock() else default
+
+    def remaining_ttl(self, key):
+        """ Returns the number of seconds the entry of the given key stays valid, None if it's missing or expired
+
+        :rtype: float
+        """
+        found = self._find(key)
+        remaining = found[0] - self.clock() if found is not None else None
+        return remaining if remaining is not None and remaining >= 0 else None
+
+    @contextmanager
+    def _locked_bucket(self, bucket):
+        start = self._slot_offset(bucket, 0)
+        length = self.BUCKET_SIZE * self.slot_size
+        # fcntl locks only exclude other processes
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, start)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, length, start)
+
+    def _write_slot(self, offset, key_hash, expires, value):
+        data = self._map
+        seq = self.SLOT_HEADER.unpack_from(data, offset)[0]
+        struct.pack_into('<I', data, offset, (seq + 1) & 0xffffffff)
+        start = offset + self.SLOT_HEADER.size
+        data[start:start + len(value)] = value
+        self.SLOT_HEADER.pack_into(data, offset, (seq + 2) & 0xffffffff, key_hash, expires, len(value))
+
+    def set(self, key, value, ttl=None):
+        """ Caches the given value
+
+        :param value: the value to cache
+        :type value: bytes
+        :param ttl: the number of seconds the entry stays valid (default: 5 seconds)
+        :type ttl: float
+        :returns: whether the value fit in a slot
+        :rtype: bool
+        """
+        if len(value) > self.slot_size - self.SLOT_HEADER.size:
+            return False
+        key_hash, bucket = self._hash(key)
+        now = self.clock()
+        with self._locked_bucket(bucket):
+            target = None
+            target_expires = None
+            for i in xrange(self.BUCKET_SIZE):
+                offset = self._slot_offset(bucket, i)
+                _, slot_hash, expires, _ = self.SLOT_HEADER.unpack_from(self._map, offset)
+                if slot_hash == key_hash:
+                    target = offset
+                    break
+                if target_expires is None or expires < target_expires:
+                    target, target_expires = offset, expires
+            self._write_slot(target, key_hash, now + (5.0 if ttl is None else ttl), value)
+        return True
+
+    def delete(self, key):
+        """ Removes the given key from the cache """
+        key_hash, bucket = self._hash(key)
+        with self._locked_bucket(bucket):
+            for i in xrange(self.BUCKET_SIZE):
+                offset = self._slot_offset(bucket, i)
+                if self.SLOT_HEADER.unpack_from(self._map, offset)[1] == key_hash:
+                    self._write_slot(offset, b'\0' * 16, 0.0, b'')
+
+    def clear(self):
+        """ Removes every entry """
+        for bucket in xrange(self.buckets):
+            with self._locked_bucket(bucket):
+                for i in xrange(self.BUCKET_SIZE):
+                    self._write_slot(self._slot_offset(bucket, i), b'\0' * 16, 0.0, b'')
+
+
+def lookup_result(cache, key):
+    """ Returns (value, fresh) for the given key of a result cache backend, ``fresh`` is False for expired values
+    the backend still serves (see ``SQLiteCache.lookup``), value is None on a miss
+    """
+    lookup = getattr(cache, 'lookup', None)
+    if lookup is not None:
+        return lookup(key)
+    return cache.get(key), True
+
+
+class SQLiteCache(object):
+    """ Persistent result cache backend stored in a local sqlite file, so cached results survive restarts
+
+    Expired entries are kept for ``stale_ttl`` more seconds: ``lookup`` still returns them, flagged as stale, and
+    ``execute(..., cache_ttl=...)`` serves them while a pooled connection refreshes them in the background. Once the
+    file holds more than ``max_bytes`` of values, the entries closest to expiring are evicted. The size of the values
+    is tracked as they're written and resynced from the file on every eviction, the writes of other processes sharing
+    the file are only accounted for then. The file is written in WAL mode without an fsync per write, so filling it
+    from a ``TieredCache`` stays cheap, at the cost of the last writes if the machine crashes. Usually placed behind
+    an in-memory tier::
+
+        result_cache = TieredCache([LRUCache(), SQLiteCache('/var/cache/app/rexpro.sqlite')])
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, stale_ttl=24 * 60 * 60, clock=time.time):
+        """
+        :param path: the sqlite database file
+        :type path: str
+        :param max_bytes: the maximum total size of the cached values
+        :type max_bytes: int
+        :param stale_ttl: the number of seconds expired values are still served while being refreshed
+        :type stale_ttl: float
+        :param clock: the function returning the current time in seconds
+        :type clock: callable
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._lock = Lock()
+        self._db = None
+        self._pid = None
+        # the total size of the cached values, tracked by set/delete
+        self._size = 0
+
+    @property
+    def db(self):
+        # sqlite connections can't be shared with forked processes
+        if self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            # every set commits on its own: in WAL mode with synchronous=NORMAL the commits are appended to the log
+            # without an fsync, which only happens at checkpoints. A crash can lose the last writes, never corrupt
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS rexpro_results '
+                             '(key TEXT PRIMARY KEY, value BLOB, expires REAL, size INTEGER)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS rexpro_results_expires ON rexpro_results (expires)')
+            self._pid = os.getpid()
+            self._size = self._total_size()
+        return self._db
+
+    def close(self):
+        """ Closes the database connection """
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
+            self._pid = None
+
+    def lookup(self, key):
+        """ Returns (value, fresh) for the given key, value is None if it's missing or past the stale window
+
+        :rtype: tuple
+        """
+        with self._lock:
+            row = self.db.execute('SELECT value, expires FROM rexpro_results WHERE key = ?', (key, )).fetchone()
+        if row is None:
+            return None, True
+        now = self.clock()
+        value, expires = row
+        if expires + self.stale_ttl < now:
+            return None, True
+        return bytes(value), expires >= now
+
+    def get(self, key, default=None):
+        """ Returns the cached value for the given key, or the default if it's missing or expired
+
+        :rtype: bytes
+        """
+        value, fresh = self.lookup(key)
+        return value if value is not None and fresh else default
+
+    def remaining_ttl(self, key):
+        """ Returns the number of seconds the entry of the given key stays fresh, None if it's missing or expired
+
+        :rtype: float
+        """
+        with self._lock:
+            row = self.db.execute('SELECT expires FROM rexpro_results WHERE key = ?', (key, )).fetchone()
+        remaining = row[0] - self.clock() if row is not None else None
+        return remaining if remaining is not None and remaining >= 0 else None
+
+    def _total_size(self):
+        return self._db.execute('SELECT SUM(size) FROM rexpro_results').fetchone()[0] or 0
+
+    def _entry_size(self, key):
+        row = self.db.execute('SELECT size FROM rexpro_results WHERE key = ?', (key, )).fetchone()
+        return row[0] if row is not None else 0
+
+    def set(self, key, value, ttl=None):
+        """ Caches the given value
+
+        :param value: the value to cache
+        :type value: bytes
+        :param ttl: the number of seconds the entry stays fresh (default: 5 minutes)
+        :type ttl: float
+        """
+        expires = self.clock() + (300.0 if ttl is None else ttl)
+        with self._lock:
+            replaced = self._entry_size(key)
+            self.db.execute('INSERT OR REPLACE INTO rexpro_results (key, value, expires, size) VALUES (?, ?, ?, ?)',
+                            (key, sqlite3.Binary(value), expires, len(value)))
+            self._size += len(value) - replaced
+            if self._size > self.max_bytes:
+                self._evict(self._size - self.max_bytes)
+
+    def _evict(self, excess):
+        freed = 0
+        evicted = []
+        for key, size in self.db.execute('SELECT key, size FROM rexpro_results ORDER BY expires'):
+            if freed >= excess:
+                break
+            evicted.append((key, ))
+            freed += size
+        self.db.executemany('DELETE FROM rexpro_results WHERE key = ?', evicted)
+        self._size = self._total_size()
+
+    def delete(self, key):
+        """ Removes the given key from the cache """
+        with self._lock:
+            self._size -= self._entry_size(key)
+            self.db.execute('DELETE FROM rexpro_results WHERE key = ?', (key, ))
+
+    def clear(self):
+        """ Removes every entry """
+        with self._lock:
+            self.db.execute('DELETE FROM rexpro_results')
+            self._size = 0
+
+
+class TieredCache(object):
+    """ Result cache backend chaining faster tiers in front of slower ones (ie. memory, shared memory, sqlite)
+
+    Reads go through the tiers in order and a hit is copied into the tiers before it, for ``backfill_ttl`` seconds at
+    most so the copies don't outlive the value they were copied from. Writes go to every tier.
+    """
+
+    def __init__(self, tiers, backfill_ttl=5.0):
+        """
+        :param tiers: the cache backends, fastest first
+        :type tiers: list
+        :param backfill_ttl: the maximum ttl of the values copied into the faster tiers on a hit, capped at the
+                             remaining ttl of the value in the tier it was found in
+        :type backfill_ttl: float
+        """
+        self.tiers = list(tiers)
+        self.backfill_ttl = backfill_ttl
+
+    def lookup(self, key):
+        """ Returns (value, fresh) for the given key, stale values are only returned when no tier has a fresh one
+
+        :rtype: tuple
+        """
+        stale = None
+        for i, tier in enumerate(self.tiers):
+            value, fresh = lookup_result(tier, key)
+            if value is None:
+                continue
+            if fresh:
+                if i:
+                    ttl = self.backfill_ttl
+                    remaining = tier.remaining_ttl(key) if hasattr(tier, 'remaining_ttl') else None
+                    if remaining is not None:
+                        ttl = min(ttl, remaining)
+                    for faster in self.tiers[:i]:
+                        faster.set(key, value, ttl=ttl)
+                return value, True
+            if stale is None:
+                stale = value
+        return stale, stale is None
+
+    def remaining_ttl(self, key):
+        """ Returns the number of seconds the first fresh value of the given key stays valid, None without one
+
+        :rtype: float
+        """
+        for tier in self.tiers:
+            remaining = tier.remaining_ttl(key) if hasattr(tier, 'remaining_ttl') else None
+            if remaining is not None:
+                return remaining
+        return None
+
+    def get(self, key, default=None):
+        """ Returns the first fresh value cached for the given key, or the default """
+        value, fresh = self.lookup(key)
+        return value if value is not None and fresh else default
+
+    def set(self, key, value, ttl=None):
+        """ Caches the given value in every tier """
+        for tier in self.tiers:
+            tier.set(key, value, ttl=ttl)
+
+    def delete(self, key):
+        """ Removes the given key from every tier """
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def clear(self):
+        """ Removes every entry from every tier """
+        for tier in self.tiers:
+            tier.clear()
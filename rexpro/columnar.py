@@ -0,0 +1,257 @@
+from array import array
+
+import msgpack
+
+from rexpro import exceptions
+from rexpro._compat import bool_types, integer_types, float_types, iteritems, xrange
+from rexpro.messages import LazyResultList, bytearray_to_text
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+class ColumnBuilder(object):
+    """ Accumulates the values of a single result column into a compact typed buffer
+
+    The column kind is inferred from the first non-null value (bool, int, float, otherwise object) unless a dtype is
+    given. Inferred int columns are promoted to float when a float arrives, any other mismatch falls back to a plain
+    list of python objects.
+    """
+
+    BOOL = 'b'
+    INT = 'q'
+    FLOAT = 'd'
+    OBJECT = 'O'
+
+    def __init__(self, name, dtype=None):
+        """
+        :param name: the column name
+        :type name: str
+        :param dtype: the numpy dtype to materialize the column as, None to infer it
+        :type dtype: numpy.dtype | None
+        """
+        self.name = name
+        self.dtype = dtype
+        self.kind = None if dtype is None else self._kind_of_dtype(dtype)
+        self.values = self._new_values(self.kind) if self.kind else None
+        self.mask = bytearray()
+
+    @classmethod
+    def _kind_of_dtype(cls, dtype):
+        return {'b': cls.BOOL, 'i': cls.INT, 'u': cls.INT, 'f': cls.FLOAT}.get(dtype.kind, cls.OBJECT)
+
+    @classmethod
+    def _kind_of_value(cls, value):
+        if isinstance(value, bool_types):
+            return cls.BOOL
+        if isinstance(value, integer_types):
+            return cls.INT
+        if isinstance(value, float_types):
+            return cls.FLOAT
+        return cls.OBJECT
+
+    @classmethod
+    def _new_values(cls, kind, values=()):
+        return list(values) if kind == cls.OBJECT else array(kind, values)
+
+    def __len__(self):
+        return len(self.mask)
+
+    def pad(self, length):
+        """ Fills the column with nulls up to the given number of rows """
+        while len(self.mask) < length:
+            self.append(None)
+
+    def append(self, value):
+        if value is None:
+            self.mask.append(1)
+            if self.values is not None:
+                self.values.append(None if self.kind == self.OBJECT else 0)
+            return
+
+        if self.kind is None:
+            self.kind = self._kind_of_value(value)
+            self.values = self._new_values(self.kind, [None if self.kind == self.OBJECT else 0] * len(self.mask))
+        elif self.dtype is None and self.kind != self.OBJECT:
+            kind = self._kind_of_value(value)
+            if kind == self.INT and self.kind == self.FLOAT:
+                value = float(value)
+            elif kind != self.kind:
+                self._widen(kind)
+
+        if self.kind != self.OBJECT and self.dtype is not None:
+            try:
+                converted = float(value) if self.kind == self.FLOAT else int(value)
+            except (TypeError, ValueError, OverflowError):
+                raise exceptions.RexProException(
+                    "column {} value {!r} doesn't fit dtype {}".format(self.name, value, self.dtype))
+            # ie. 1.5 in an int column, or an int beyond a double's precision in a float column
+            if isinstance(value, integer_types + float_types) and converted != value:
+                raise exceptions.RexProException(
+                    "column {} value {!r} doesn't fit dtype {}".format(self.name, value, self.dtype))
+            value = converted
+
+        try:
+            self.values.append(value)
+        except OverflowError:
+            if self.dtype is not None:
+                raise exceptions.RexProException(
+                    "column {} value {!r} doesn't fit dtype {}".format(self.name, value, self.dtype))
+            self._widen(self.OBJECT)
+            self.values.append(value)
+        self.mask.append(0)
+
+    def _widen(self, kind):
+        if self.kind == self.INT and kind == self.FLOAT:
+            self.kind = self.FLOAT
+        else:
+            self.kind = self.OBJECT
+        values = self.values
+        if self.kind == self.OBJECT:
+            cast = bool if values.typecode == self.BOOL else lambda value: value
+            values = [None if null else cast(value) for value, null in zip(values, self.mask)]
+        self.values = self._new_values(self.kind, values)
+
+    def build(self):
+        """ Materializes the column
+
+        :returns: a numpy masked array for bool, int and float columns, otherwise a list with None for nulls
+        :rtype: numpy.ma.MaskedArray | list
+        """
+        if self.kind is None:
+            return [None] * len(self.mask)
+        if self.kind == self.OBJECT:
+            return self.values
+        data = numpy.frombuffer(self.values, dtype={self.BOOL: numpy.int8, self.INT: numpy.int64,
+                                                    self.FLOAT: numpy.float64}[self.kind])
+        mask = numpy.frombuffer(bytes(self.mask), dtype=numpy.bool_)
+        if self.dtype is not None:
+            data = self._cast(data, mask)
+        else:
+            data = data.astype({self.BOOL: numpy.bool_, self.INT: numpy.int64, self.FLOAT: numpy.float64}[self.kind])
+        return numpy.ma.MaskedArray(data, mask=mask)
+
+    def _cast(self, data, mask):
+        """ Casts the column to its schema dtype, raising instead of wrapping around or losing precision """
+        dtype = numpy.dtype(self.dtype)
+        cast = data.astype(dtype)
+        values = data[~mask]
+        if dtype.kind in 'iu':
+            info = numpy.iinfo(dtype)
+            lossy = values.size and (values.min() < info.min or values.max() > info.max)
+        elif dtype.kind == 'f':
+            info = numpy.finfo(dtype)
+            finite = values[numpy.isfinite(values)]
+            lossy = finite.size and numpy.abs(finite).max() > info.max
+            if not lossy:
+                # fractions are rounded to the narrower precision, whole numbers must stay exact
+                whole = values == numpy.trunc(values)
+                lossy = numpy.any(cast[~mask][whole].astype(data.dtype) != values[whole])
+        else:
+            lossy = False
+        if lossy:
+            raise exceptions.RexProException(
+                "column {} has values that don't fit dtype {}".format(self.name, dtype))
+        return cast
+
+
+class ColumnarResult(object):
+    """ Tabular script results stored column by column
+
+    Numeric and bool columns are numpy masked arrays where the mask flags nulls, string and object columns are lists.
+    """
+
+    def __init__(self, columns, length):
+        """
+        :param columns: the materialized columns by name
+        :type columns: dict
+        :param length: the number of rows
+        :type length: int
+        """
+        self.columns = columns
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def keys(self):
+        return self.columns.keys()
+
+    def __repr__(self):
+        return '<ColumnarResult {} rows x {} columns>'.format(self.length, len(self.columns))
+
+
+def materialize_columns(results, schema=None):
+    """ Builds a ColumnarResult from a list of maps (ie. results of ``.map()``) without building any per-row dicts
+    when the results are a ``LazyResultList``
+
+    :param results: the script results, a list of maps
+    :type results: LazyResultList | list
+    :param schema: the columns to keep mapped to their numpy dtype (``object`` keeps python values), all columns
+                   with inferred dtypes if None
+    :type schema: dict | None
+    :rtype: ColumnarResult
+    """
+    if numpy is None:  # pragma: no cover
+        raise ImportError("numpy is required for columnar results")
+
+    builders = {}
+    if schema is not None:
+        for name, dtype in iteritems(schema):
+            builders[name] = ColumnBuilder(name, numpy.dtype(dtype))
+
+    def builder_for(name):
+        builder = builders.get(name)
+        if builder is None and schema is None:
+            builder = builders[name] = ColumnBuilder(name)
+        return builder
+
+    if results is None:
+        results = []
+    elif isinstance(results, dict):
+        results = [results]
+
+    length = len(results)
+    if isinstance(results, LazyResultList):
+        raw = results.raw
+        # msgpack >= 1.0 refuses to buffer more than 100 MiB by default
+        unpacker = msgpack.Unpacker(max_buffer_size=len(raw))
+        unpacker.feed(raw)
+        for row in xrange(length):
+            try:
+                fields = unpacker.read_map_header()
+            except ValueError:
+                raise exceptions.RexProScriptException("columnar results must be a list of maps")
+            for _ in xrange(fields):
+                builder = builder_for(bytearray_to_text(unpacker.unpack()))
+                if builder is None:
+                    unpacker.skip()
+                    continue
+                builder.pad(row)
+                builder.append(bytearray_to_text(unpacker.unpack()))
+    else:
+        for row, values in enumerate(results):
+            if not isinstance(values, dict):
+                raise exceptions.RexProScriptException("columnar results must be a list of maps")
+            for name, value in iteritems(values):
+                builder = builder_for(name)
+                if builder is not None:
+                    builder.pad(row)
+                    builder.append(value)
+
+    columns = {}
+    for name, builder in iteritems(builders):
+        builder.pad(length)
+        columns[name] = builder.build()
+    return ColumnarResult(columns, length)
@@ -1,9 +1,25 @@
+from collections import OrderedDict
 from contextlib import contextmanager
-from socket import SHUT_RDWR
+from socket import SHUT_RDWR, timeout as SocketTimeout
+from threading import Lock
+import itertools
+import os
+import zlib
 
 from rexpro import exceptions, messages
+from rexpro._compat import QueueEmpty, text_type
+from rexpro.cache import decode_results, encode_results, lookup_result, result_cache_key
+from rexpro.columnar import materialize_columns
+from rexpro.decoding import ParallelMsgPackScriptResponse
+from rexpro.elements import decode_element
 from rexpro.exceptions import RexProConnectionException
-from rexpro.messages import ErrorResponse
+from rexpro.messages import ErrorResponse, LazyResultList
+from rexpro.sessions import session_fingerprint
+
+
+@contextmanager
+def _untimed():
+    yield
 
 
 class RexProBaseConnectionPool(object):
@@ -16,7 +32,9 @@ class RexProBaseConnectionPool(object):
     CONN_CLASS = None
 
     def __init__(self, host, port, graph_name, graph_obj_name='g', username='', password='', timeout=None,
-                 pool_size=10, with_session=False, session_less=False):
+                 pool_size=10, with_session=False, session_less=False, decode_elements=False, element_cache=None,
+                 result_cache=None, decoder=None, lazy_session=False, session_shards=1,
+                 session_setup=None, session_store=None, limiter=None, shedder=None):
         """
         Connection constructor
 
@@ -36,8 +54,40 @@ class RexProBaseConnectionPool(object):
         :type pool_size: int
         :param with_session: share session with connections
         :type with_session: bool
+        :param session_shards: the number of sessions shared by the connections when ``with_session`` is set, each
+                               checkout is bound to one of them round-robin, or by hash of the ``affinity`` passed to
+                               ``connection()``
+        :type session_shards: int
+        :param session_setup: scripts run with ``isolate=False`` in each new shared session, ie. to define functions
+                              or bindings every request can use (optional)
+        :type session_setup: list of str
+        :param session_store: persists the shared session keys, restarted processes resume the stored sessions whose
+                              setup scripts match instead of opening and setting up new ones (optional)
+        :type session_store: rexpro.sessions.SessionStore
         :param session_less: sending msg without creating session
         :type session_less: bool
+        :param decode_elements: decode vertices and edges into compact ``elements.Vertex`` and ``elements.Edge``
+        :type decode_elements: bool
+        :param element_cache: identity map the vertices and edges of every response are stored in, may be shared
+                              between pools (optional)
+        :type element_cache: rexpro.cache.ElementCache
+        :param result_cache: backend storing the results of ``execute(..., cache_ttl=...)`` calls, ie.
+                             ``cache.LRUCache``, the cross-process ``cache.SharedMemoryCache`` or the persistent
+                             ``cache.SQLiteCache``, combined with ``cache.TieredCache`` (optional)
+        :type result_cache: rexpro.cache.LRUCache | rexpro.cache.SharedMemoryCache | rexpro.cache.SQLiteCache |
+                            rexpro.cache.TieredCache
+        :param decoder: decodes large responses in worker processes (optional)
+        :type decoder: rexpro.decoding.ProcessPoolDecoder
+        :param lazy_session: defer opening the connections' sessions to their first request, see
+                             ``RexProBaseConnection``
+        :type lazy_session: bool
+        :param limiter: adapts the number of connections checked out at once to the latencies and timeouts of the
+                        requests sent on them, the connections beyond the limit stay parked in the pool. ``pool_size``
+                        stays the maximum number of connections (optional)
+        :type limiter: rexpro.limits.AIMDLimiter
+        :param shedder: rejects checkouts that waited too long while the pool is overloaded with
+                        ``RexProOverloadException`` (optional)
+        :type shedder: rexpro.limits.CoDelShedder
         """
 
         self.host = host
@@ -48,16 +98,178 @@ class RexProBaseConnectionPool(object):
         self.password = password
         self.timeout = timeout
         self.session_less = session_less
+        self.decode_elements = decode_elements
+        self.element_cache = element_cache
+        self.result_cache = result_cache
+        self.decoder = decoder
+        self.lazy_session = lazy_session
+        self._refreshing = set()
+        self._refreshing_lock = Lock()
 
         self.pool_size = pool_size
         self.pool = self.QUEUE_CLASS()
         self.size = 0
+        self._permits = self.QUEUE_CLASS()
+        self._permit_count = 0
+        self._permit_lock = Lock()
         self.session_key = None
+        self.session_keys = []
+        self.session_shards = max(1, session_shards)
+        self.session_setup = list(session_setup or [])
+        self.session_store = session_store
+        self.limiter = limiter
+        self.shedder = shedder
+        self._shard_counter = itertools.count()
+        self.with_session = with_session and session_less is False
+        self._pid = os.getpid()
 
-        if with_session and session_less is False:
-            with self.connection() as conn:
-                self.session_key = conn._session_key
-                conn.pool_session = self.session_key
+        if self.with_session:
+            self._open_pool_session()
+
+    def _open_pool_session(self):
+        """ Opens the sessions shared by the pool connections, resuming the ones found in the session store """
+        fingerprint = session_fingerprint(self.host, self.port, self.graph_name, self.graph_obj_name, self.username,
+                                          self.session_setup)
+        stored = self.session_store.load(fingerprint) if self.session_store is not None else []
+        with self.connection(transaction=False, session_key=stored[0] if stored else None) as conn:
+            # without stored sessions, the connection opened a new one
+            opened = None if stored else conn._session_key
+            session_keys = [key for key in stored[:self.session_shards] if self._resume_session(conn, key)]
+            while len(session_keys) < self.session_shards:
+                if opened:
+                    conn._session_key, opened = opened, None
+                else:
+                    conn._open_session()
+                for script in self.session_setup:
+                    conn.execute(script, isolate=False, transaction=False)
+                session_keys.append(conn._session_key)
+            self.session_keys = session_keys
+            self.session_key = session_keys[0]
+            conn._session_key = conn.pool_session = self.session_key
+        if self.session_store is not None and session_keys != stored:
+            self.session_store.save(fingerprint, session_keys)
+
+    def _resume_session(self, conn, session_key):
+        """ Checks a stored session is still alive with a cheap in-session request
+
+        :rtype: bool
+        """
+        conn._session_key = session_key
+        try:
+            conn.execute('1', isolate=False, transaction=False)
+        except exceptions.RexProInvalidSessionException:
+            return False
+        return True
+
+    def _session_shard(self, affinity=None):
+        """ Picks the shared session a checkout is bound to
+
+        :param affinity: checkouts with the same affinity key share a session, round-robin if None
+        :type affinity: str | int | None
+        :rtype: str
+        """
+        if affinity is None:
+            index = next(self._shard_counter)
+        else:
+            # stable across processes, unlike hash()
+            index = zlib.crc32(text_type(affinity).encode('utf-8')) & 0xffffffff
+        return self.session_keys[index % len(self.session_keys)]
+
+    def _keeps_session(self, conn):
+        """ Whether a checkout without affinity keeps the connection's session shard rather than picking another one,
+        for connections bound to their caller whose session is kept warm across checkouts
+
+        :param conn: the connection being checked out
+        :type conn: RexProConnection
+        :rtype: bool
+        """
+        return False
+
+    def _check_pid(self):
+        """ Drops the connections inherited from the parent process after a fork, their sockets and sessions are
+        still used by the parent. Connections are only discarded locally, no session kill is sent on the shared
+        sockets, and the pool refills (and reopens its shared session) lazily.
+
+        :returns: whether the pool was reset
+        :rtype: bool
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return False
+        self._pid = pid
+        inherited = self.pool
+        self.pool = self.QUEUE_CLASS()
+        self.size = 0
+        self.session_key = None
+        self.session_keys = []
+        self._refreshing = set()
+        self._refreshing_lock = Lock()
+        self._permits = self.QUEUE_CLASS()
+        self._permit_count = 0
+        self._permit_lock = Lock()
+        while not inherited.empty():
+            self._discard(inherited.get_nowait())
+        if self.with_session:
+            self._open_pool_session()
+        return True
+
+    def _discard(self, conn):
+        """ Closes this process' handle on the socket of a connection inherited from the parent process, without
+        shutting the socket down or talking to the server
+        """
+        try:
+            if conn._conn is not None:
+                conn._conn.close()
+        except Exception:
+            pass
+        conn._opened = False
+
+    def _retire_idle_permits(self):
+        """ Retires the queued permits beyond a lowered limit, called with the permit lock held """
+        while self._permit_count > self.limiter.limit:
+            try:
+                self._permits.get_nowait()
+            except QueueEmpty:
+                return
+            self._permit_count -= 1
+
+    def _acquire_permit(self):
+        """ Waits until fewer connections than the limiter's limit are checked out """
+        with self._permit_lock:
+            self._retire_idle_permits()
+            issued = max(0, self.limiter.limit - self._permit_count)
+            self._permit_count += issued
+        for _ in range(issued):
+            self._permits.put(True)
+        self._permits.get()
+
+    def _release_permit(self):
+        """ Returns a checkout permit, or retires it while more permits than the limit are checked out """
+        with self._permit_lock:
+            self._retire_idle_permits()
+            retired = self._permit_count > self.limiter.limit
+            if retired:
+                self._permit_count -= 1
+        if not retired:
+            self._permits.put(True)
+
+    @contextmanager
+    def _limited_round_trip(self):
+        """ Context manager feeding the latency of a request's round-trip, and whether it timed out or lost its
+        connection, to the limiter
+        """
+        limiter = self.limiter
+        started = limiter.clock()
+        dropped = False
+        try:
+            yield
+        except (RexProConnectionException, SocketTimeout):
+            dropped = True
+            raise
+        finally:
+            with self._permit_lock:
+                in_flight = self._permit_count - self._permits.qsize()
+            limiter.update(limiter.clock() - started, in_flight, dropped=dropped)
 
     def get(self, *args, **kwargs):
         """ Retrieve a rexpro connection from the pool
@@ -76,6 +288,7 @@ class RexProBaseConnectionPool(object):
         :type password: str
         :rtype: RexProConnection
         """
+        self._check_pid()
         pool = self.pool
         if self.size >= self.pool_size or pool.qsize():
             return pool.get()
@@ -94,10 +307,15 @@ class RexProBaseConnectionPool(object):
         :param conn: A rexpro connection to restore to the pool
         :type conn: RexProSyncConnection | RexProGeventConnection | RexProEventletConnection | RexProConnection
         """
+        if self._check_pid() or conn._pid != self._pid:
+            # checked out before the fork
+            self._discard(conn)
+            return
         self.pool.put(conn)
 
     def close_all(self, force_commit=False):
         """ Close all pool connections for a clean shutdown """
+        self._check_pid()
         while not self.pool.empty():
             conn = self.pool.get_nowait()
             try:
@@ -128,6 +346,10 @@ class RexProBaseConnectionPool(object):
         :type username: str
         :param password: the password to use for authentication (optional)
         :type password: str
+        :param affinity: with ``session_shards``, checkouts with the same affinity key share a session (optional)
+        :type affinity: str | int
+        :param priority: with a ``shedder``, checkouts of at least its ``exempt_priority`` are never shed (default: 0)
+        :type priority: int
         """
         conn = self.create_connection(*args, **kwargs)
         if not conn:
@@ -169,7 +391,14 @@ class RexProBaseConnectionPool(object):
                                timeout=timeout or self.timeout,
                                session_key=session_key or self.session_key,
                                pool_session=self.session_key,
-                               session_less=self.session_less if session_less is None else session_less)
+                               session_less=self.session_less if session_less is None else session_less,
+                               decode_elements=self.decode_elements,
+                               element_cache=self.element_cache,
+                               result_cache=self.result_cache,
+                               refresh_results=self._refresh_results,
+                               decoder=self.decoder,
+                               lazy_session=self.lazy_session,
+                               round_trip=self._limited_round_trip if self.limiter is not None else None)
 
     def create_connection(self, *args, **kwargs):
         """ Get a connection from the pool if available, otherwise return a new connection if the pool isn't full
@@ -186,10 +415,34 @@ class RexProBaseConnectionPool(object):
         :type username: str
         :param password: the password to use for authentication (optional)
         :type password: str
+        :param affinity: with ``session_shards``, checkouts with the same affinity key share a session (optional)
+        :type affinity: str | int
+        :param priority: with a ``shedder``, checkouts of at least its ``exempt_priority`` are never shed (default: 0)
+        :type priority: int
         :rtype: RexProConnection
         """
-        conn = self.get(*args, **kwargs)
-        conn.open(soft=conn._opened)  # if opened, soft open, else hard open
+        affinity = kwargs.pop('affinity', None)
+        priority = kwargs.pop('priority', 0)
+        shedder = self.shedder
+        started = shedder.clock() if shedder is not None else None
+        if self.limiter is not None:
+            self._check_pid()
+            self._acquire_permit()
+        try:
+            conn = self.get(*args, **kwargs)
+            if shedder is not None:
+                try:
+                    shedder.check(shedder.clock() - started, priority)
+                except exceptions.RexProOverloadException:
+                    self.put(conn)
+                    raise
+            if len(self.session_keys) > 1 and (affinity is not None or not self._keeps_session(conn)):
+                conn._session_key = conn.pool_session = self._session_shard(affinity)
+            conn.open(soft=conn._opened)  # if opened, soft open, else hard open
+        except:
+            if self.limiter is not None:
+                self._release_permit()
+            raise
         return conn
 
     def close_connection(self, conn, soft=False):
@@ -200,9 +453,187 @@ class RexProBaseConnectionPool(object):
         :param soft: define whether to soft-close the connection or hard-close the socket
         :type soft: bool
         """
-        if conn._opened:
+        if conn._opened and conn._pid == os.getpid():
             conn.close(soft=soft)
         self.put(conn)
+        if self.limiter is not None and conn._pid == self._pid:
+            self._release_permit()
+
+    def _spawn(self, func, *args, **kwargs):
+        """ Run the given function concurrently, using the connector's concurrency primitive
+
+        :param func: the function to run
+        :type func: callable
+        :returns: a task handle to be passed to ``_join``
+        """
+        raise NotImplementedError
+
+    def _join(self, task, timeout=None):
+        """ Wait for a task started by ``_spawn`` and return its result, re-raising any exception it raised
+
+        :param task: the task handle returned by ``_spawn``
+        :param timeout: how long to wait for the task, in seconds (default: wait forever)
+        :type timeout: float
+        """
+        raise NotImplementedError
+
+    PAGE_SCRIPT = '({script})[rexpro_page_low..rexpro_page_high]'
+
+    def paginate(self, script, params=None, page_size=100, prefetch=True,
+                 language=messages.ScriptRequest.Language.GROOVY):
+        """ Generator that executes a traversal one page at a time, yielding each page's results
+
+        A range step is appended to the traversal, so the script must be a single gremlin pipeline expression with a
+        stable iteration order (ie. ``g.V.has('type', kind)`` or ``g.v(id).out.order{it.a.name <=> it.b.name}``).
+        While a page is being consumed the next one is fetched on another pooled connection. Paging stops once a page
+        shorter than ``page_size`` comes back.
+
+        Example::
+
+            for page in pool.paginate("g.V.has('type', kind)", {'kind': 'user'}, page_size=500):
+                export(page)
+
+        :param script: the gremlin traversal to page through
+        :type script: str
+        :param params: the parameters to execute the script with
+        :type params: dict
+        :param page_size: the number of results per page
+        :type page_size: int
+        :param prefetch: fetch page k+1 in the background while page k is consumed (default: True)
+        :type prefetch: bool
+        :param language: the script language that should be used (defaults to groovy)
+        :type language: str
+        """
+        paged_script = self.PAGE_SCRIPT.format(script=script)
+
+        def fetch_page(page):
+            page_params = dict(params or {})
+            page_params['rexpro_page_low'] = page * page_size
+            page_params['rexpro_page_high'] = (page + 1) * page_size - 1
+            with self.connection(transaction=False) as conn:
+                return conn.execute(paged_script, page_params, language=language) or []
+
+        page = 0
+        task = self._spawn(fetch_page, page) if prefetch else None
+        while True:
+            results = self._join(task) if prefetch else fetch_page(page)
+            page += 1
+            if prefetch and len(results) >= page_size:
+                task = self._spawn(fetch_page, page)
+            if results:
+                yield results
+            if len(results) < page_size:
+                return
+
+    def _refresh_results(self, key, script, params, language, cache_ttl):
+        """ Re-executes a script on another pooled connection in the background and caches the fresh results, used
+        by connections serving stale cached results
+
+        :returns: the refresh task, None if the key is already being refreshed
+        """
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with self.connection(transaction=False) as conn:
+                    results = conn.execute(script, params, language=language)
+                self.result_cache.set(key, encode_results(results), ttl=cache_ttl)
+            except Exception:
+                # the stale results keep being served until the next attempt
+                pass
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        return self._spawn(refresh)
+
+    GET_VERTICES_SCRIPT = 'ids.collect { g.v(it) }'
+    UPDATE_VERTEX_SCRIPT = """
+    def v = g.v(id)
+    properties.each { key, value -> v.setProperty(key, value) }
+    v
+    """
+    REMOVE_VERTEX_SCRIPT = 'g.removeVertex(g.v(id))'
+
+    def get_vertex(self, vertex_id):
+        """ Returns the given vertex, from the element cache when it holds it, otherwise fetched from rexster
+
+        :param vertex_id: the vertex id
+        :returns: the rexster serialization of the vertex, or None if it doesn't exist
+        :rtype: dict | rexpro.elements.Vertex
+        """
+        return self.get_vertices([vertex_id])[0]
+
+    def get_vertices(self, vertex_ids):
+        """ Returns the given vertices, the ones missing from the element cache are fetched from rexster in a single
+        request
+
+        :param vertex_ids: the vertex ids
+        :type vertex_ids: list
+        :returns: the rexster serialization of each vertex, in order, None for the vertices that don't exist
+        :rtype: list
+        """
+        cache = self.element_cache
+        found = {}
+        missing = OrderedDict()
+        for vertex_id in vertex_ids:
+            if vertex_id in found or vertex_id in missing:
+                continue
+            vertex = cache.get_element(self.graph_name, cache.VERTEX, vertex_id) if cache is not None else None
+            if vertex is None:
+                missing[vertex_id] = True
+            else:
+                found[vertex_id] = vertex
+
+        if missing:
+            missing = list(missing)
+            with self.connection(transaction=False) as conn:
+                results = conn.execute(self.GET_VERTICES_SCRIPT, {'ids': missing}) or []
+            for vertex_id, vertex in zip(missing, results):
+                found[vertex_id] = vertex
+        return [found.get(vertex_id) for vertex_id in vertex_ids]
+
+    def update_vertex(self, vertex_id, properties):
+        """ Sets the given properties on a vertex and invalidates its cached copy
+
+        :param vertex_id: the vertex id
+        :param properties: the properties to set
+        :type properties: dict
+        :returns: the updated vertex
+        :rtype: dict | rexpro.elements.Vertex
+        """
+        try:
+            with self.connection() as conn:
+                results = conn.execute(self.UPDATE_VERTEX_SCRIPT, {'id': vertex_id, 'properties': properties})
+        finally:
+            # dropped once the transaction is over, so reads made during the write can't leave a stale copy behind
+            self.invalidate_vertex(vertex_id)
+        vertex = results[0] if results else None
+        if vertex is not None and self.element_cache is not None:
+            self.element_cache.store_element(self.graph_name, vertex)
+        return vertex
+
+    def remove_vertex(self, vertex_id):
+        """ Removes a vertex and invalidates its cached copy
+
+        :param vertex_id: the vertex id
+        """
+        try:
+            with self.connection() as conn:
+                conn.execute(self.REMOVE_VERTEX_SCRIPT, {'id': vertex_id})
+        finally:
+            self.invalidate_vertex(vertex_id)
+
+    def invalidate_vertex(self, vertex_id):
+        """ Removes a vertex from the element cache, call it after writing to the vertex with a custom script
+
+        :param vertex_id: the vertex id
+        """
+        if self.element_cache is not None:
+            self.element_cache.invalidate(self.graph_name, self.element_cache.VERTEX, vertex_id)
 
 
 class RexProBaseConnection(object):
@@ -214,7 +645,8 @@ class RexProBaseConnection(object):
     SOCKET_CLASS = None
 
     def __init__(self, host, port, graph_name, graph_obj_name='g', username='', password='', timeout=None,
-                 session_key=None, pool_session=None, session_less=None):
+                 session_key=None, pool_session=None, session_less=None, decode_elements=False, element_cache=None,
+                 result_cache=None, refresh_results=None, decoder=None, lazy_session=False, round_trip=None):
         """
         Connection constructor
 
@@ -230,6 +662,24 @@ class RexProBaseConnection(object):
         :type username: str
         :param password: the password to use for authentication (optional)
         :type password: str
+        :param decode_elements: decode vertices and edges into compact ``elements.Vertex`` and ``elements.Edge``
+        :type decode_elements: bool
+        :param element_cache: identity map the vertices and edges of every response are stored in (optional)
+        :type element_cache: rexpro.cache.ElementCache
+        :param result_cache: backend storing the results of ``execute(..., cache_ttl=...)`` calls (optional)
+        :type result_cache: rexpro.cache.LRUCache | rexpro.cache.SharedMemoryCache
+        :param refresh_results: called with (cache key, script, params, language, cache_ttl) to refresh a stale cached
+                                result in the background, stale results are treated as misses without it
+        :type refresh_results: callable
+        :param decoder: decodes large responses in worker processes (optional)
+        :type decoder: rexpro.decoding.ProcessPoolDecoder
+        :param lazy_session: don't open the session when connecting, the session request is sent in the same write as
+                             the first script request, which runs session-less. Scripts executed with
+                             ``isolate=False`` and transactions open the session first.
+        :type lazy_session: bool
+        :param round_trip: returns a context manager wrapped around the round-trip of each script request, the pool's
+                           limiter measures the request latencies with it (optional)
+        :type round_trip: callable
         """
         self.host = host
         self.port = port
@@ -241,26 +691,56 @@ class RexProBaseConnection(object):
         self._session_key = session_key
         self.pool_session = pool_session
         self.session_less = session_less
+        self.decode_elements = decode_elements
+        self.element_cache = element_cache
+        self.result_cache = result_cache
+        self.refresh_results = refresh_results
+        self.decoder = decoder
+        self.lazy_session = lazy_session
+        self.round_trip = round_trip
 
         self._conn = None
+        self._session_lock = Lock()
         self._in_transaction = False
+        # results received in the open transaction, cached once it commits
+        self._uncommitted_results = []
         self._opened = False
+        self._pid = None
 
         self.open()
 
     def _select(self, rlist, wlist, xlist, timeout=None):
         raise NotImplementedError
 
+    def _run_blocking(self, func):
+        """ Runs a blocking call, such as the wait for a decoder's worker process. The cooperative connectors run it
+        in their hub's thread pool, so the other greenlets keep running meanwhile
+        """
+        return func()
+
+    def _session_request(self):
+        """ Returns the message opening a session """
+        return messages.SessionRequest(
+            username=self.username,
+            password=self.password,
+            graph_name=self.graph_name
+        )
+
+    @contextmanager
+    def _opening_session(self):
+        """ Context manager yielding whether the request made in the block must open the lazy session. Only one
+        request at a time opens it, the others wait for it and use the session it opened
+        """
+        if not self.lazy_session or self.session_less is not False or self._session_key:
+            yield False
+            return
+        with self._session_lock:
+            # opened by another request while this one waited
+            yield not self._session_key
+
     def _open_session(self):
         """ Creates a session with rexster and creates the graph object """
-        self._conn.send_message(
-            messages.SessionRequest(
-                username=self.username,
-                password=self.password,
-                graph_name=self.graph_name
-            )
-        )
-        response = self._conn.get_response()
+        response = self._send_request(self._session_request())
         if isinstance(response, ErrorResponse):
             response.raise_exception()
         self._session_key = response.session_key
@@ -274,6 +754,7 @@ class RexProBaseConnection(object):
             isolate=False,
             transaction=False,
         )
+        self._uncommitted_results = []
         self._in_transaction = True
 
     def close_transaction(self, success=True):
@@ -286,11 +767,17 @@ class RexProBaseConnection(object):
         """
         if not self._in_transaction:
             raise exceptions.RexProScriptException("transaction is not open")
-        self.execute(
-            script='g.stopTransaction({})'.format('SUCCESS' if success else 'FAILURE'),
-            isolate=False,
-            transaction=False
-        )
+        try:
+            self.execute(
+                script='g.stopTransaction({})'.format('SUCCESS' if success else 'FAILURE'),
+                isolate=False,
+                transaction=False
+            )
+            if success and self.element_cache is not None:
+                for results in self._uncommitted_results:
+                    self.element_cache.store_results(self.graph_name, results)
+        finally:
+            self._uncommitted_results = []
         self._in_transaction = False
 
     def close(self, soft=False):
@@ -299,16 +786,15 @@ class RexProBaseConnection(object):
         :param soft: Softly close the connection - do not actually close the socket (default: False)
         :type soft: bool
         """
-        # close the session, unless it is associated with a pool
-        if not self.pool_session and self.session_less is False:
-            self._conn.send_message(
+        # close the session, unless it is associated with a pool or it was never opened
+        if not self.pool_session and self.session_less is False and self._session_key:
+            response = self._send_request(
                 messages.SessionRequest(
                     session_key=self._session_key,
                     graph_name=self.graph_name,
                     kill_session=True
                 )
             )
-            response = self._conn.get_response()
             self._session_key = None
 
             if isinstance(response, ErrorResponse):
@@ -333,13 +819,14 @@ class RexProBaseConnection(object):
                 self._conn.connect((self.host, self.port))
             except Exception as e:
                 raise RexProConnectionException("Could not connect to database: %s" % e)
+            self._pid = os.getpid()
 
         # indicate that we're not yet in a transaction
         self._in_transaction = False
 
         # get a new session key if there isn't one already
         self._opened = True
-        if not self._session_key and self.session_less is False:
+        if not self._session_key and self.session_less is False and not self.lazy_session:
             self._open_session()
 
     def test_connection(self):
@@ -365,7 +852,8 @@ class RexProBaseConnection(object):
                             self._session_key = self.pool_session
                         elif self.session_less is False:
                             self._session_key = None
-                            self._open_session()
+                            if not self.lazy_session:
+                                self._open_session()
                         return None
                 except Exception as e:
                     # Ignore this at let the outer handler handle iterations
@@ -397,7 +885,7 @@ class RexProBaseConnection(object):
             self.close_transaction(True)
 
     def execute(self, script, params=None, isolate=True, transaction=True,
-                language=messages.ScriptRequest.Language.GROOVY):
+                language=messages.ScriptRequest.Language.GROOVY, lazy=False, cache_ttl=None):
         """
         executes the given gremlin script with the provided parameters
 
@@ -411,28 +899,201 @@ class RexProBaseConnection(object):
         :type transaction: bool
         :param language: the script language that should be used (defaults to groovy)
         :type language: str
+        :param lazy: keep the raw response and decode result elements on first access, see
+                     ``messages.LazyMsgPackScriptResponse``
+        :type lazy: bool
+        :param cache_ttl: serve the results from the connection's ``result_cache`` for this many seconds, only use it
+                          for read-only scripts (ignored for lazy results)
+        :type cache_ttl: float
+
+        :rtype: list
+        """
+        key = None
+        if cache_ttl is not None and self.result_cache is not None and not lazy:
+            key = result_cache_key(self.graph_name, script, params, language)
+            cached, fresh = lookup_result(self.result_cache, key)
+            if cached is not None and not fresh and self.refresh_results is not None:
+                self.refresh_results(key, script, params, language, cache_ttl)
+                fresh = True
+            if cached is not None and fresh:
+                return decode_results(cached, object_hook=decode_element if self.decode_elements else None)
+
+        results = self._execute_request(
+            messages.ScriptRequest,
+            transaction,
+            script_response_class=messages.LazyMsgPackScriptResponse if lazy else None,
+            script=script,
+            params=params or {},
+            isolate=isolate,
+            language=language
+        )
+        if key is not None:
+            self.result_cache.set(key, encode_results(results), ttl=cache_ttl)
+        return results
+
+    def execute_batch(self, statements, isolate=True, transaction=True,
+                      language=messages.ScriptRequest.Language.GROOVY):
+        """
+        executes several independent gremlin scripts in a single request, see ``messages.BatchScriptRequest``
+
+        Example::
+
+            conn = RexproSyncConnection(host, port, graph_name)
+            v1, v2 = conn.execute_batch([
+                ('g.addVertex([name:name])', {'name': 'v1'}),
+                ('g.addVertex([name:name])', {'name': 'v2'}),
+            ])
+
+        :param statements: (script, params) pairs to execute, a bare script may be given for statements without params
+        :type statements: list
+        :param isolate: wraps the batch in a closure so any variables set aren't persisted for the next execute call
+        :type isolate: bool
+        :param transaction: the whole batch will be wrapped in a single transaction if set to True (default)
+        :type transaction: bool
+        :param language: the script language that should be used (defaults to groovy)
+        :type language: str
+
+        :rtype: list
+        """
+        if not statements:
+            return []
+
+        return self._execute_request(
+            messages.BatchScriptRequest,
+            transaction,
+            statements=statements,
+            isolate=isolate,
+            language=language
+        )
+
+    def execute_columnar(self, script, params=None, schema=None, isolate=True, transaction=True,
+                         language=messages.ScriptRequest.Language.GROOVY):
+        """
+        executes a gremlin script returning a list of maps (ie. property maps from ``.map()``) and decodes the results
+        straight into columns, see ``columnar.materialize_columns``. Requires numpy.
+
+        Example::
+
+            conn = RexproSyncConnection(host, port, graph_name)
+            table = conn.execute_columnar("g.V.has('type', 'user').map()", schema={'age': 'int32', 'name': object})
+            table['age'].mean()
+
+        :param script: the gremlin script to isolate
+        :type script: str
+        :param params: the parameters to execute the script with
+        :type params: dictionary
+        :param schema: the columns to keep mapped to their numpy dtype, all columns with inferred dtypes if None
+        :type schema: dict
+        :param isolate: wraps the script in a closure so any variables set aren't persisted for the next execute call
+        :type isolate: bool
+        :param transaction: query will be wrapped in a transaction if set to True (default)
+        :type transaction: bool
+        :param language: the script language that should be used (defaults to groovy)
+        :type language: str
+
+        :rtype: rexpro.columnar.ColumnarResult
+        """
+        results = self.execute(script, params=params, isolate=isolate, transaction=transaction, language=language,
+                               lazy=True)
+        return materialize_columns(results, schema=schema)
+
+    def _send_request(self, request, **kwargs):
+        """
+        sends a request message and returns its response
+
+        :param request: the message to send
+        :type request: RexProMessage
+        :param kwargs: options passed on to the socket's ``get_response``
+
+        :rtype: RexProMessage
+        """
+        self._conn.send_message(request)
+        return self._conn.get_response(**kwargs)
+
+    def _send_pipelined(self, session_request, request, **kwargs):
+        """
+        sends a session request and a script request in a single write and returns both responses
+
+        :param session_request: the session request to send first
+        :type session_request: SessionRequest
+        :param request: the script request
+        :type request: ScriptRequest
+        :param kwargs: options passed on to the socket's ``get_response``
+
+        :returns: the session response and the script response
+        :rtype: tuple
+        """
+        self._conn.sendall(bytes(session_request.serialize() + request.serialize()))
+        session_response = None
+        response = None
+        for _ in range(2):
+            received = self._conn.get_response(**kwargs)
+            if isinstance(received, messages.SessionResponse) or (
+                    isinstance(received, ErrorResponse) and received.request_id == session_request.request_id):
+                session_response = received
+            else:
+                response = received
+        return session_response, response
+
+    def _execute_request(self, request_class, transaction, script_response_class=None, **kwargs):
+        """
+        sends a script request built from the given message class and returns the results
+
+        :param request_class: the script request message class to send
+        :type request_class: type
+        :param transaction: query will be wrapped in a transaction if set to True
+        :type transaction: bool
+        :param script_response_class: the message class used to deserialize the response
+        :type script_response_class: type
 
         :rtype: list
         """
         if self._in_transaction:
             transaction = False
 
-        self._conn.send_message(
-            messages.ScriptRequest(
-                script=script,
-                params=params or {},
-                in_session=False if self.session_less else True,
-                session_key=None if self.session_less else self._session_key,
-                isolate=isolate,
+        # requests sharing the connection wait for the first one to open the lazy session, and then join it
+        with self._opening_session() as pipeline_session:
+            if pipeline_session and not kwargs.get('isolate', True):
+                # the script's variables must be kept in the session
+                self._open_session()
+                pipeline_session = False
+            session_less = self.session_less or pipeline_session
+
+            request = request_class(
+                in_session=False if session_less else True,
+                session_key=None if session_less else self._session_key,
                 in_transaction=transaction,
-                language=language,
-                graph_name=self.graph_name if self.session_less else None,
-                graph_obj_name=self.graph_obj_name if self.session_less else None
+                graph_name=self.graph_name if session_less else None,
+                graph_obj_name=self.graph_obj_name if session_less else None,
+                **kwargs
             )
-        )
-        response = self._conn.get_response()
+            response_kwargs = {}
+            if self.decoder is not None and script_response_class is None:
+                script_response_class = ParallelMsgPackScriptResponse
+                response_kwargs['decoder'] = self.decoder
+                response_kwargs['wait'] = self._run_blocking
+            response_kwargs['script_response_class'] = script_response_class
+            response_kwargs['object_hook'] = decode_element if self.decode_elements else None
+            with self.round_trip() if self.round_trip is not None else _untimed():
+                if pipeline_session:
+                    session_response, response = self._send_pipelined(self._session_request(), request,
+                                                                      **response_kwargs)
+                else:
+                    response = self._send_request(request, **response_kwargs)
+            if pipeline_session:
+                if isinstance(session_response, ErrorResponse):
+                    session_response.raise_exception()
+                self._session_key = session_response.session_key
 
         if isinstance(response, messages.ErrorResponse):
             response.raise_exception()
 
+        # lazily decoded results are left alone, walking them would decode every element. The elements read or
+        # written in a client side transaction are only cached once it commits, they'd be phantoms after a rollback
+        if self.element_cache is not None and not isinstance(response.results, LazyResultList):
+            if self._in_transaction:
+                self._uncommitted_results.append(response.results)
+            else:
+                self.element_cache.store_results(self.graph_name, response.results)
+
         return response.results
@@ -1,8 +1,11 @@
 from gevent.socket import socket as gsocket
 from gevent.queue import Queue as gQueue
 from gevent.select import select as gselect
+import gevent
 
 from rexpro.connectors.base import RexProBaseConnection, RexProBaseConnectionPool
+from rexpro.fanout import imap
+from rexpro.loader import ElementLoader
 
 import struct
 
@@ -24,7 +27,7 @@ class RexProGeventSocket(gsocket):
         """
         self.send(msg.serialize())
 
-    def get_response(self):
+    def get_response(self, script_response_class=None, **kwargs):
         """
         gets the message type and message from rexster
 
@@ -65,6 +68,11 @@ class RexProGeventSocket(gsocket):
         | error        | response | 0     | A RexPro server error response                                |
         +--------------+----------+-------+---------------------------------------------------------------+
 
+        :param script_response_class: the message class used to deserialize script responses
+                                      (defaults to MsgPackScriptResponse)
+        :type script_response_class: type
+        :param kwargs: additional options passed on to the script response deserializer
+
         :returns: RexProMessage
         """
         msg_version = self.recv(1)
@@ -98,18 +106,19 @@ class RexProGeventSocket(gsocket):
 
         # Update the looping to retrieve data without entering an infinite loop if
         # a connection goes down.
-        response = bytearray()
+        # The body is received straight into a preallocated buffer, so responses can keep views over it
+        response = bytearray(msg_len)
+        view = memoryview(response)
         rec_len = 0
         final_msg_len = msg_len
         while msg_len > 0:
-            chunk = self.recv(msg_len)
+            chunk_len = self.recv_into(view[rec_len:], msg_len)
             # If an empty string is sent break out. We'll assume
             # that the connection is dropped.
-            if not chunk:
+            if not chunk_len:
                 break
-            response.extend(chunk)
-            rec_len += len(chunk)
-            msg_len -= len(chunk)
+            rec_len += chunk_len
+            msg_len -= chunk_len
 
         # Check the received length versus the expected message length if they differ something
         # happened with the connection causing an early termination of the loop.
@@ -122,12 +131,14 @@ class RexProGeventSocket(gsocket):
         type_map = {
             MessageTypes.ERROR: messages.ErrorResponse,
             MessageTypes.SESSION_RESPONSE: messages.SessionResponse,
-            MessageTypes.SCRIPT_RESPONSE: messages.MsgPackScriptResponse
+            MessageTypes.SCRIPT_RESPONSE: script_response_class or messages.MsgPackScriptResponse
         }
 
         if msg_type not in type_map:  # pragma: no cover
             # this shouldn't happen unless there is an unknown rexpro version change
             raise exceptions.RexProConnectionException("can't deserialize message type {}".format(msg_type))
+        if msg_type == MessageTypes.SCRIPT_RESPONSE:
+            return type_map[int(msg_type)].deserialize(response, **kwargs)
         return type_map[int(msg_type)].deserialize(response)
 
 
@@ -139,6 +150,9 @@ class RexProGeventConnection(RexProBaseConnection):
     def _select(self, rlist, wlist, xlist, timeout=None):
         return gselect(rlist, wlist, xlist, timeout=timeout)
 
+    def _run_blocking(self, func):
+        return gevent.get_hub().threadpool.apply(func)
+
 
 class RexProGeventConnectionPool(RexProBaseConnectionPool):
     """ Gevent-based RexProConnectionPool """
@@ -146,3 +160,50 @@ class RexProGeventConnectionPool(RexProBaseConnectionPool):
     QUEUE_CLASS = gQueue
     CONN_CLASS = RexProGeventConnection
 
+    def _spawn(self, func, *args, **kwargs):
+        return gevent.spawn(func, *args, **kwargs)
+
+    def loader(self, script=None, max_batch_size=None):
+        """ Returns a new ``loader.ElementLoader`` batching the lookups made from greenlets in the same loop iteration,
+        use one loader per request to scope its memoization
+
+        :param script: gremlin script taking an ``ids`` list parameter and returning one result per id, in order
+                       (defaults to the vertex property maps)
+        :type script: str
+        :param max_batch_size: the maximum number of ids fetched per request (default: unbounded)
+        :type max_batch_size: int
+        :rtype: rexpro.loader.ElementLoader
+        """
+        return ElementLoader(self, script=script, max_batch_size=max_batch_size)
+
+    def imap(self, script, params_iter, concurrency=None, ordered=True, timeout=None, return_exceptions=False,
+             transaction=True, **kwargs):
+        """ Generator executing a gremlin script once per parameter set on up to ``concurrency`` greenlets, see
+        ``fanout.imap``
+
+        Example::
+
+            for count in pool.imap('g.v(id).out.count()', ({'id': i} for i in ids), concurrency=8, timeout=30):
+                ...
+
+        :param script: the gremlin script to execute
+        :type script: str
+        :param params_iter: the parameters to execute the script with, one dict per execution
+        :type params_iter: iterable
+        :param concurrency: the number of requests in flight at once (defaults to the pool size)
+        :type concurrency: int
+        :param ordered: yield the results in the parameters' order, otherwise as they complete
+        :type ordered: bool
+        :param timeout: the number of seconds all the results must be received in (default: no deadline)
+        :type timeout: float
+        :param return_exceptions: yield the exception of a failed request in place of its results instead of raising
+        :type return_exceptions: bool
+        :param transaction: each query will be wrapped in a transaction if set to True (default)
+        :type transaction: bool
+        """
+        return imap(self, script, params_iter, concurrency=concurrency, ordered=ordered, timeout=timeout,
+                    return_exceptions=return_exceptions, transaction=transaction, **kwargs)
+
+    def _join(self, task, timeout=None):
+        return task.get(timeout=timeout)
+
@@ -1 +1,2 @@
 from .connection import RexProSyncSocket, RexProSyncConnectionPool, RexProSyncConnection
+from .multiplexed import RexProMultiplexedSyncConnection, RexProMultiplexedSyncConnectionPool
@@ -1,6 +1,11 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from socket import socket
-from rexpro._compat import Queue, text_type
+from rexpro._compat import Queue, text_type, reraise
 from select import select
+from threading import Lock, Thread, current_thread, local
+import os
+import sys
 
 from rexpro.connectors.base import RexProBaseConnection, RexProBaseConnectionPool
 
@@ -24,7 +29,7 @@ class RexProSyncSocket(socket):
         """
         self.send(msg.serialize())
 
-    def get_response(self):
+    def get_response(self, script_response_class=None, **kwargs):
         """
         gets the message type and message from rexster
 
@@ -65,8 +70,23 @@ class RexProSyncSocket(socket):
         | error        | response | 0     | A RexPro server error response                                |
         +--------------+----------+-------+---------------------------------------------------------------+
 
+        :param script_response_class: the message class used to deserialize script responses
+                                      (defaults to MsgPackScriptResponse)
+        :type script_response_class: type
+        :param kwargs: additional options passed on to the script response deserializer
+
         :returns: RexProMessage
         """
+        msg_type, response = self.read_frame()
+        return self.deserialize_frame(msg_type, response, script_response_class=script_response_class, **kwargs)
+
+    def read_frame(self):
+        """
+        reads a single message from rexster, see ``get_response`` for the message structure
+
+        :returns: the message type and the message body
+        :rtype: tuple
+        """
         msg_version = self.recv(1)
         if not msg_version:  # pragma: no cover
             # Can only be tested against a known broken version - none known yet.
@@ -98,18 +118,19 @@ class RexProSyncSocket(socket):
 
         # Update the looping to retrieve data without entering an infinite loop if
         # a connection goes down.
-        response = bytearray()
+        # The body is received straight into a preallocated buffer, so responses can keep views over it
+        response = bytearray(msg_len)
+        view = memoryview(response)
         rec_len = 0
         final_msg_len = msg_len
         while msg_len > 0:
-            chunk = self.recv(msg_len)
+            chunk_len = self.recv_into(view[rec_len:], msg_len)
             # If an empty string is sent break out. We'll assume
             # that the connection is dropped
-            if not chunk:
+            if not chunk_len:
                 break
-            response.extend(chunk)
-            rec_len += len(chunk)
-            msg_len -= len(chunk)
+            rec_len += chunk_len
+            msg_len -= chunk_len
 
         # Check the received length versus the expected message length if they differ something
         # happened with the connection causing an early termination of the loop.
@@ -117,17 +138,37 @@ class RexProSyncSocket(socket):
             # This shouldn't happen unless there is a server-side problem
             raise exceptions.RexProScriptException("Insufficient data received")
 
+        return msg_type, response
+
+    @staticmethod
+    def deserialize_frame(msg_type, response, script_response_class=None, **kwargs):
+        """
+        deserializes a message read by ``read_frame``
+
+        :param msg_type: the message type
+        :type msg_type: int
+        :param response: the message body
+        :type response: bytearray
+        :param script_response_class: the message class used to deserialize script responses
+                                      (defaults to MsgPackScriptResponse)
+        :type script_response_class: type
+        :param kwargs: additional options passed on to the script response deserializer
+
+        :returns: RexProMessage
+        """
         MessageTypes = messages.MessageTypes
 
         type_map = {
             MessageTypes.ERROR: messages.ErrorResponse,
             MessageTypes.SESSION_RESPONSE: messages.SessionResponse,
-            MessageTypes.SCRIPT_RESPONSE: messages.MsgPackScriptResponse
+            MessageTypes.SCRIPT_RESPONSE: script_response_class or messages.MsgPackScriptResponse
         }
 
         if msg_type not in type_map:  # pragma: no cover
             # this shouldn't happen unless there is an unknown rexpro version change
             raise exceptions.RexProConnectionException("can't deserialize message type {}".format(msg_type))
+        if msg_type == MessageTypes.SCRIPT_RESPONSE:
+            return type_map[int(msg_type)].deserialize(response, **kwargs)
         return type_map[int(msg_type)].deserialize(response)
 
 
@@ -140,8 +181,246 @@ class RexProSyncConnection(RexProBaseConnection):
         return select(rlist, wlist, xlist, timeout)
 
 
+class RexProSyncTask(Thread):
+    """ Thread that runs a function in the background and keeps its outcome for ``RexProSyncConnectionPool._join`` """
+
+    def __init__(self, func, *args, **kwargs):
+        super(RexProSyncTask, self).__init__()
+        self.daemon = True
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.exc_info = None
+
+    def run(self):
+        try:
+            self.result = self.func(*self.args, **self.kwargs)
+        except:
+            self.exc_info = sys.exc_info()
+
+    def get(self, timeout=None):
+        self.join(timeout)
+        if self.is_alive():
+            raise exceptions.RexProConnectionException("Task did not complete within {} seconds".format(timeout))
+        if self.exc_info is not None:
+            reraise(*self.exc_info)
+        return self.result
+
+
 class RexProSyncConnectionPool(RexProBaseConnectionPool):
     """ Synchronous RexProConnectionPool """
 
     QUEUE_CLASS = Queue
     CONN_CLASS = RexProSyncConnection
+
+    def __init__(self, host, port, graph_name, graph_obj_name='g', username='', password='', timeout=None,
+                 pool_size=10, with_session=False, session_less=False, decode_elements=False, element_cache=None,
+                 result_cache=None, decoder=None, lazy_session=False, session_shards=1,
+                 session_setup=None, session_store=None, limiter=None, shedder=None, sticky=False):
+        """
+        Accepts the ``RexProBaseConnectionPool`` parameters, plus:
+
+        :param sticky: bind a connection to each thread on its first checkout, later checkouts from that thread reuse
+                       it without going through the queue. At most ``pool_size - 1`` connections are bound so the
+                       remaining threads share the queue, the connections of finished threads are reclaimed.
+        :type sticky: bool
+        """
+        self.sticky = sticky
+        self._local = local()
+        # bound connection -> its thread, and the bound connections currently checked out by their thread
+        self._sticky = {}
+        self._sticky_in_use = set()
+        self._sticky_lock = Lock()
+        super(RexProSyncConnectionPool, self).__init__(
+            host, port, graph_name, graph_obj_name=graph_obj_name, username=username, password=password,
+            timeout=timeout, pool_size=pool_size, with_session=with_session, session_less=session_less,
+            decode_elements=decode_elements, element_cache=element_cache, result_cache=result_cache, decoder=decoder,
+            lazy_session=lazy_session, session_shards=session_shards, session_setup=session_setup,
+            session_store=session_store, limiter=limiter, shedder=shedder)
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            with self._sticky_lock:
+                inherited, self._sticky = list(self._sticky), {}
+                self._sticky_in_use = set()
+            self._local = local()
+            for conn in inherited:
+                self._discard(conn)
+        return super(RexProSyncConnectionPool, self)._check_pid()
+
+    def get(self, *args, **kwargs):
+        """ Retrieve a rexpro connection from the pool, in sticky mode the calling thread's own connection if it has
+        one and isn't already using it
+
+        :rtype: RexProSyncConnection
+        """
+        # connections with custom parameters aren't bound to threads
+        if not self.sticky or args or kwargs:
+            return super(RexProSyncConnectionPool, self).get(*args, **kwargs)
+
+        self._check_pid()
+        local_state = self._local
+        with self._sticky_lock:
+            conn = getattr(local_state, 'conn', None)
+            if conn is not None and conn not in self._sticky:
+                # released by close_all
+                conn = local_state.conn = None
+            if conn is not None and conn not in self._sticky_in_use:
+                self._sticky_in_use.add(conn)
+                return conn
+
+        if self.pool.empty() and self.size >= self.pool_size:
+            self._reclaim()
+        conn = super(RexProSyncConnectionPool, self).get()
+        with self._sticky_lock:
+            if getattr(local_state, 'conn', None) is None and len(self._sticky) < self.pool_size - 1:
+                self._sticky[conn] = current_thread()
+                self._sticky_in_use.add(conn)
+                local_state.conn = conn
+                if len(self.session_keys) > 1:
+                    # kept by the thread's later checkouts, see _keeps_session
+                    conn._session_key = conn.pool_session = self._session_shard()
+        return conn
+
+    def _keeps_session(self, conn):
+        with self._sticky_lock:
+            return conn in self._sticky
+
+    def put(self, conn):
+        """ Restore a connection to the pool, a thread's sticky connection stays bound to it
+
+        :param conn: A rexpro connection to restore to the pool
+        :type conn: RexProSyncConnection
+        """
+        self._check_pid()
+        with self._sticky_lock:
+            bound = conn in self._sticky
+            self._sticky_in_use.discard(conn)
+        if not bound:
+            super(RexProSyncConnectionPool, self).put(conn)
+
+    def _reclaim(self):
+        """ Restores the sticky connections of finished threads to the queue """
+        with self._sticky_lock:
+            finished = [conn for conn, thread in self._sticky.items() if not thread.is_alive()]
+            for conn in finished:
+                del self._sticky[conn]
+                self._sticky_in_use.discard(conn)
+        for conn in finished:
+            super(RexProSyncConnectionPool, self).put(conn)
+
+    def _spawn(self, func, *args, **kwargs):
+        task = RexProSyncTask(func, *args, **kwargs)
+        task.start()
+        return task
+
+    def _join(self, task, timeout=None):
+        return task.get(timeout)
+
+    _executor = None
+    _executor_pid = None
+    _executor_lock = Lock()
+
+    @property
+    def executor(self):
+        """ The thread pool running ``submit`` and ``map`` requests, one worker per pooled connection """
+        with self._executor_lock:
+            # executor threads don't survive a fork
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _execute(self, script, params, transaction, kwargs):
+        with self.connection(transaction=transaction) as conn:
+            return conn.execute(script, params, **kwargs)
+
+    def submit(self, script, params=None, transaction=True, **kwargs):
+        """ Executes a gremlin script on a pooled connection in the background
+
+        Example::
+
+            future = pool.submit('g.v(id).out.count()', {'id': 1})
+            count = future.result(timeout=10)
+
+        :param script: the gremlin script to execute
+        :type script: str
+        :param params: the parameters to execute the script with
+        :type params: dict
+        :param transaction: query will be wrapped in a transaction if set to True (default)
+        :type transaction: bool
+        :param kwargs: additional ``execute`` options (isolate, language, lazy, cache_ttl)
+        :rtype: concurrent.futures.Future
+        """
+        return self.executor.submit(self._execute, script, params, transaction, kwargs)
+
+    def map(self, script, params_iter, concurrency=None, ordered=True, transaction=True, **kwargs):
+        """ Generator executing a gremlin script once per parameter set, on up to ``concurrency`` pooled connections
+        at once, and yielding the results
+
+        Parameters are consumed lazily, so long iterables are fine. The first failed request raises once its result is
+        reached.
+
+        Example::
+
+            for count in pool.map('g.v(id).out.count()', ({'id': i} for i in ids), concurrency=4):
+                ...
+
+        :param script: the gremlin script to execute
+        :type script: str
+        :param params_iter: the parameters to execute the script with, one dict per execution
+        :type params_iter: iterable
+        :param concurrency: the number of requests in flight at once (defaults to the pool size)
+        :type concurrency: int
+        :param ordered: yield the results in the parameters' order, otherwise as they complete
+        :type ordered: bool
+        :param transaction: each query will be wrapped in a transaction if set to True (default)
+        :type transaction: bool
+        :param kwargs: additional ``execute`` options (isolate, language, lazy, cache_ttl)
+        """
+        concurrency = min(concurrency or self.pool_size, self.pool_size)
+        in_flight = deque() if ordered else set()
+        try:
+            for params in params_iter:
+                if len(in_flight) >= concurrency:
+                    for result in self._completed(in_flight, ordered):
+                        yield result
+                future = self.submit(script, params, transaction=transaction, **kwargs)
+                if ordered:
+                    in_flight.append(future)
+                else:
+                    in_flight.add(future)
+            while in_flight:
+                for result in self._completed(in_flight, ordered):
+                    yield result
+        finally:
+            # don't start the queued requests once the caller stopped iterating
+            for future in in_flight:
+                future.cancel()
+
+    @staticmethod
+    def _completed(in_flight, ordered):
+        """ Waits for and removes the next finished request(s) from ``in_flight``, returning their results """
+        if ordered:
+            return [in_flight.popleft().result()]
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        in_flight.difference_update(done)
+        return [future.result() for future in done]
+
+    def close_all(self, force_commit=False):
+        """ Close all pool connections for a clean shutdown, waiting for the submitted requests """
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._check_pid()
+        # the connections bound to live threads that are checked out stay with their thread
+        with self._sticky_lock:
+            released = [conn for conn, thread in self._sticky.items()
+                        if not thread.is_alive() or conn not in self._sticky_in_use]
+            for conn in released:
+                del self._sticky[conn]
+                self._sticky_in_use.discard(conn)
+        for conn in released:
+            self.pool.put(conn)
+        super(RexProSyncConnectionPool, self).close_all(force_commit=force_commit)
@@ -0,0 +1,254 @@
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from socket import SHUT_RDWR
+from threading import Condition, Lock, Thread
+import os
+
+from rexpro import exceptions
+from rexpro import messages
+from rexpro.connectors.sync.connection import RexProSyncConnection, RexProSyncConnectionPool
+
+
+class RexProMultiplexedSyncConnection(RexProSyncConnection):
+    """ Thread-safe synchronous RexProConnection that several threads can have requests in flight on at once
+
+    Requests are written under a lock, a background reader thread reads the responses as they arrive and hands each
+    one to the thread waiting for it, matched by request id. Responses are decoded by the waiting thread.
+
+    Client side transactions (``transaction()``) can't be shared between threads, use the server side transaction
+    of ``execute(..., transaction=True)`` instead. Session-less connections are recommended, so concurrent requests
+    don't share session state.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._write_lock = Lock()
+        self._pending_lock = Lock()
+        # request id -> (socket the request was written to, future of its response)
+        self._pending = {}
+        self._reader = None
+        super(RexProMultiplexedSyncConnection, self).__init__(*args, **kwargs)
+
+    @property
+    def is_alive(self):
+        """ Whether the reader thread is still receiving responses """
+        return self._reader is not None
+
+    def open(self, soft=False):
+        """ open the connection to the database and start the reader thread
+
+        :param soft: Attempt to re-use the connection, if False (default), create a new socket
+        :type soft: bool
+        """
+        if (not soft or not self._opened) and self._conn is not None:
+            self._shutdown()
+            with self._pending_lock:
+                self._reader = None
+        super(RexProMultiplexedSyncConnection, self).open(soft=soft)
+        if self._reader is None:
+            # the reader blocks on the socket between responses, timeouts apply to each request instead
+            self._conn.settimeout(None)
+            reader = Thread(target=self._read_responses, args=(self._conn, ))
+            reader.daemon = True
+            self._reader = reader
+            reader.start()
+
+    def close(self, soft=False):
+        """ Close a connection, soft closes are ignored since the connection is shared
+
+        :param soft: Softly close the connection - do not actually close the socket (default: False)
+        :type soft: bool
+        """
+        if soft:
+            return
+        try:
+            super(RexProMultiplexedSyncConnection, self).close(soft=False)
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        """ Shuts the socket down, which stops its reader thread """
+        try:
+            self._conn.shutdown(SHUT_RDWR)
+            self._conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def transaction(self):
+        raise exceptions.RexProScriptException("client side transactions can't be used on a multiplexed connection, "
+                                               "use execute(..., transaction=True)")
+        yield  # pragma: no cover
+
+    def _read_responses(self, conn):
+        error = None
+        try:
+            while True:
+                msg_type, body = conn.read_frame()
+                try:
+                    request_id = messages.peek_request_id(body)
+                except Exception:
+                    continue
+                with self._pending_lock:
+                    sock, future = self._pending.get(request_id, (None, None))
+                # responses to requests that timed out are dropped
+                if sock is conn:
+                    future.set_result((msg_type, body))
+        except Exception as e:
+            error = e
+
+        # only the requests written to this socket are failed, the connection may have been reopened meanwhile
+        with self._pending_lock:
+            if self._conn is conn:
+                self._reader = None
+            pending = [future for sock, future in self._pending.values() if sock is conn]
+        for future in pending:
+            if not future.done():
+                future.set_exception(exceptions.RexProConnectionException("Connection lost: {}".format(error)))
+
+    def _send_request(self, request, **kwargs):
+        """
+        sends a request message and waits for the reader thread to receive its response
+
+        :param request: the message to send
+        :type request: RexProMessage
+        :param kwargs: options passed on to the socket's ``deserialize_frame``
+
+        :rtype: RexProMessage
+        """
+        if self._reader is None:
+            # opening the session, before the reader is started
+            return super(RexProMultiplexedSyncConnection, self)._send_request(request, **kwargs)
+        return self._send_requests([request], **kwargs)[0]
+
+    def _send_pipelined(self, session_request, request, **kwargs):
+        """
+        sends a session request and a script request in a single write and waits for both responses
+
+        :rtype: tuple
+        """
+        return tuple(self._send_requests([session_request, request], **kwargs))
+
+    def _send_requests(self, requests, **kwargs):
+        """ Writes the given messages at once and returns their responses, in order """
+        futures = [Future() for _ in requests]
+        request_ids = [request.request_id for request in requests]
+        with self._pending_lock:
+            if self._reader is None:
+                raise exceptions.RexProConnectionException("Connection is closed")
+            conn = self._conn
+            self._pending.update((request_id, (conn, future)) for request_id, future in zip(request_ids, futures))
+        try:
+            data = bytearray()
+            for request in requests:
+                data += request.serialize()
+            with self._write_lock:
+                try:
+                    conn.sendall(data)
+                except (IOError, OSError) as e:
+                    # the socket was shut down by a reopen, or lost
+                    raise exceptions.RexProConnectionException("Connection lost: {}".format(e))
+            frames = [future.result(timeout=self.timeout) for future in futures]
+        except FutureTimeoutError:
+            raise exceptions.RexProConnectionException("No response within {} seconds".format(self.timeout))
+        finally:
+            with self._pending_lock:
+                for request_id in request_ids:
+                    self._pending.pop(request_id, None)
+        return [conn.deserialize_frame(msg_type, body, **kwargs) for msg_type, body in frames]
+
+
+class RexProMultiplexedSyncConnectionPool(RexProSyncConnectionPool):
+    """ Synchronous RexProConnectionPool sharing ``pool_size`` multiplexed connections between any number of threads
+
+    Connections aren't checked out exclusively, ``connection()`` hands them out round-robin and doesn't wrap them in a
+    client side transaction by default.
+    """
+
+    CONN_CLASS = RexProMultiplexedSyncConnection
+
+    def __init__(self, *args, **kwargs):
+        self._connections = []
+        self._next = 0
+        # the number of connections being opened, and the lost connections being replaced
+        self._connecting = 0
+        self._replacing = set()
+        self._connections_lock = Condition()
+        super(RexProMultiplexedSyncConnectionPool, self).__init__(*args, **kwargs)
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            inherited, self._connections = self._connections, []
+            for conn in inherited:
+                self._discard(conn)
+        return super(RexProMultiplexedSyncConnectionPool, self)._check_pid()
+
+    def get(self, *args, **kwargs):
+        """ Returns the next shared connection, creating it if the pool isn't full or replacing it if it was lost
+
+        Connections are opened outside of the pool's lock, the other threads keep using the live connections
+        meanwhile.
+
+        :rtype: RexProMultiplexedSyncConnection
+        """
+        self._check_pid()
+        with self._connections_lock:
+            while True:
+                if len(self._connections) + self._connecting < self.pool_size:
+                    self._connecting += 1
+                    lost = None
+                    break
+                if self._connections:
+                    index = self._next % len(self._connections)
+                    self._next += 1
+                    lost = self._connections[index]
+                    if lost.is_alive:
+                        return lost
+                    if lost not in self._replacing:
+                        self._replacing.add(lost)
+                        break
+                # wait for the connections other threads are opening
+                self._connections_lock.wait()
+
+        conn = None
+        try:
+            conn = self._create_connection(*args, **kwargs)
+        finally:
+            with self._connections_lock:
+                if lost is None:
+                    self._connecting -= 1
+                else:
+                    self._replacing.discard(lost)
+                if conn is not None:
+                    if lost is not None and lost in self._connections:
+                        self._connections[self._connections.index(lost)] = conn
+                    else:
+                        self._connections.append(conn)
+                self.size = len(self._connections)
+                self._connections_lock.notify_all()
+        return conn
+
+    def put(self, conn):
+        """ Connections stay shared, only the ones inherited from a parent process are dropped
+
+        :param conn: a connection returned by ``get``
+        :type conn: RexProMultiplexedSyncConnection
+        """
+        if self._check_pid() or conn._pid != self._pid:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self, transaction=False, *args, **kwargs):
+        """ Context manager providing a shared connection, see ``RexProBaseConnectionPool.connection`` """
+        with super(RexProMultiplexedSyncConnectionPool, self).connection(transaction, *args, **kwargs) as conn:
+            yield conn
+
+    def close_all(self, force_commit=False):
+        """ Close all pool connections for a clean shutdown """
+        super(RexProMultiplexedSyncConnectionPool, self).close_all(force_commit=force_commit)
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
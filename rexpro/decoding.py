@@ -0,0 +1,222 @@
+import multiprocessing
+import os
+import pickle
+from threading import Lock
+
+import msgpack
+
+from rexpro.messages import MsgPackScriptResponse, bytearray_to_text
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover
+    shared_memory = None
+
+
+def _decode(data, object_hook):
+    session, request, meta, results, bindings = msgpack.loads(data, object_hook=object_hook)
+    return bytearray_to_text(results), bytearray_to_text(bindings)
+
+
+def _decode_shared(name, size, object_hook):
+    """ Decodes a response body from the named shared memory block, runs in the worker processes
+
+    :returns: the name and size of the shared memory block holding the packed results and bindings, see ``_pack``
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        view = block.buf[:size]
+        try:
+            decoded = _decode(view, object_hook)
+        finally:
+            view.release()
+    finally:
+        block.close()
+
+    data = _pack(decoded, object_hook)
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    try:
+        block.buf[:len(data)] = data
+    except BaseException:
+        block.unlink()
+        raise
+    finally:
+        # unlinked by the calling process once it's read
+        block.close()
+    return block.name, len(data)
+
+
+def _pack(decoded, object_hook):
+    """ Packs decoded results for the calling process: as msgpack once the text is converted, so they are unpacked by
+    msgpack's C extension without any further conversion, or pickled when the object hook built other objects
+    """
+    if object_hook is None:
+        return msgpack.dumps(decoded, use_bin_type=True)
+    return pickle.dumps(decoded, pickle.HIGHEST_PROTOCOL)
+
+
+def _unpack(data, object_hook):
+    if object_hook is None:
+        return tuple(msgpack.loads(data, raw=False))
+    return pickle.loads(data)
+
+
+def _read_shared(name, size, object_hook):
+    """ Unpacks the results a worker left in the named shared memory block, and frees the block """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        view = block.buf[:size]
+        try:
+            return _unpack(view, object_hook)
+        finally:
+            view.release()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _unlink_shared(name):
+    """ Frees a shared memory block that won't be read """
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except OSError:
+        return
+    block.close()
+    block.unlink()
+
+
+class _WorkerOutput(object):
+    """ Frees the shared memory block a worker leaves its results in if the calling process stopped waiting for them,
+    whether the worker is still running or already done
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._name = None
+        self._abandoned = False
+
+    def received(self, location):
+        """ Result callback of the worker's task """
+        with self._lock:
+            self._name = location[0]
+            abandoned = self._abandoned
+        if abandoned:
+            _unlink_shared(self._name)
+
+    def abandon(self):
+        with self._lock:
+            self._abandoned = True
+            name = self._name
+        if name is not None:
+            _unlink_shared(name)
+
+
+class ProcessPoolDecoder(object):
+    """ Decodes large script response bodies in a pool of worker processes
+
+    Bodies of at least ``threshold`` bytes are copied into a shared memory block (or sent pickled when
+    ``multiprocessing.shared_memory`` isn't available) and decoded, object hook and text conversion included, by a
+    worker process. The worker leaves the decoded results in another shared memory block, repacked as msgpack whose
+    text is already converted (or pickled with an object hook), so only the block's name travels back through the
+    pool. Meanwhile the calling process waits with the GIL released and its other threads keep running.
+
+    The calling process still unpacks the repacked results, it's spared the python level work: the object hook and
+    the text conversion. Unpacking 200k vertices in the calling process took about a quarter of the time decoding
+    them in place did, and a third with ``elements.decode_element``. Smaller bodies are decoded in place, since
+    shipping them costs more than decoding them.
+
+    The wait for the worker is run by ``decode``'s ``wait`` function, the gevent and eventlet connections pass one
+    running it in their hub's thread pool so the other greenlets keep running.
+
+    The object hook must be picklable (ie. a module level function such as ``elements.decode_element``). Pass an
+    instance as the pools' ``decoder``::
+
+        pool = RexProSyncConnectionPool(host, port, 'graph', decoder=ProcessPoolDecoder(max_workers=4))
+    """
+
+    def __init__(self, max_workers=None, threshold=1024 * 1024, context=None):
+        """
+        :param max_workers: the number of worker processes (defaults to the number of cpus)
+        :type max_workers: int
+        :param threshold: the size in bytes from which response bodies are decoded in a worker process
+        :type threshold: int
+        :param context: the multiprocessing context to start the workers with (defaults to the multiprocessing module)
+        """
+        self.max_workers = max_workers
+        self.threshold = threshold
+        self.context = context or multiprocessing
+        self._pool = None
+        self._pid = None
+        self._lock = Lock()
+
+    @property
+    def pool(self):
+        with self._lock:
+            # worker pools can't be used from forked processes
+            if self._pid != os.getpid():
+                self._pool = self.context.Pool(self.max_workers)
+                self._pid = os.getpid()
+            return self._pool
+
+    def close(self):
+        """ Stops the worker processes """
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.terminate()
+                self._pool.join()
+            self._pool = None
+            self._pid = None
+
+    def decode(self, data, object_hook=None, wait=None):
+        """ Decodes a script response body, in a worker process if it is at least ``threshold`` bytes long
+
+        :param data: the response body
+        :type data: bytearray
+        :param object_hook: picklable function applied to every decoded map
+        :type object_hook: callable
+        :param wait: called with a blocking function, runs it without blocking the caller's event loop (ie.
+                     ``eventlet.tpool.execute``), the function is called directly by default
+        :type wait: callable
+        :returns: the results and bindings
+        :rtype: tuple
+        """
+        if len(data) < self.threshold:
+            return _decode(data, object_hook)
+        if shared_memory is None:
+            result = self.pool.apply_async(_decode, (bytes(data), object_hook))
+            return wait(result.get) if wait is not None else result.get()
+
+        block = shared_memory.SharedMemory(create=True, size=len(data))
+        try:
+            block.buf[:len(data)] = data
+            output = _WorkerOutput()
+            result = self.pool.apply_async(_decode_shared, (block.name, len(data), object_hook),
+                                           callback=output.received)
+            try:
+                name, size = wait(result.get) if wait is not None else result.get()
+            except BaseException:
+                output.abandon()
+                raise
+        finally:
+            block.close()
+            block.unlink()
+        return _read_shared(name, size, object_hook)
+
+
+class ParallelMsgPackScriptResponse(MsgPackScriptResponse):
+    """ Script response decoded by a ``ProcessPoolDecoder`` """
+
+    @classmethod
+    def deserialize(cls, data, object_hook=None, decoder=None, wait=None):
+        """
+        :param object_hook: function applied to every decoded map (ie. ``elements.decode_element``)
+        :type object_hook: callable
+        :param decoder: the decoder handing large bodies to worker processes
+        :type decoder: ProcessPoolDecoder
+        :param wait: runs the wait for the worker process, see ``ProcessPoolDecoder.decode``
+        :type wait: callable
+        """
+        if decoder is None:
+            return super(ParallelMsgPackScriptResponse, cls).deserialize(data, object_hook=object_hook)
+        results, bindings = decoder.decode(data, object_hook=object_hook, wait=wait)
+        return cls(results=results, bindings=bindings)
@@ -0,0 +1,160 @@
+from rexpro._compat import iteritems, binary_types, intern
+
+
+def intern_key(key):
+    """ Returns the shared instance of the given property key, so every decoded element references the same key
+    strings. Interned strings are released once no element uses them anymore.
+
+    :param key: the property key
+    :type key: str
+    :rtype: str
+    """
+    # py2 can only intern byte strings
+    return intern(key) if isinstance(key, str) else key
+
+
+def _text(value):
+    if isinstance(value, binary_types + (bytearray, )):
+        return value.decode('UTF-8')
+    return value
+
+
+class Element(object):
+    """ Compact base for Blueprints elements decoded from rexster responses
+
+    Supports read-only dict style access with the rexster serialization keys (``_id``, ``_type``, ``_properties``,
+    ...) so it can stand in for the decoded dicts.
+    """
+
+    __slots__ = ('id', 'properties')
+
+    TYPE = None
+    KEYS = {'_id': 'id', '_properties': 'properties'}
+
+    def __init__(self, id, properties=None):
+        """
+        :param id: the element id
+        :param properties: the element properties
+        :type properties: dict
+        """
+        self.id = id
+        self.properties = properties if properties is not None else {}
+
+    def __getitem__(self, key):
+        if key == '_type':
+            return self.TYPE
+        try:
+            return getattr(self, self.KEYS[key])
+        except KeyError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key == '_type' or key in self.KEYS
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return ['_type'] + list(self.KEYS)
+
+    def to_dict(self):
+        """ Returns the rexster serialization of this element
+
+        :rtype: dict
+        """
+        return dict((key, self[key]) for key in self.keys())
+
+    def map_values(self, func):
+        """ Applies the given function to the element's id and property values in place
+
+        :param func: the function to apply
+        :type func: callable
+        :rtype: Element
+        """
+        self.id = func(self.id)
+        self.properties = dict((key, func(value)) for key, value in iteritems(self.properties))
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, Element):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<{} {!r}>'.format(type(self).__name__, self.id)
+
+
+class Vertex(Element):
+    """ Compact Blueprints vertex """
+
+    __slots__ = ()
+
+    TYPE = 'vertex'
+
+
+class Edge(Element):
+    """ Compact Blueprints edge """
+
+    __slots__ = ('label', 'out_v', 'in_v')
+
+    TYPE = 'edge'
+    KEYS = {'_id': 'id', '_properties': 'properties', '_label': 'label', '_outV': 'out_v', '_inV': 'in_v'}
+
+    def __init__(self, id, label, out_v, in_v, properties=None):
+        """
+        :param id: the edge id
+        :param label: the edge label
+        :type label: str
+        :param out_v: the id of the outgoing (tail) vertex
+        :param in_v: the id of the incoming (head) vertex
+        :param properties: the edge properties
+        :type properties: dict
+        """
+        super(Edge, self).__init__(id, properties)
+        self.label = label
+        self.out_v = out_v
+        self.in_v = in_v
+
+    def map_values(self, func):
+        super(Edge, self).map_values(func)
+        self.label = intern_key(func(self.label))
+        self.out_v = func(self.out_v)
+        self.in_v = func(self.in_v)
+        return self
+
+
+def decode_element(obj):
+    """ msgpack object hook that turns serialized vertices and edges into ``Vertex`` and ``Edge`` instances, with
+    interned property keys. Any other map is returned unchanged.
+
+    :param obj: a decoded msgpack map
+    :type obj: dict
+    :rtype: Element | dict
+    """
+    # vertices and edges have at most six keys, skip the bigger maps early
+    if len(obj) > 6:
+        return obj
+    fields = dict((_text(key), value) for key, value in iteritems(obj))
+    element_type = _text(fields.get('_type'))
+    if element_type not in (Vertex.TYPE, Edge.TYPE) or '_id' not in fields:
+        return obj
+
+    properties = fields.get('_properties') or {}
+    properties = dict((intern_key(_text(key)), value) for key, value in iteritems(properties))
+
+    if element_type == Vertex.TYPE:
+        return Vertex(fields['_id'], properties)
+    label = fields.get('_label')
+    return Edge(fields['_id'], label if label is None else intern_key(_text(label)), fields.get('_outV'),
+                fields.get('_inV'), properties)
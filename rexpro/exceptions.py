@@ -59,3 +59,8 @@ class RexProChannelConfigException(RexProResponseException):
 class RexProInvalidMessageException(RexProResponseException):
     """ Invalid message was provided, This may be an incompatible msgpack problem """
     pass
+
+
+class RexProOverloadException(RexProException):
+    """ Raised when the pool sheds a request because checkouts have been waiting too long """
+    pass
@@ -0,0 +1,87 @@
+import time
+
+from rexpro import exceptions
+from rexpro._compat import QueueEmpty
+
+
+def imap(pool, script, params_iter, concurrency=None, ordered=True, timeout=None, return_exceptions=False,
+         transaction=True, **kwargs):
+    """ Generator executing a gremlin script once per parameter set on concurrent greenlets, yielding the results as
+    they come back
+
+    At most ``concurrency`` requests are in flight at once, in ordered mode the results waiting for an earlier one
+    count towards that window. Parameters are consumed lazily. Requests still running when the deadline passes or the
+    caller stops iterating are left to finish in the background, their connections are restored to the pool as usual.
+
+    Only meaningful on the gevent and eventlet pools, see ``pool.imap()``.
+
+    :param pool: the gevent or eventlet connection pool to run the requests on
+    :type pool: RexProGeventConnectionPool | RexProEventletConnectionPool
+    :param script: the gremlin script to execute
+    :type script: str
+    :param params_iter: the parameters to execute the script with, one dict per execution
+    :type params_iter: iterable
+    :param concurrency: the number of requests in flight at once (defaults to the pool size)
+    :type concurrency: int
+    :param ordered: yield the results in the parameters' order, otherwise as they complete
+    :type ordered: bool
+    :param timeout: the number of seconds all the results must be received in (default: no deadline)
+    :type timeout: float
+    :param return_exceptions: yield the exception of a failed request in place of its results instead of raising it
+    :type return_exceptions: bool
+    :param transaction: each query will be wrapped in a transaction if set to True (default)
+    :type transaction: bool
+    :param kwargs: additional ``execute`` options (isolate, language, lazy, cache_ttl)
+    """
+    concurrency = min(concurrency or pool.pool_size, pool.pool_size)
+    deadline = None if timeout is None else time.time() + timeout
+    params_iter = iter(params_iter)
+    done = pool.QUEUE_CLASS()
+
+    def run(index, params):
+        try:
+            with pool.connection(transaction=transaction) as conn:
+                done.put((index, True, conn.execute(script, params, **kwargs)))
+        except Exception as e:
+            done.put((index, False, e))
+
+    in_flight = 0
+    spawned = 0
+    next_index = 0
+    buffered = {}
+    exhausted = False
+    while True:
+        while not exhausted and in_flight + len(buffered) < concurrency:
+            try:
+                params = next(params_iter)
+            except StopIteration:
+                exhausted = True
+                break
+            pool._spawn(run, spawned, params)
+            spawned += 1
+            in_flight += 1
+        if not in_flight:
+            return
+
+        remaining = None if deadline is None else deadline - time.time()
+        try:
+            if remaining is not None and remaining <= 0:
+                raise QueueEmpty
+            index, ok, value = done.get(timeout=remaining)
+        except QueueEmpty:
+            raise exceptions.RexProConnectionException("imap did not complete within {} seconds".format(timeout))
+        in_flight -= 1
+
+        if not ordered:
+            if not ok and not return_exceptions:
+                raise value
+            yield value
+            continue
+
+        buffered[index] = (ok, value)
+        while next_index in buffered:
+            ok, value = buffered.pop(next_index)
+            next_index += 1
+            if not ok and not return_exceptions:
+                raise value
+            yield value
@@ -0,0 +1,163 @@
+from collections import deque
+from threading import Lock
+import time
+
+from rexpro import exceptions
+
+
+class AIMDLimiter(object):
+    """ Adaptive limit on the number of requests in flight, additive increase / multiplicative decrease
+
+    The limit grows by about ``increase`` per round of requests completing close to the baseline latency while the
+    limit is being used. It is multiplied by ``backoff`` when a request times out or its latency exceeds ``tolerance``
+    times the baseline, at most once per round: requests that started before the last decrease don't decrease it
+    again. The baseline follows the lowest latencies immediately and drifts up slowly, so it tracks the server's
+    unloaded latency.
+
+    Pools given a limiter check connections out against its limit, the connections beyond it stay parked in the
+    pool, see ``RexProBaseConnectionPool``.
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=None, increase=1.0, backoff=0.5, tolerance=2.0,
+                 baseline_drift=0.01, history_size=1000, clock=time.time):
+        """
+        :param initial_limit: the limit to start from
+        :type initial_limit: int
+        :param min_limit: the lowest limit
+        :type min_limit: int
+        :param max_limit: the highest limit, the pool's ``pool_size`` caps the connections regardless (optional)
+        :type max_limit: int
+        :param increase: the amount the limit grows by per healthy request, divided by the current limit so the
+                         limit grows by about ``increase`` per round of requests
+        :type increase: float
+        :param backoff: the factor the limit is multiplied by on timeouts or latency inflation
+        :type backoff: float
+        :param tolerance: the latency over baseline ratio considered inflated
+        :type tolerance: float
+        :param baseline_drift: the fraction of the distance to a higher latency the baseline moves by per request
+        :type baseline_drift: float
+        :param history_size: the number of limit changes kept in ``history``
+        :type history_size: int
+        :param clock: the function returning the current time in seconds
+        :type clock: callable
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.baseline_drift = baseline_drift
+        self.clock = clock
+        self.baseline = None
+        self._last_backoff = None
+        self._limit = float(max(initial_limit, min_limit))
+        self._history = deque([(clock(), int(self._limit))], maxlen=history_size)
+        self._lock = Lock()
+
+    @property
+    def limit(self):
+        """ The number of requests currently allowed in flight
+
+        :rtype: int
+        """
+        return int(self._limit)
+
+    @property
+    def history(self):
+        """ The latest limit changes, oldest first
+
+        :rtype: list of (float, int) tuples of the time of the change and the new limit
+        """
+        with self._lock:
+            return list(self._history)
+
+    def update(self, latency, in_flight, dropped=False):
+        """ Adjusts the limit after a request completed
+
+        :param latency: the duration of the request, in seconds measured with the limiter's clock
+        :type latency: float
+        :param in_flight: the number of requests in flight when it completed, including itself
+        :type in_flight: int
+        :param dropped: whether the request timed out or lost its connection
+        :type dropped: bool
+        """
+        with self._lock:
+            previous = self.limit
+            if not dropped:
+                if self.baseline is None or latency < self.baseline:
+                    self.baseline = latency
+                else:
+                    self.baseline += (latency - self.baseline) * self.baseline_drift
+
+            if dropped or (self.baseline is not None and latency > self.baseline * self.tolerance):
+                now = self.clock()
+                if self._last_backoff is None or now - latency >= self._last_backoff:
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._last_backoff = now
+            elif in_flight * 2 >= self._limit:
+                # only grow while the limit is actually used
+                self._limit += self.increase / self._limit
+                if self.max_limit is not None:
+                    self._limit = min(self._limit, self.max_limit)
+
+            if self.limit != previous:
+                self._history.append((self.clock(), self.limit))
+
+
+class CoDelShedder(object):
+    """ Sheds checkouts that waited too long in the pool's queue while it is overloaded, in the style of CoDel
+
+    The pool is overloaded while the shortest checkout wait of each ``interval`` stays above ``target``: the queue
+    isn't draining, so requests waiting longer than ``target`` would be stale by the time they're served. Those are
+    rejected with ``RexProOverloadException`` before anything is sent to Rexster, which keeps the latency bounded for
+    the requests that are served. Short bursts of waiting don't shed anything.
+
+    Checkouts with a ``priority`` of at least ``exempt_priority`` are never shed, see
+    ``RexProBaseConnectionPool.connection``.
+    """
+
+    def __init__(self, target=0.05, interval=0.5, exempt_priority=1, clock=time.time):
+        """
+        :param target: the acceptable checkout wait, in seconds
+        :type target: float
+        :param interval: the period the wait must stay above the target for before shedding starts, in seconds
+        :type interval: float
+        :param exempt_priority: the lowest priority that is never shed
+        :type exempt_priority: int
+        :param clock: the function returning the current time in seconds
+        :type clock: callable
+        """
+        self.target = target
+        self.interval = interval
+        self.exempt_priority = exempt_priority
+        self.clock = clock
+        self.overloaded = False
+        self.shed = 0
+        self._interval_end = None
+        self._min_wait = None
+        self._lock = Lock()
+
+    def check(self, wait, priority=0):
+        """ Records a checkout's wait and raises if it's shed
+
+        :param wait: how long the checkout waited for a connection, in seconds measured with the shedder's clock
+        :type wait: float
+        :param priority: the checkout's priority
+        :type priority: int
+        """
+        now = self.clock()
+        with self._lock:
+            if self._interval_end is None:
+                self._interval_end = now + self.interval
+            if self._min_wait is None or wait < self._min_wait:
+                self._min_wait = wait
+            if now >= self._interval_end:
+                self.overloaded = self._min_wait > self.target
+                self._interval_end = now + self.interval
+                self._min_wait = None
+            shed = self.overloaded and wait > self.target and priority < self.exempt_priority
+            if shed:
+                self.shed += 1
+        if shed:
+            raise exceptions.RexProOverloadException(
+                "Waited {:.3f} seconds for a connection, the pool is overloaded".format(wait))
@@ -0,0 +1,105 @@
+class ElementLoader(object):
+    """ Batches and memoizes element lookups made from concurrent greenlets
+
+    ``load`` calls made in the same event loop iteration are collected, deduplicated and fetched with a single
+    parameterized request once the loop runs the batch greenlet, every caller is then handed its own result. Results
+    are memoized for the lifetime of the loader, so create one loader per request (ie. per GraphQL query).
+
+    Only meaningful on the gevent and eventlet pools, see ``pool.loader()``.
+
+    Example::
+
+        loader = pool.loader()
+
+        def resolve_user(user_id):
+            return loader.load(user_id)
+
+        users = [gevent.spawn(resolve_user, user_id) for user_id in user_ids]
+    """
+
+    SCRIPT = """
+    ids.collect { id ->
+        def v = g.v(id)
+        v == null ? null : v.map()
+    }
+    """
+
+    def __init__(self, pool, script=None, max_batch_size=None):
+        """
+        :param pool: the gevent or eventlet connection pool to fetch with
+        :type pool: RexProGeventConnectionPool | RexProEventletConnectionPool
+        :param script: gremlin script taking an ``ids`` list parameter and returning one result per id, in order
+                       (defaults to the vertex property maps)
+        :type script: str
+        :param max_batch_size: the maximum number of ids fetched per request (default: unbounded)
+        :type max_batch_size: int
+        """
+        self.pool = pool
+        self.script = script or self.SCRIPT
+        self.max_batch_size = max_batch_size
+        self.cache = {}
+        self._pending = {}
+        self._batch = None
+        self._task = None
+
+    def load(self, key):
+        """ Returns the result for the given id, fetched with the other ids loaded in this event loop iteration
+
+        :param key: the element id
+        """
+        return self.load_many([key])[0]
+
+    def load_many(self, keys):
+        """ Returns the results for the given ids, fetched with the other ids loaded in this event loop iteration
+
+        :param keys: the element ids
+        :type keys: list
+        :rtype: list
+        """
+        tasks = []
+        for key in keys:
+            if key in self.cache:
+                continue
+            task = self._pending.get(key)
+            if task is None:
+                if self._task is None or (self.max_batch_size and len(self._batch) >= self.max_batch_size):
+                    self._batch = []
+                    self._task = self.pool._spawn(self._dispatch, self._batch)
+                task = self._pending[key] = self._task
+                self._batch.append(key)
+            if task not in tasks:
+                tasks.append(task)
+
+        for task in tasks:
+            self.pool._join(task)
+        return [self.cache[key] for key in keys]
+
+    def _dispatch(self, batch):
+        # later loads start a new batch
+        if self._batch is batch:
+            self._batch = None
+            self._task = None
+        try:
+            with self.pool.connection(transaction=False) as conn:
+                results = conn.execute(self.script, {'ids': batch}) or []
+            for i, key in enumerate(batch):
+                self.cache[key] = results[i] if i < len(results) else None
+        finally:
+            for key in batch:
+                self._pending.pop(key, None)
+        return results
+
+    def prime(self, key, value):
+        """ Stores a known result for the given id
+
+        :param key: the element id
+        :param value: the result to store
+        """
+        self.cache[key] = value
+
+    def clear(self, key=None):
+        """ Forgets the memoized result for the given id, or every result if no id is given """
+        if key is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(key, None)
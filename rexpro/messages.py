@@ -2,12 +2,16 @@ import json
 import re
 import struct
 import warnings
+from array import array
 from uuid import uuid1
 
 import msgpack
 
 from rexpro import exceptions
-from rexpro._compat import string_types, integer_types, float_types, array_types, iteritems
+from rexpro.elements import Element
+from rexpro.packing import array_format, default as pack_default, is_packable_array, numpy, pack_array
+from rexpro._compat import string_types, integer_types, float_types, array_types, bool_types, binary_types, iteritems, \
+    Sequence, xrange
 
 
 def int_to_32bit_array(val):
@@ -52,6 +56,8 @@ def bytearray_to_text(data):
         return response
     elif isinstance(data, integer_types + float_types + string_types):
         return data
+    elif isinstance(data, Element):
+        return data.map_values(bytearray_to_text)
     elif isinstance(data, (bytes, bytearray)):
         return data.decode('UTF-8')
     elif isinstance(data, string_types):
@@ -63,6 +69,29 @@ def bytearray_to_text(data):
         return data
 
 
+_PARAM_NAME_LEADING_DIGIT = re.compile(r'^[0-9]')
+_PARAM_NAME_INVALID_CHARS = re.compile(r'[\s\.]')
+
+
+def peek_request_id(data):
+    """ Reads the request id of a response body without decoding the rest of it
+
+    :param data: the response body
+    :type data: bytearray
+    :rtype: bytes
+    """
+    try:
+        unpacker = msgpack.Unpacker(raw=True)
+    except TypeError:  # pragma: no cover
+        # msgpack < 0.5.2 always returns raw bytes
+        unpacker = msgpack.Unpacker()
+    # the session and request ids are 16 byte uuids, both fit in the first 64 bytes
+    unpacker.feed(bytes(data[:64]))
+    unpacker.read_array_header()
+    unpacker.skip()
+    return unpacker.unpack()
+
+
 class MessageTypes(object):
     """
     Enumeration of RexPro send message types
@@ -79,6 +108,18 @@ class RexProMessage(object):
 
     MESSAGE_TYPE = None
 
+    _request_id = None
+
+    @property
+    def request_id(self):
+        """ The unique id of this message, generated once so responses can be matched with their request
+
+        :rtype: bytes
+        """
+        if self._request_id is None:
+            self._request_id = uuid1().bytes
+        return self._request_id
+
     def get_meta(self):
         """
         Returns a dictionary of message meta data depending on other set values
@@ -94,7 +135,7 @@ class RexProMessage(object):
             self.session,
 
             # unique request id
-            uuid1().bytes,
+            self.request_id,
 
             # meta
             self.get_meta()
@@ -120,8 +161,7 @@ class RexProMessage(object):
         the session and unique request id are uuid bytes, and the version and are each 1 byte unsigned integers
         """
         # msgpack list
-        msg = self.get_message_list()
-        bytes = msgpack.dumps(msg)
+        bytes = self.serialize_message_list()
 
         # add protocol version
         message = bytearray([1])
@@ -143,6 +183,14 @@ class RexProMessage(object):
 
         return message
 
+    def serialize_message_list(self):
+        """
+        Serializes the message list with msgpack
+
+        :rtype: bytes
+        """
+        return msgpack.dumps(self.get_message_list())
+
     @classmethod
     def deserialize(cls, data):  # pragma: no cover
         """
@@ -187,7 +235,9 @@ class ErrorResponse(RexProMessage):
     def deserialize(cls, data):
         message = msgpack.loads(data)
         session, request, meta, msg = message
-        return cls(message=bytearray_to_text(msg), meta=bytearray_to_text(meta), data=data)
+        response = cls(message=bytearray_to_text(msg), meta=bytearray_to_text(meta), data=data)
+        response._request_id = request
+        return response
 
     def raise_exception(self):
         if self.meta == self.INVALID_MESSAGE_ERROR:
@@ -391,24 +441,39 @@ class ScriptRequest(RexProMessage):
 
         return meta
 
+    # parameter names that already passed validation, names are checked once per process
+    _valid_param_names = set()
+    MAX_VALID_PARAM_NAMES = 4096
+
+    PARAM_TYPES = string_types + integer_types + float_types + array_types + bool_types + binary_types + \
+        (bytearray, dict, type(None))
+
     def _validate_params(self):
         """
         Checks that the parameters are ok
         (no invalid types, no weird key names)
         """
-        for k, v in self.params.items():
-
-            if re.findall(r'^[0-9]', k):
-                raise exceptions.RexProScriptException(
-                    "parameter names can't begin with a number")
-            if re.findall(r'[\s\.]', k):
-                raise exceptions.RexProException(
-                    "parameter names can't contain {}".format(
-                        re.findall(r'^[0-9]', k)[0]
+        valid_names = self._valid_param_names
+        for k, v in iteritems(self.params):
+
+            if k not in valid_names:
+                if not isinstance(k, string_types):
+                    raise exceptions.RexProScriptException(
+                        "parameter names must be strings, got {!r}".format(k))
+                if _PARAM_NAME_LEADING_DIGIT.match(k):
+                    raise exceptions.RexProScriptException(
+                        "parameter names can't begin with a number")
+                invalid = _PARAM_NAME_INVALID_CHARS.search(k)
+                if invalid:
+                    raise exceptions.RexProException(
+                        "parameter names can't contain {!r}".format(invalid.group())
                     )
-                )
+                if len(valid_names) >= self.MAX_VALID_PARAM_NAMES:
+                    valid_names.clear()
+                valid_names.add(k)
 
-            if not isinstance(v, string_types + integer_types + float_types + array_types):
+            if not isinstance(v, self.PARAM_TYPES) and not is_packable_array(v) and \
+                    not (numpy is not None and isinstance(v, numpy.generic)):
                 raise exceptions.RexProScriptException(
                     "{} is an unsupported type".format(type(v))
                 )
@@ -434,6 +499,78 @@ class ScriptRequest(RexProMessage):
             self.params
         ]
 
+    def serialize_message_list(self):
+        """
+        Serializes the message list, numpy arrays and numeric buffer-protocol sequences in the parameters are packed
+        in bulk by ``packing.pack_array``
+        """
+        self._validate_params()
+        message_list = self.get_message_list()
+        params = message_list.pop()
+
+        packer = msgpack.Packer(default=pack_default)
+        data = bytearray(packer.pack_array_header(len(message_list) + 1))
+        for item in message_list:
+            data += packer.pack(item)
+        data += packer.pack_map_header(len(params))
+        for k, v in iteritems(params):
+            data += packer.pack(k)
+            fmt = array_format(v)
+            data += pack_array(v, fmt) if fmt is not None else packer.pack(v)
+        return data
+
+
+class BatchScriptRequest(ScriptRequest):
+    """
+    Message that executes several independent gremlin scripts as a single script request
+
+    Each statement is wrapped in its own closure, whose arguments are the statement's parameters, so statements can't
+    see each other's variables. Parameters are namespaced per statement before being bound to the request, and the
+    response results are a list holding each statement's result in order.
+    """
+
+    PARAM_PREFIX = 'rexpro_batch{}_'
+
+    def __init__(self, statements, **kwargs):
+        """
+        :param statements: the statements to execute, either (script, params) pairs or bare scripts
+        :type statements: list
+        """
+        script, params = self.merge_statements(statements)
+        super(BatchScriptRequest, self).__init__(script, params=params, **kwargs)
+        self.statements = statements
+
+    @classmethod
+    def merge_statements(cls, statements):
+        """
+        Merges the given statements into a single script and its parameter bindings
+
+        :param statements: the statements to merge, either (script, params) pairs or bare scripts
+        :type statements: list
+
+        :rtype: tuple (str, dict)
+        """
+        closures = []
+        params = {}
+        for i, statement in enumerate(statements):
+            if isinstance(statement, string_types):
+                script, statement_params = statement, None
+            else:
+                script, statement_params = statement
+            statement_params = statement_params or {}
+
+            prefix = cls.PARAM_PREFIX.format(i)
+            names = sorted(statement_params)
+            for name in names:
+                params[prefix + name] = statement_params[name]
+
+            closures.append('{{{args} ->\n{script}\n}}.call({values})'.format(
+                args=''.join(' ' + name + ',' for name in names).rstrip(','),
+                script=script,
+                values=', '.join(prefix + name for name in names)
+            ))
+        return '[\n{}\n]'.format(',\n'.join(closures)), params
+
 
 class MsgPackScriptResponse(RexProMessage):
 
@@ -443,11 +580,148 @@ class MsgPackScriptResponse(RexProMessage):
         self.bindings = bindings
 
     @classmethod
-    def deserialize(cls, data):
-        message = msgpack.loads(data)
+    def deserialize(cls, data, object_hook=None):
+        """
+        :param object_hook: function applied to every decoded map (ie. ``elements.decode_element``)
+        :type object_hook: callable
+        """
+        message = msgpack.loads(data, object_hook=object_hook)
         session, request, meta, results, bindings = message
 
         return cls(
             results=bytearray_to_text(results),
             bindings=bytearray_to_text(bindings)
         )
+
+
+class LazyResultList(Sequence):
+    """
+    Read-only list of script results that decodes each element from the raw response body on first access
+
+    The element boundaries are found when the response is received, without building any python objects.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, body, offsets, object_hook=None):
+        """
+        :param body: the raw response body
+        :type body: memoryview
+        :param offsets: the start offset of each element in the body, followed by the end offset of the last one
+        :type offsets: array
+        :param object_hook: function applied to every decoded map
+        :type object_hook: callable
+        """
+        self._body = body
+        self._offsets = offsets
+        self._object_hook = object_hook
+        self._decoded = [self._MISSING] * (len(offsets) - 1)
+
+    @property
+    def raw(self):
+        """ The msgpack encoded elements, back to back, as a view over the response body
+
+        :rtype: memoryview
+        """
+        return self._body[self._offsets[0]:self._offsets[-1]]
+
+    def __len__(self):
+        return len(self._decoded)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        value = self._decoded[index]
+        if value is self._MISSING:
+            if index < 0:
+                index += len(self)
+            raw = self._body[self._offsets[index]:self._offsets[index + 1]]
+            value = self._decoded[index] = bytearray_to_text(msgpack.loads(raw, object_hook=self._object_hook))
+        return value
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if isinstance(other, (LazyResultList, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<LazyResultList of {} results>'.format(len(self))
+
+
+class LazyMsgPackScriptResponse(MsgPackScriptResponse):
+    """
+    Script response that keeps the raw response body and only decodes what is asked for
+
+    List results are returned as a ``LazyResultList`` and the bindings are decoded on first access. The element
+    boundaries require ``msgpack.Unpacker.tell`` (msgpack >= 0.5), older versions decode the results eagerly.
+
+    Finding the boundaries isn't zero-copy: ``msgpack.Unpacker`` copies the body into its own buffer while it skips
+    over the elements. That copy is released once ``deserialize`` returns, the elements are then decoded from slices of
+    a view over the original body.
+    """
+
+    def __init__(self, body, results, bindings_range, object_hook=None, **kwargs):
+        super(LazyMsgPackScriptResponse, self).__init__(results=results, bindings=None, **kwargs)
+        self.body = body
+        self._bindings_range = bindings_range
+        self._object_hook = object_hook
+
+    @property
+    def bindings(self):
+        if self._bindings_range is not None:
+            start, end = self._bindings_range
+            self._bindings = bytearray_to_text(msgpack.loads(self.body[start:end], object_hook=self._object_hook))
+            self._bindings_range = None
+        return self._bindings
+
+    @bindings.setter
+    def bindings(self, value):
+        self._bindings = value
+
+    @classmethod
+    def deserialize(cls, data, object_hook=None):
+        """
+        :param object_hook: function applied to every decoded map (ie. ``elements.decode_element``)
+        :type object_hook: callable
+        """
+        body = memoryview(data)
+        # the unpacker only locates the elements, its copy of the body is dropped on return. It is sized to the body,
+        # msgpack >= 1.0 refuses to buffer more than 100 MiB by default
+        unpacker = msgpack.Unpacker(object_hook=object_hook, max_buffer_size=len(body))
+        if not hasattr(unpacker, 'tell'):  # pragma: no cover
+            response = MsgPackScriptResponse.deserialize(data, object_hook=object_hook)
+            return cls(body=body, results=response.results, bindings_range=None)
+        unpacker.feed(body)
+
+        # session, request, meta
+        unpacker.read_array_header()
+        for _ in xrange(3):
+            unpacker.skip()
+
+        results_start = unpacker.tell()
+        try:
+            count = unpacker.read_array_header()
+        except ValueError:
+            # not a list, decode it in place
+            results = bytearray_to_text(unpacker.unpack())
+        else:
+            offsets = array('L', [unpacker.tell()])
+            for _ in xrange(count):
+                unpacker.skip()
+                offsets.append(unpacker.tell())
+            results = LazyResultList(body, offsets, object_hook=object_hook)
+
+        bindings_start = unpacker.tell()
+        unpacker.skip()
+        return cls(body=body, results=results, bindings_range=(bindings_start, unpacker.tell()),
+                   object_hook=object_hook)
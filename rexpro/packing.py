@@ -0,0 +1,191 @@
+import struct
+import sys
+
+from rexpro._compat import binary_types, string_types, xrange
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# msgpack type tags used for the packed array elements, every element of an array is written at the same width
+_FALSE = 0xc2
+_TRUE = 0xc3
+_FLOAT32 = 0xca
+_FLOAT64 = 0xcb
+_UINT64 = 0xcf
+_INT64 = 0xd3
+_INT_TAGS = {1: 0xd0, 2: 0xd1, 4: 0xd2, 8: _INT64}
+_UINT_TAGS = {1: 0xcc, 2: 0xcd, 4: 0xce, 8: _UINT64}
+
+# buffer format character -> {value width: msgpack tag}, the values are packed at their own width
+_FORMATS = {'f': {4: _FLOAT32}, 'd': {8: _FLOAT64}}
+for _code in 'bhilq':
+    _FORMATS[_code] = _INT_TAGS
+for _code in 'BHILQ':
+    _FORMATS[_code] = _UINT_TAGS
+
+# buffer format byte order prefix -> whether the values are little endian, '@' and '=' are the native order
+_LITTLE_ENDIAN = {
+    '@': sys.byteorder == 'little',
+    '=': sys.byteorder == 'little',
+    '<': True,
+    '>': False,
+    '!': False,
+}
+
+# array_format result for numpy arrays
+_NDARRAY = 'ndarray'
+
+# numpy dtype kind -> (msgpack tag, big endian numpy dtype of the packed value)
+_NUMPY_KINDS = {
+    'i': (_INT64, '>i8'),
+    'u': (_UINT64, '>u8'),
+    'f': (_FLOAT64, '>f8'),
+}
+
+_BOOL_TAGS = bytes(bytearray([_FALSE, _TRUE] + [_TRUE] * 254))
+
+
+def _buffer_format(value):
+    """ Returns the struct format of a one dimensional buffer, always starting with its byte order prefix, or None if
+    it isn't one
+    """
+    try:
+        view = memoryview(value)
+    except TypeError:
+        return None
+    if view.ndim != 1:
+        return None
+    fmt = view.format
+    return fmt if fmt[:1] in _LITTLE_ENDIAN else '@' + fmt
+
+
+def _format_tag(fmt):
+    """ Returns the msgpack tag of the values of a ``_buffer_format``, or None if they can't be packed in bulk """
+    if fmt[1:] == '?':
+        return _TRUE
+    widths = _FORMATS.get(fmt[1:])
+    if widths is None:
+        return None
+    # standard ('<', '>', '!', '=') and native ('@') sizes differ for 'l' and 'L'
+    return widths.get(struct.calcsize(fmt))
+
+
+def array_format(value):
+    """ Returns the format ``pack_array`` encodes the given value with, if it's a numpy array or a numeric
+    buffer-protocol sequence (ie. ``array.array``) it can encode without building a python list
+
+    :param value: the value to check
+    :returns: the format to pass on to ``pack_array``, or None if the value isn't a packable array
+    :rtype: str | None
+    """
+    if isinstance(value, string_types + binary_types + (bytearray, )):
+        return None
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        if value.ndim > 0 and (value.dtype.kind in _NUMPY_KINDS or value.dtype.kind == 'b'):
+            return _NDARRAY
+        return None
+    fmt = _buffer_format(value)
+    if fmt is None or _format_tag(fmt) is None:
+        return None
+    # buffers whose item size doesn't match their format are left to the generic encoder
+    return fmt if struct.calcsize(fmt) == memoryview(value).itemsize else None
+
+
+def is_packable_array(value):
+    """ Checks whether ``pack_array`` can encode the given value, see ``array_format``
+
+    :param value: the value to check
+    :rtype: bool
+    """
+    return array_format(value) is not None
+
+
+def pack_array_header(length):
+    """ Returns the msgpack array header for an array of the given length
+
+    :param length: the number of elements
+    :type length: int
+    :rtype: bytes
+    """
+    if length < 16:
+        return struct.pack('B', 0x90 | length)
+    if length < 0x10000:
+        return struct.pack('>BH', 0xdc, length)
+    return struct.pack('>BI', 0xdd, length)
+
+
+def _interleave(tag, raw, width, length, little_endian=False):
+    """ Writes each ``width`` sized value of ``raw`` after the given tag byte, big endian values are copied as they
+    are and little endian ones have their bytes reversed
+    """
+    data = bytearray(length * (width + 1))
+    step = width + 1
+    data[0::step] = bytes(bytearray([tag])) * length
+    for i in xrange(width):
+        data[i + 1::step] = raw[width - 1 - i::width] if little_endian else raw[i::width]
+    return data
+
+
+def _pack_numpy(value):
+    if value.ndim > 1:
+        data = bytearray(pack_array_header(len(value)))
+        for row in value:
+            data += _pack_numpy(row)
+        return data
+
+    data = bytearray(pack_array_header(len(value)))
+    if value.dtype.kind == 'b':
+        data += numpy.where(value, _TRUE, _FALSE).astype(numpy.uint8).tobytes()
+        return data
+
+    tag, dtype = _NUMPY_KINDS[value.dtype.kind]
+    if value.dtype.kind == 'f' and value.dtype.itemsize <= 4:
+        tag, dtype = _FLOAT32, '>f4'
+    packed = numpy.empty(len(value), dtype=[('tag', 'u1'), ('value', dtype)])
+    packed['tag'] = tag
+    packed['value'] = value
+    data += packed.tobytes()
+    return data
+
+
+def pack_array(value, fmt=None):
+    """ Encodes a numpy array or numeric buffer-protocol sequence as a msgpack array, element conversion is done
+    in bulk rather than one python object at a time
+
+    :param value: the array to encode, see ``array_format``
+    :param fmt: the value's ``array_format``, computed if not given
+    :type fmt: str
+    :rtype: bytearray
+    """
+    if fmt is None:
+        fmt = array_format(value)
+    if fmt == _NDARRAY:
+        return _pack_numpy(value)
+
+    view = memoryview(value)
+    length = len(view)
+    data = bytearray(pack_array_header(length))
+    if fmt[1:] == '?':
+        data += view.tobytes().translate(_BOOL_TAGS)
+        return data
+
+    data += _interleave(_format_tag(fmt), view.tobytes(), struct.calcsize(fmt), length, _LITTLE_ENDIAN[fmt[0]])
+    return data
+
+
+def default(value):
+    """ msgpack ``default`` hook for values nested inside parameters, converts numpy scalars and arrays and buffer
+    sequences to plain python values
+
+    :param value: the value msgpack doesn't know how to serialize
+    """
+    if numpy is not None and isinstance(value, (numpy.generic, numpy.ndarray)):
+        return value.tolist()
+    fmt = array_format(value)
+    if fmt is not None:
+        # memoryview.tolist only reads native formats
+        view = memoryview(value)
+        return list(struct.unpack('{}{}{}'.format(fmt[0], len(view), fmt[1:]), view.tobytes()))
+    raise TypeError("can't serialize {!r}".format(value))
@@ -0,0 +1,306 @@
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+import math
+import re
+import time
+
+from rexpro import exceptions
+from rexpro._compat import QueueEmpty, iteritems, xrange
+
+# gremlin scripts can declare whether they only read with a leading comment, ie. ``// @read``
+ROUTING_ANNOTATION = re.compile(r'^\s*//\s*@(read|write)\b')
+
+
+def is_read(script=None, transaction=True, read_only=None):
+    """ Classifies a request as a read or a write
+
+    The explicit ``read_only`` flag wins, then a ``// @read`` or ``// @write`` annotation on the script's first line.
+    Otherwise only requests outside of a transaction are reads.
+
+    :param script: the gremlin script (optional)
+    :type script: str
+    :param transaction: whether the request is wrapped in a transaction
+    :type transaction: bool
+    :param read_only: explicit classification (optional)
+    :type read_only: bool
+
+    :rtype: bool
+    """
+    if read_only is not None:
+        return read_only
+    if script:
+        match = ROUTING_ANNOTATION.match(script)
+        if match:
+            return match.group(1) == 'read'
+    return not transaction
+
+
+class LatencyTracker(object):
+    """ Thread-safe record of the recent latencies of each script """
+
+    def __init__(self, window=100, max_scripts=1000):
+        """
+        :param window: the number of latest latencies kept per script
+        :type window: int
+        :param max_scripts: the number of scripts tracked, the least recently run are forgotten beyond it
+        :type max_scripts: int
+        """
+        self.window = window
+        self.max_scripts = max_scripts
+        self._latencies = OrderedDict()
+        self._lock = Lock()
+
+    def record(self, key, latency):
+        """ Records the latency of a script's request, in seconds """
+        with self._lock:
+            latencies = self._latencies.pop(key, None)
+            if latencies is None:
+                latencies = deque(maxlen=self.window)
+                if len(self._latencies) >= self.max_scripts:
+                    self._latencies.popitem(last=False)
+            latencies.append(latency)
+            self._latencies[key] = latencies
+
+    def percentile(self, key, percentile, min_samples=1):
+        """ Returns the given percentile of a script's recent latencies, or None with fewer than ``min_samples``
+
+        :param percentile: the percentile, between 0 and 100
+        :type percentile: float
+
+        :rtype: float | None
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(key, ()))
+        if not latencies or len(latencies) < min_samples:
+            return None
+        rank = int(math.ceil(percentile / 100.0 * len(latencies))) - 1
+        return latencies[min(max(rank, 0), len(latencies) - 1)]
+
+
+def _unbound(method):
+    """ Returns the function of a method looked up on a class, python 2 wraps it in an unbound method """
+    return getattr(method, '__func__', method)
+
+
+class RexProRoutingPool(object):
+    """ Routes writes to a primary Rexster endpoint and spreads reads over read-only replicas
+
+    Wraps one connection pool per endpoint, of any connector. Reads go to the replica with the fewest requests in
+    flight. With ``read_your_writes``, reads of a caller that wrote within the window go to the primary, so they see
+    their own writes before the replicas catch up.
+
+    Example::
+
+        pool = RexProRoutingPool(
+            primary=RexProSyncConnectionPool('primary', 8184, 'graph'),
+            replicas=[RexProSyncConnectionPool(host, 8184, 'graph') for host in ('replica-1', 'replica-2')],
+            read_your_writes=2.0,
+        )
+        pool.execute('g.addVertex(props)', {'props': props}, caller=user_id)
+        pool.execute('// @read\\ng.v(id).out', {'id': 1}, caller=user_id)  # sent to the primary for 2 seconds
+
+    With ``hedge_percentile``, a read still outstanding after the given percentile of its script's recent latencies is
+    sent to a second replica, and the first response wins. The other request is abandoned, its connection returns to
+    its pool when it completes. ``hedge_budget`` caps the hedges to a fraction of the reads, while it's spent the
+    reads run in the calling thread rather than a spawned task. Only hedge idempotent scripts: pass ``hedge=False``
+    to ``execute`` for the others. The replicas must then be pools of the same connector, the hedges are spawned with
+    its concurrency primitives.
+    """
+
+    # the number of hedges that can be spent at once after a quiet period
+    HEDGE_BURST = 10
+
+    def __init__(self, primary, replicas=None, read_your_writes=0.0, hedge_percentile=None, hedge_budget=0.05,
+                 hedge_min_samples=20, clock=time.time):
+        """
+        :param primary: the pool connected to the write-capable endpoint
+        :type primary: RexProBaseConnectionPool
+        :param replicas: the pools connected to the read-only endpoints, reads go to the primary without replicas
+        :type replicas: list of RexProBaseConnectionPool
+        :param read_your_writes: the number of seconds a caller's reads go to the primary after it wrote
+        :type read_your_writes: float
+        :param hedge_percentile: the latency percentile reads are hedged after, ie. 95 (default: no hedging)
+        :type hedge_percentile: float
+        :param hedge_budget: the maximum number of hedges per read
+        :type hedge_budget: float
+        :param hedge_min_samples: the number of latencies a script needs before its reads are hedged
+        :type hedge_min_samples: int
+        :param clock: the function returning the current time in seconds
+        :type clock: callable
+        """
+        self.primary = primary
+        self.replicas = list(replicas or [])
+        self.read_your_writes = read_your_writes
+        self.clock = clock
+        self._lock = Lock()
+        self._in_flight = [0] * len(self.replicas)
+        self._next = 0
+        self._writes = {}
+        self.hedge_percentile = hedge_percentile
+        self.hedge_budget = hedge_budget
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = LatencyTracker()
+        self.hedges = 0
+        self._hedge_tokens = 0.0
+
+        if hedge_percentile is not None and self.replicas:
+            connectors = set((replica.QUEUE_CLASS, _unbound(type(replica)._spawn)) for replica in self.replicas)
+            if len(connectors) > 1:
+                raise exceptions.RexProException("hedged reads need replica pools of the same connector")
+
+    def _note_write(self, caller):
+        if caller is None or not self.read_your_writes:
+            return
+        now = self.clock()
+        with self._lock:
+            self._writes[caller] = now + self.read_your_writes
+            if len(self._writes) > 1000:
+                self._writes = dict((key, until) for key, until in iteritems(self._writes) if until > now)
+
+    def _pinned_to_primary(self, caller):
+        if caller is None or not self.read_your_writes:
+            return False
+        with self._lock:
+            until = self._writes.get(caller)
+            if until is None:
+                return False
+            if until <= self.clock():
+                del self._writes[caller]
+                return False
+            return True
+
+    def _choose_replica(self, exclude=None):
+        """ Returns the index of the replica with the fewest requests in flight, rotating between ties """
+        with self._lock:
+            count = len(self.replicas)
+            start = self._next
+            self._next = (self._next + 1) % count
+            candidates = [(start + i) % count for i in xrange(count) if (start + i) % count != exclude]
+            index = min(candidates, key=lambda i: self._in_flight[i])
+            self._in_flight[index] += 1
+            return index
+
+    @contextmanager
+    def _replica_connection(self, index, transaction=True, *args, **kwargs):
+        """ Checks a connection of a replica chosen by ``_choose_replica`` out """
+        try:
+            with self.replicas[index].connection(transaction, *args, **kwargs) as conn:
+                yield conn
+        finally:
+            with self._lock:
+                self._in_flight[index] -= 1
+
+    def _take_hedge(self):
+        """ Spends a hedge from the budget, the budget grows with every hedgeable read """
+        with self._lock:
+            if self._hedge_tokens < 1:
+                return False
+            self._hedge_tokens -= 1
+            self.hedges += 1
+            return True
+
+    @contextmanager
+    def connection(self, transaction=True, read_only=None, caller=None, script=None, *args, **kwargs):
+        """ Context manager providing a connection of the primary or one of the replicas, see
+        ``RexProBaseConnectionPool.connection``
+
+        :param transaction: wrap the block in a client side transaction, classifies the block as a write by default
+        :type transaction: bool
+        :param read_only: route to a replica if True, to the primary if False (default: classified)
+        :type read_only: bool
+        :param caller: the caller key reads-your-writes are tracked for (optional)
+        :type caller: str | int
+        :param script: the script that will be run, to classify the block by its annotation (optional)
+        :type script: str
+        """
+        if not is_read(script, transaction, read_only):
+            try:
+                with self.primary.connection(transaction, *args, **kwargs) as conn:
+                    yield conn
+            finally:
+                # failed writes may have been applied too
+                self._note_write(caller)
+            return
+
+        if not self.replicas or self._pinned_to_primary(caller):
+            with self.primary.connection(transaction, *args, **kwargs) as conn:
+                yield conn
+            return
+
+        with self._replica_connection(self._choose_replica(), transaction, *args, **kwargs) as conn:
+            yield conn
+
+    def execute(self, script, params=None, isolate=True, transaction=True, read_only=None, caller=None, hedge=True,
+                **kwargs):
+        """ Executes a gremlin script on the primary or one of the replicas, see ``RexProBaseConnection.execute``
+
+        :param read_only: route to a replica if True, to the primary if False (default: classified by the script's
+                          annotation or the transaction flag)
+        :type read_only: bool
+        :param caller: the caller key reads-your-writes are tracked for (optional)
+        :type caller: str | int
+        :param hedge: allow hedging this read, when the pool hedges reads
+        :type hedge: bool
+        """
+        read_only = is_read(script, transaction, read_only)
+        if (read_only and hedge and self.hedge_percentile is not None and len(self.replicas) > 1 and
+                not self._pinned_to_primary(caller)):
+            return self._execute_hedged(script, params, isolate=isolate, transaction=transaction, **kwargs)
+        with self.connection(transaction=False, read_only=read_only, caller=caller) as conn:
+            return conn.execute(script, params, isolate=isolate, transaction=transaction, **kwargs)
+
+    def _execute_on_replica(self, index, script, params, **kwargs):
+        """ Executes a read on the given replica and records its latency """
+        started = self.clock()
+        with self._replica_connection(index, transaction=False) as conn:
+            results = conn.execute(script, params, **kwargs)
+        self.latencies.record(script, self.clock() - started)
+        return results
+
+    def _execute_hedged(self, script, params, **kwargs):
+        """ Executes a read on a replica, and on a second one if the first is slower than the hedge percentile """
+        with self._lock:
+            self._hedge_tokens = min(self._hedge_tokens + self.hedge_budget, self.HEDGE_BURST)
+            can_hedge = self._hedge_tokens >= 1
+        delay = self.latencies.percentile(script, self.hedge_percentile, self.hedge_min_samples) if can_hedge else None
+        first = self._choose_replica()
+        if delay is None:
+            # too few latencies to hedge after, or no hedge left in the budget: the read runs in the calling thread
+            return self._execute_on_replica(first, script, params, **kwargs)
+
+        # the replicas share their connector, checked by the constructor
+        pool = self.replicas[0]
+        done = pool.QUEUE_CLASS()
+
+        def attempt(index):
+            try:
+                results = self._execute_on_replica(index, script, params, **kwargs)
+            except Exception as e:
+                done.put((False, e))
+            else:
+                done.put((True, results))
+
+        pool._spawn(attempt, first)
+        attempts = 1
+        try:
+            ok, value = done.get(timeout=delay)
+        except QueueEmpty:
+            if self._take_hedge():
+                pool._spawn(attempt, self._choose_replica(exclude=first))
+                attempts += 1
+            ok, value = done.get()
+
+        # the first success wins, errors are only raised once every attempt failed
+        while not ok and attempts > 1:
+            attempts -= 1
+            ok, value = done.get()
+        if not ok:
+            raise value
+        return value
+
+    def close_all(self, force_commit=False):
+        """ Close all connections of the primary and replica pools """
+        self.primary.close_all(force_commit=force_commit)
+        for replica in self.replicas:
+            replica.close_all()
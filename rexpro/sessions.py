@@ -0,0 +1,110 @@
+from contextlib import contextmanager
+from threading import Lock
+import binascii
+import hashlib
+import json
+import os
+
+from rexpro._compat import text_type
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+# os.rename doesn't replace existing files on windows, os.replace is missing from python 2
+_replace = getattr(os, 'replace', os.rename)
+
+
+def session_fingerprint(host, port, graph_name, graph_obj_name='g', username='', setup=None):
+    """ Returns the key sessions are stored under: sessions can only be resumed by pools connecting to the same graph
+    as the same user, and running the same setup scripts
+
+    :param setup: the scripts run when a session is opened
+    :type setup: list of str
+
+    :rtype: str
+    """
+    parts = [host, port, graph_name, graph_obj_name, username] + list(setup or [])
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(text_type(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class SessionStore(object):
+    """ Persists session keys to a local JSON file, so restarted processes can resume the sessions opened (and set up)
+    by their predecessors instead of opening new ones
+
+    Writes replace the file atomically, under an ``fcntl`` lock where available so concurrent processes don't lose
+    each other's updates.
+
+    Example::
+
+        pool = RexProSyncConnectionPool(host, port, graph_name, with_session=True,
+                                        session_setup=['def friends(v) { v.out("knows") }'],
+                                        session_store=SessionStore('/var/run/myapp/sessions.json'))
+    """
+
+    def __init__(self, path):
+        """
+        :param path: the file the session keys are stored in, created on the first save
+        :type path: str
+        """
+        self.path = path
+        self._lock = Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path + '.lock', 'a') as lock_file:
+                fcntl.lockf(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.lockf(lock_file, fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def load(self, fingerprint):
+        """ Returns the session keys stored under the given fingerprint
+
+        :param fingerprint: see ``session_fingerprint``
+        :type fingerprint: str
+
+        :rtype: list of bytes
+        """
+        try:
+            return [binascii.unhexlify(key) for key in self._read().get(fingerprint, [])]
+        except (TypeError, ValueError):
+            return []
+
+    def save(self, fingerprint, session_keys):
+        """ Stores the session keys under the given fingerprint, replacing the previous ones
+
+        :param fingerprint: see ``session_fingerprint``
+        :type fingerprint: str
+        :param session_keys: the session keys, an empty list removes the fingerprint
+        :type session_keys: list of bytes
+        """
+        with self._locked():
+            data = self._read()
+            if session_keys:
+                data[fingerprint] = [binascii.hexlify(key).decode('ascii') for key in session_keys]
+            else:
+                data.pop(fingerprint, None)
+            tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+            # session keys let anyone resume the sessions, only the owner may read them
+            with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+                json.dump(data, f)
+            _replace(tmp_path, self.path)
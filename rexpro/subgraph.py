@@ -0,0 +1,173 @@
+from array import array
+from collections import deque
+
+from rexpro._compat import xrange, izip
+from rexpro.traversal import KHopExpander
+
+
+class CSRGraph(object):
+    """ Compact, read-only, in-memory directed graph in compressed sparse row form
+
+    Vertices are numbered in insertion order, ``offsets[i]:offsets[i + 1]`` is the slice of ``targets`` holding the
+    indexes of vertex i's neighbors. Only the vertex id list and the id to index map hold python objects.
+    """
+
+    def __init__(self, vertex_ids, offsets, targets):
+        """
+        :param vertex_ids: the vertex ids, by index
+        :type vertex_ids: list
+        :param offsets: the start of each vertex's neighbors in ``targets``, followed by ``len(targets)``
+        :type offsets: array
+        :param targets: the neighbor vertex indexes
+        :type targets: array
+        """
+        self.vertex_ids = vertex_ids
+        self.index = dict((vertex_id, i) for i, vertex_id in enumerate(vertex_ids))
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_adjacency(cls, adjacency, vertex_ids=None, induced=True):
+        """ Builds a graph from (vertex id, neighbor ids) pairs
+
+        :param adjacency: (vertex id, neighbor ids) pairs, one per vertex
+        :type adjacency: iterable
+        :param vertex_ids: the ids of the listed vertices, allows streaming the adjacency in induced mode
+        :type vertex_ids: list
+        :param induced: only keep edges between the listed vertices, otherwise neighbors are added as vertices
+        :type induced: bool
+        :rtype: CSRGraph
+        """
+        if vertex_ids is None and induced:
+            adjacency = list(adjacency)
+            vertex_ids = [vertex_id for vertex_id, _ in adjacency]
+
+        ids = []
+        index = {}
+
+        def index_of(vertex_id):
+            i = index.get(vertex_id)
+            if i is None:
+                i = index[vertex_id] = len(ids)
+                ids.append(vertex_id)
+            return i
+
+        for vertex_id in vertex_ids or []:
+            index_of(vertex_id)
+
+        sources = array('q')
+        destinations = array('q')
+        for vertex_id, neighbor_ids in adjacency:
+            source = index_of(vertex_id)
+            for neighbor_id in neighbor_ids:
+                if induced:
+                    destination = index.get(neighbor_id)
+                    if destination is None:
+                        continue
+                else:
+                    destination = index_of(neighbor_id)
+                sources.append(source)
+                destinations.append(destination)
+
+        # counting sort of the edges by source
+        offsets = array('q', [0] * (len(ids) + 1))
+        for source in sources:
+            offsets[source + 1] += 1
+        for i in xrange(len(ids)):
+            offsets[i + 1] += offsets[i]
+        cursor = array('q', offsets)
+        targets = array('q', [0] * len(sources))
+        for source, destination in izip(sources, destinations):
+            targets[cursor[source]] = destination
+            cursor[source] += 1
+        return cls(ids, offsets, targets)
+
+    def __len__(self):
+        return len(self.vertex_ids)
+
+    def __contains__(self, vertex_id):
+        return vertex_id in self.index
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    def degree(self, vertex_id):
+        """ Returns the number of neighbors of the given vertex
+
+        :rtype: int
+        """
+        i = self.index[vertex_id]
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def neighbors(self, vertex_id):
+        """ Generator yielding the neighbor ids of the given vertex """
+        i = self.index[vertex_id]
+        vertex_ids = self.vertex_ids
+        for j in xrange(self.offsets[i], self.offsets[i + 1]):
+            yield vertex_ids[self.targets[j]]
+
+    def bfs(self, source, max_depth=None):
+        """ Generator yielding (vertex id, depth) in breadth-first order from the given vertex
+
+        :param source: the vertex id to start from
+        :param max_depth: stop after this many hops (default: unbounded)
+        :type max_depth: int
+        """
+        start = self.index[source]
+        seen = bytearray(len(self.vertex_ids))
+        seen[start] = 1
+        queue = deque([(start, 0)])
+        offsets, targets, vertex_ids = self.offsets, self.targets, self.vertex_ids
+        while queue:
+            i, depth = queue.popleft()
+            yield vertex_ids[i], depth
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for j in xrange(offsets[i], offsets[i + 1]):
+                target = targets[j]
+                if not seen[target]:
+                    seen[target] = 1
+                    queue.append((target, depth + 1))
+
+
+def fetch_subgraph(pool, seed_script, params=None, direction='out', labels=None, induced=True, page_size=1000,
+                   batch_size=500, concurrency=None):
+    """ Pulls a region of the graph into a local ``CSRGraph``
+
+    The seed script is paged through with ``pool.paginate`` and must return vertex ids
+    (ie. ``g.V.has('type', kind).id``), the edges of the seed vertices are then fetched in concurrent batches of ids.
+
+    Example::
+
+        graph = fetch_subgraph(pool, "g.V.has('team', team).id", {'team': 'core'}, labels=['reports_to'])
+        for vertex_id, depth in graph.bfs(root_id):
+            ...
+
+    :param pool: the connection pool to fetch the subgraph with
+    :type pool: RexProSyncConnectionPool | RexProGeventConnectionPool | RexProEventletConnectionPool
+    :param seed_script: gremlin traversal returning the ids of the vertices to fetch
+    :type seed_script: str
+    :param params: the parameters to execute the seed script with
+    :type params: dict
+    :param direction: the edge direction to follow, one of 'out', 'in' or 'both'
+    :type direction: str
+    :param labels: only fetch edges with these labels (default: all edges)
+    :type labels: list
+    :param induced: only keep edges between seed vertices, otherwise edge targets are added as vertices
+    :type induced: bool
+    :param page_size: the number of seed ids fetched per page
+    :type page_size: int
+    :param batch_size: the number of vertex ids sent per edge request
+    :type batch_size: int
+    :param concurrency: the number of edge requests in flight at once (defaults to the pool size)
+    :type concurrency: int
+    :rtype: CSRGraph
+    """
+    seeds = []
+    for page in pool.paginate(seed_script, params, page_size=page_size):
+        seeds.extend(page)
+    expander = KHopExpander(pool, direction=direction, labels=labels, max_depth=1, batch_size=batch_size,
+                            concurrency=concurrency)
+    adjacency = ((vertex_id, neighbor_ids) for _, vertex_id, neighbor_ids in expander.expand(seeds))
+    return CSRGraph.from_adjacency(adjacency, vertex_ids=seeds, induced=induced)
@@ -1,10 +1,18 @@
 from unittest import TestCase
 from rexpro._compat import text_type, reraise
 from nose.plugins.attrib import attr
+from contextlib import contextmanager
 from functools import wraps
+from threading import Lock
 import os
+import struct
+import time
 
+import msgpack
+
+from rexpro import messages
 from rexpro.connectors.sync import RexProSyncConnection, RexProSyncSocket, RexProSyncConnectionPool
+from rexpro.exceptions import RexProScriptException
 from rexpro.messages import ScriptRequest, MsgPackScriptResponse
 
 
@@ -97,3 +105,170 @@ class BaseRexProTestCase(TestCase):
     def assertErrorResponse(self, response):
         from rexpro.messages import ErrorResponse
         self.assertIsInstance(response, ErrorResponse, 'ErrorResponse was expected, got: {}'.format(type(response)))
+
+
+def split_frames(data):
+    """ Splits serialized rexpro messages into (message type, decoded message list) tuples """
+    frames = []
+    data = bytes(data)
+    while data:
+        msg_type = bytearray(data)[6]
+        length = struct.unpack('!I', data[7:11])[0]
+        frames.append((msg_type, msgpack.loads(data[11:11 + length])))
+        data = data[11 + length:]
+    return frames
+
+
+class FakeRexster(object):
+    """ In-process rexster double, the sockets of the connection classes it returns talk to it
+
+    Sessions are tracked like rexster does: in-session scripts sent with an unknown session key get an invalid session
+    error. Scripts are answered with ``handler(session, meta, script, params)``, an empty list by default.
+    """
+
+    def __init__(self, handler=None):
+        self.handler = handler
+        self.live = set()
+        self.opened = 0
+        self.killed = 0
+        self.scripts = []
+
+    def respond(self, msg_type, message):
+        session, request_id, meta = message[:3]
+        if msg_type == messages.MessageTypes.SESSION_REQUEST:
+            if meta.get('killSession'):
+                self.killed += 1
+                self.live.discard(session)
+                return messages.SessionResponse(session_key=session, meta={}, languages=[])
+            self.opened += 1
+            session = 'session-{:08}'.format(self.opened).encode('ascii')
+            self.live.add(session)
+            return messages.SessionResponse(session_key=session, meta={}, languages=[])
+
+        script, params = message[4], message[5]
+        script = script.decode('utf-8') if isinstance(script, bytes) else script
+        if meta.get('inSession') and session not in self.live:
+            return messages.ErrorResponse(meta={'flag': messages.ErrorResponse.INVALID_SESSION_ERROR},
+                                          message='invalid session')
+        self.scripts.append((session, script))
+        results = self.handler(session, meta, script, params) if self.handler is not None else []
+        return messages.MsgPackScriptResponse(results=results, bindings={})
+
+    def socket_class(self):
+        return type('FakeRexsterSocket', (FakeRexsterSocket, ), {'server': self})
+
+    def connection_class(self, base=RexProSyncConnection):
+        return type('FakeRexsterConnection', (FakeRexsterConnectionMixin, base), {'SOCKET_CLASS': self.socket_class()})
+
+    def pool_class(self, base=RexProSyncConnectionPool, conn_base=RexProSyncConnection):
+        return type('FakeRexsterPool', (base, ), {'CONN_CLASS': self.connection_class(conn_base)})
+
+
+class FakeRexsterSocket(object):
+    """ Socket double answering every frame it's sent through its ``FakeRexster`` """
+
+    server = None
+
+    def __init__(self):
+        self.frames = []
+        self.writes = []
+        self.responses = []
+        self.closed = False
+
+    def settimeout(self, timeout):
+        pass
+
+    def connect(self, address):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def send_message(self, msg):
+        self.sendall(bytes(msg.serialize()))
+
+    def sendall(self, data):
+        self.writes.append(data)
+        for msg_type, message in split_frames(data):
+            self.frames.append((msg_type, message))
+            self.responses.append(self.server.respond(msg_type, message))
+
+    def get_response(self, **kwargs):
+        return self.responses.pop(0)
+
+    def session_requests(self):
+        """ The number of session requests sent on this socket """
+        return len([1 for msg_type, _ in self.frames if msg_type == messages.MessageTypes.SESSION_REQUEST])
+
+
+class FakeRexsterConnectionMixin(object):
+
+    def _select(self, rlist, wlist, xlist, timeout=None):
+        return rlist, wlist, xlist
+
+
+class FakeScriptConnection(object):
+    """ Connection double answering ``execute`` with its pool's handler """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def execute(self, script, params=None, **kwargs):
+        params = params or {}
+        with self.pool.lock:
+            self.pool.calls.append((script, dict(params)))
+        return self.pool.handler(script, params)
+
+
+class FakeScriptPoolMixin(object):
+    """ Pool double whose connections answer ``execute`` with ``handler(script, params)``, without any socket. The
+    scripts and parameters executed are recorded in ``calls``.
+    """
+
+    def __init__(self, handler, pool_size=4):
+        self.handler = handler
+        self.pool_size = pool_size
+        self.lock = Lock()
+        self.calls = []
+
+    @contextmanager
+    def connection(self, transaction=True, *args, **kwargs):
+        yield FakeScriptConnection(self)
+
+
+def fake_script_pool(handler, pool_size=4, base=RexProSyncConnectionPool):
+    """ Returns a ``FakeScriptPoolMixin`` pool built on the given pool class
+
+    :param handler: the function answering the scripts, called with the script and its parameters
+    :type handler: callable
+    :param pool_size: the pool size, bounding the default concurrency of the pool's helpers
+    :type pool_size: int
+    :param base: the pool class the helpers under test come from
+    :type base: type
+    """
+    return type('FakeScriptPool', (FakeScriptPoolMixin, base), {})(handler, pool_size=pool_size)
+
+
+class DelayedValueHandler(object):
+    """ Script handler returning ``params['value']`` after ``params['delay']`` seconds, or failing if
+    ``params['fail']`` is set. Tracks the number of scripts running at once.
+    """
+
+    def __init__(self, sleep=time.sleep):
+        self.sleep = sleep
+        self.lock = Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, script, params):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            self.sleep(params.get('delay', 0))
+            if params.get('fail'):
+                raise RexProScriptException('failed')
+            return params['value']
+        finally:
+            with self.lock:
+                self.running -= 1
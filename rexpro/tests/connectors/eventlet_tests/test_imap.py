@@ -0,0 +1,51 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+
+import eventlet
+
+from rexpro.connectors.reventlet import RexProEventletConnectionPool
+from rexpro.exceptions import RexProConnectionException, RexProScriptException
+from rexpro.tests.base import DelayedValueHandler, fake_script_pool
+
+
+def get_pool():
+    return fake_script_pool(DelayedValueHandler(sleep=eventlet.sleep), base=RexProEventletConnectionPool)
+
+
+@attr('concurrency', 'eventlet')
+class TestEventletImap(TestCase):
+
+    def test_ordered_results(self):
+        pool = get_pool()
+        params = [{'value': i, 'delay': 0.01 * (3 - i)} for i in range(4)]
+        self.assertEqual(list(pool.imap('value', params)), [0, 1, 2, 3])
+
+    def test_unordered_results(self):
+        pool = get_pool()
+        params = [{'value': 0, 'delay': 0.05}, {'value': 1}]
+        self.assertEqual(list(pool.imap('value', params, ordered=False)), [1, 0])
+
+    def test_bounded_concurrency(self):
+        pool = get_pool()
+        params = ({'value': i, 'delay': 0.001} for i in range(20))
+        self.assertEqual(list(pool.imap('value', params, concurrency=3)), list(range(20)))
+        self.assertLessEqual(pool.handler.max_running, 3)
+
+    def test_per_item_errors(self):
+        pool = get_pool()
+        params = [{'value': 0}, {'value': 1, 'fail': True}, {'value': 2}]
+        results = list(pool.imap('value', params, return_exceptions=True))
+        self.assertEqual(results[0], 0)
+        self.assertIsInstance(results[1], RexProScriptException)
+        self.assertEqual(results[2], 2)
+
+        results = pool.imap('value', params)
+        self.assertEqual(next(results), 0)
+        self.assertRaises(RexProScriptException, next, results)
+
+    def test_deadline(self):
+        pool = get_pool()
+        params = [{'value': 0}, {'value': 1, 'delay': 1}]
+        results = pool.imap('value', params, timeout=0.05)
+        self.assertEqual(next(results), 0)
+        self.assertRaises(RexProConnectionException, next, results)
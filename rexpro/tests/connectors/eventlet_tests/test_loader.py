@@ -0,0 +1,50 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+
+import eventlet
+
+from rexpro.connectors.reventlet import RexProEventletConnectionPool
+from rexpro.tests.base import fake_script_pool
+
+
+def names(script, params):
+    eventlet.sleep(0)
+    return [{'name': 'v{}'.format(vertex_id)} for vertex_id in params['ids']]
+
+
+def get_loader_pool():
+    return fake_script_pool(names, base=RexProEventletConnectionPool)
+
+
+def batches(pool):
+    return [params['ids'] for _, params in pool.calls]
+
+
+@attr('concurrency', 'eventlet')
+class TestEventletElementLoader(TestCase):
+
+    def test_loads_in_the_same_tick_are_batched(self):
+        pool = get_loader_pool()
+        loader = pool.loader()
+        threads = [eventlet.spawn(loader.load, vertex_id) for vertex_id in [1, 2, 1, 3]]
+        results = [thread.wait() for thread in threads]
+
+        self.assertEqual([result['name'] for result in results], ['v1', 'v2', 'v1', 'v3'])
+        self.assertEqual(batches(pool), [[1, 2, 3]])
+
+    def test_results_are_memoized(self):
+        pool = get_loader_pool()
+        loader = pool.loader()
+        loader.load(1)
+        self.assertEqual(loader.load_many([1, 2]), [{'name': 'v1'}, {'name': 'v2'}])
+        self.assertEqual(batches(pool), [[1], [2]])
+
+        loader.clear()
+        loader.load(1)
+        self.assertEqual(batches(pool), [[1], [2], [1]])
+
+    def test_max_batch_size(self):
+        pool = get_loader_pool()
+        loader = pool.loader(max_batch_size=2)
+        loader.load_many([1, 2, 3])
+        self.assertEqual(batches(pool), [[1, 2], [3]])
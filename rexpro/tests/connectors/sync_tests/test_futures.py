@@ -0,0 +1,41 @@
+from unittest import TestCase
+from concurrent.futures import Future
+from nose.plugins.attrib import attr
+
+from rexpro.exceptions import RexProScriptException
+from rexpro.tests.base import DelayedValueHandler, fake_script_pool
+
+
+def get_pool():
+    return fake_script_pool(DelayedValueHandler())
+
+
+@attr('unit', 'concurrency')
+class TestSyncFutures(TestCase):
+
+    def test_submit_returns_future(self):
+        future = get_pool().submit('value', {'value': 1})
+        self.assertIsInstance(future, Future)
+        self.assertEqual(future.result(timeout=5), 1)
+
+    def test_map_keeps_order(self):
+        pool = get_pool()
+        params = [{'value': i, 'delay': 0.05 * (3 - i)} for i in range(4)]
+        self.assertEqual(list(pool.map('value', params)), [0, 1, 2, 3])
+
+    def test_map_as_completed(self):
+        pool = get_pool()
+        params = [{'value': 0, 'delay': 0.2}, {'value': 1}]
+        self.assertEqual(list(pool.map('value', params, ordered=False)), [1, 0])
+
+    def test_map_bounds_concurrency(self):
+        pool = get_pool()
+        params = ({'value': i, 'delay': 0.02} for i in range(10))
+        self.assertEqual(sorted(pool.map('value', params, concurrency=2, ordered=False)), list(range(10)))
+        self.assertLessEqual(pool.handler.max_running, 2)
+
+    def test_map_raises_failed_requests(self):
+        pool = get_pool()
+        results = pool.map('value', [{'value': 0}, {'value': 1, 'fail': True}])
+        self.assertEqual(next(results), 0)
+        self.assertRaises(RexProScriptException, next, results)
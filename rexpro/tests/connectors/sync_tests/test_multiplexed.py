@@ -0,0 +1,227 @@
+from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from socket import socket
+from threading import Thread
+import struct
+import time
+from nose.plugins.attrib import attr
+
+import msgpack
+
+from rexpro.connectors.sync import RexProMultiplexedSyncConnectionPool
+from rexpro.exceptions import RexProConnectionException, RexProScriptException
+
+
+def read_exactly(sock, length):
+    data = b''
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+class FakeRexster(Thread):
+    """ Rexpro server double that answers script requests in batches of ``batch_size``, in reverse order, with
+    ``[params['value']]`` after ``params['delay']`` seconds. Session requests are answered right away.
+    """
+
+    def __init__(self, batch_size=1):
+        super(FakeRexster, self).__init__()
+        self.daemon = True
+        self.batch_size = batch_size
+        self.listener = socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(5)
+        self.port = self.listener.getsockname()[1]
+        self.connections = 0
+        self.sessions = []
+        self.script_sessions = []
+
+    def run(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except Exception:
+                return
+            self.connections += 1
+            Thread(target=self.serve, args=(conn, )).start()
+
+    def serve(self, conn):
+        batch = []
+        try:
+            while True:
+                header = read_exactly(conn, 11)
+                length = struct.unpack('!I', header[7:])[0]
+                message = msgpack.loads(read_exactly(conn, length))
+                if bytearray(header)[6] == 1:
+                    session = 'session-{:08}'.format(len(self.sessions)).encode('ascii')
+                    self.sessions.append(session)
+                    body = msgpack.dumps([session, message[1], {}, ['groovy']])
+                    conn.sendall(bytearray([1, 0, 0, 0, 0, 0, 2]) + struct.pack('!I', len(body)) + body)
+                    continue
+                session, request_id, meta, language, script, params = message
+                self.script_sessions.append(session)
+                time.sleep(params.get('delay', 0))
+                batch.append((request_id, params))
+                if len(batch) < self.batch_size:
+                    continue
+                for request_id, params in reversed(batch):
+                    if params.get('fail'):
+                        body = msgpack.dumps([b'\x00' * 16, request_id, {'flag': 2}, 'failed'])
+                        msg_type = 0
+                    else:
+                        body = msgpack.dumps([b'\x00' * 16, request_id, {}, [params['value']], {}])
+                        msg_type = 5
+                    conn.sendall(bytearray([1, 0, 0, 0, 0, 0, msg_type]) + struct.pack('!I', len(body)) + body)
+                batch = []
+        except EOFError:
+            conn.close()
+
+    def stop(self):
+        self.listener.close()
+
+
+@attr('unit', 'concurrency')
+class TestMultiplexedSyncConnection(TestCase):
+
+    def get_pool(self, server, pool_size=1):
+        return RexProMultiplexedSyncConnectionPool('127.0.0.1', server.port, 'graph', session_less=True,
+                                                   pool_size=pool_size, timeout=5)
+
+    def test_out_of_order_responses_reach_their_thread(self):
+        server = FakeRexster(batch_size=4)
+        server.start()
+        pool = self.get_pool(server)
+
+        def query(value):
+            with pool.connection() as conn:
+                return conn.execute('value', {'value': value})
+
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(query, range(4)))
+            self.assertEqual(results, [[0], [1], [2], [3]])
+            self.assertEqual(server.connections, 1)
+        finally:
+            pool.close_all()
+            server.stop()
+
+    def test_errors_are_raised_in_the_requesting_thread(self):
+        server = FakeRexster()
+        server.start()
+        pool = self.get_pool(server)
+        try:
+            with pool.connection() as conn:
+                self.assertRaises(RexProScriptException, conn.execute, 'value', {'fail': True})
+                self.assertEqual(conn.execute('value', {'value': 1}), [1])
+                self.assertRaises(RexProScriptException, conn.transaction().__enter__)
+        finally:
+            pool.close_all()
+            server.stop()
+
+    def test_connections_are_shared_round_robin(self):
+        server = FakeRexster()
+        server.start()
+        pool = self.get_pool(server, pool_size=2)
+        try:
+            connections = []
+            for _ in range(4):
+                with pool.connection() as conn:
+                    connections.append(conn)
+            self.assertEqual(len(set(connections)), 2)
+            self.assertIs(connections[0], connections[2])
+        finally:
+            pool.close_all()
+            server.stop()
+
+    def test_lost_connections_are_replaced(self):
+        server = FakeRexster()
+        server.start()
+        pool = self.get_pool(server)
+        try:
+            with pool.connection() as conn:
+                conn._shutdown()
+            for _ in range(50):
+                if not conn.is_alive:
+                    break
+                time.sleep(0.01)
+            with pool.connection() as new_conn:
+                self.assertIsNot(new_conn, conn)
+                self.assertEqual(new_conn.execute('value', {'value': 1}), [1])
+        finally:
+            pool.close_all()
+            server.stop()
+
+    def test_requests_on_a_reopened_socket_fail(self):
+        server = FakeRexster(batch_size=2)
+        server.start()
+        pool = self.get_pool(server)
+        try:
+            with pool.connection() as conn:
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    # never answered, the server waits for a second request
+                    waiting = executor.submit(conn.execute, 'value', {'value': 1})
+                    for _ in range(50):
+                        if conn._pending:
+                            break
+                        time.sleep(0.01)
+                    started = time.time()
+                    conn.open()
+                    self.assertRaises(RexProConnectionException, waiting.result)
+                    self.assertLess(time.time() - started, 1)
+        finally:
+            pool.close_all()
+            server.stop()
+
+    def test_connections_are_opened_outside_the_pool_lock(self):
+        server = FakeRexster()
+        server.start()
+        pool = self.get_pool(server, pool_size=2)
+        try:
+            with pool.connection() as first:
+                pass
+            opening = []
+            create_connection = pool._create_connection
+
+            def slow_create_connection(*args, **kwargs):
+                opening.append(True)
+                time.sleep(0.2)
+                return create_connection(*args, **kwargs)
+            pool._create_connection = slow_create_connection
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                second = executor.submit(pool.get)
+                while not opening:
+                    time.sleep(0.01)
+                # the live connection is handed out while the second one is being opened
+                started = time.time()
+                self.assertIs(pool.get(), first)
+                self.assertLess(time.time() - started, 0.1)
+                self.assertIsNot(second.result(), first)
+            self.assertEqual(pool.size, 2)
+        finally:
+            pool.close_all()
+            server.stop()
+
+    def test_concurrent_first_requests_open_one_lazy_session(self):
+        server = FakeRexster()
+        server.start()
+        pool = RexProMultiplexedSyncConnectionPool('127.0.0.1', server.port, 'graph', pool_size=1, timeout=5,
+                                                   lazy_session=True)
+
+        def query(value):
+            with pool.connection() as conn:
+                return conn.execute('value', {'value': value, 'delay': 0.05})
+
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(query, range(8)))
+            self.assertEqual(results, [[i] for i in range(8)])
+            self.assertEqual(len(server.sessions), 1)
+            # the first script runs session-less, pipelined with the session request, the others join the session
+            self.assertEqual(server.script_sessions[1:], server.sessions * 7)
+        finally:
+            pool.close_all()
+            server.stop()
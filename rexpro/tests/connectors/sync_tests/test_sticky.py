@@ -0,0 +1,104 @@
+from unittest import TestCase
+from threading import Event, Thread
+from nose.plugins.attrib import attr
+
+from rexpro.connectors.sync import RexProSyncConnectionPool
+from rexpro.tests.base import FakeRexster
+
+
+def run_in_thread(func):
+    results = []
+    thread = Thread(target=lambda: results.append(func()))
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+@attr('unit', 'pooling')
+class TestStickyConnections(TestCase):
+
+    def get_pool(self, pool_size=4):
+        return FakeRexster().pool_class()('localhost', 8184, 'graph', session_less=True, pool_size=pool_size,
+                                          sticky=True)
+
+    def checkout(self, pool):
+        with pool.connection(transaction=False) as conn:
+            return conn
+
+    def test_thread_reuses_its_connection_without_the_queue(self):
+        pool = self.get_pool()
+        conn = self.checkout(pool)
+        self.assertIs(self.checkout(pool), conn)
+        self.assertTrue(pool.pool.empty())
+        self.assertIsNot(run_in_thread(lambda: self.checkout(pool)), conn)
+
+    def test_nested_checkouts_get_another_connection(self):
+        pool = self.get_pool()
+        with pool.connection(transaction=False) as outer:
+            with pool.connection(transaction=False) as inner:
+                self.assertIsNot(inner, outer)
+        self.assertIs(self.checkout(pool), outer)
+        self.assertIs(pool.pool.get_nowait(), inner)
+
+    def test_one_connection_is_kept_for_the_queue(self):
+        pool = self.get_pool(pool_size=3)
+        for _ in range(3):
+            run_in_thread(lambda: self.checkout(pool))
+        self.assertEqual(len(pool._sticky), 2)
+        self.assertEqual(pool.size, 3)
+
+    def test_connections_of_finished_threads_are_reclaimed(self):
+        pool = self.get_pool(pool_size=2)
+        bound = run_in_thread(lambda: self.checkout(pool))
+        unbound = run_in_thread(lambda: self.checkout(pool))
+        with pool.connection(transaction=False) as first:
+            with pool.connection(transaction=False) as second:
+                self.assertIs(first, unbound)
+                self.assertIs(second, bound)
+
+    def test_close_all_leaves_connections_in_use_with_their_thread(self):
+        pool = self.get_pool()
+        idle = self.checkout(pool)
+        checked_out = Event()
+        release = Event()
+        used = []
+
+        def busy():
+            with pool.connection(transaction=False) as conn:
+                used.append(conn)
+                checked_out.set()
+                release.wait(5)
+            used.append(self.checkout(pool))
+        thread = Thread(target=busy)
+        thread.start()
+        checked_out.wait(5)
+
+        pool.close_all()
+        self.assertEqual(list(pool._sticky), [used[0]])
+        self.assertTrue(used[0]._opened)
+        self.assertFalse(idle._opened)
+        release.set()
+        thread.join()
+        # the busy thread keeps its connection, this one binds another one
+        self.assertIs(used[1], used[0])
+        self.assertIn(self.checkout(pool), pool._sticky)
+        self.assertNotIn(idle, pool._sticky)
+
+    def test_bound_connections_keep_their_session_shard(self):
+        pool = FakeRexster().pool_class()('localhost', 8184, 'graph', with_session=True, session_shards=3,
+                                          pool_size=4, sticky=True)
+        session = self.checkout(pool)._session_key
+        for _ in range(4):
+            self.assertEqual(self.checkout(pool)._session_key, session)
+        # the threads' connections are spread over the shards
+        sessions = set([session] + [run_in_thread(lambda: self.checkout(pool)._session_key) for _ in range(2)])
+        self.assertEqual(sessions, set(pool.session_keys))
+
+        # an affinity picks its own shard
+        with pool.connection(transaction=False, affinity='user-1') as conn:
+            affinity_session = conn._session_key
+        self.assertEqual(affinity_session, pool._session_shard('user-1'))
+
+    def test_sticky_is_a_keyword(self):
+        self.assertRaises(TypeError, RexProSyncConnectionPool, 'localhost', 8184, 'graph', stickyy=True)
+        self.assertFalse(RexProSyncConnectionPool('localhost', 8184, 'graph', session_less=True).sticky)
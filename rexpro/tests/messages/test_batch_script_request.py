@@ -0,0 +1,35 @@
+from nose.plugins.attrib import attr
+from rexpro.messages import BatchScriptRequest
+from rexpro.tests.base import BaseRexProTestCase
+
+
+@attr('unit')
+class TestRexProBatchScriptRequestMessage(BaseRexProTestCase):
+
+    def test_statements_are_merged_into_closures(self):
+        script, params = BatchScriptRequest.merge_statements([
+            ('a + b', {'b': 2, 'a': 1}),
+            'g.V.count()',
+        ])
+        self.assertEqual(params, {'rexpro_batch0_a': 1, 'rexpro_batch0_b': 2})
+        self.assertIn('{ a, b ->\na + b\n}.call(rexpro_batch0_a, rexpro_batch0_b)', script)
+        self.assertIn('{ ->\ng.V.count()\n}.call()', script)
+        self.assertTrue(script.startswith('['))
+        self.assertTrue(script.endswith(']'))
+
+    def test_params_are_namespaced_per_statement(self):
+        request = BatchScriptRequest([('x', {'x': 1}), ('x', {'x': 2})])
+        self.assertEqual(request.params, {'rexpro_batch0_x': 1, 'rexpro_batch1_x': 2})
+
+    def test_execute_batch(self):
+        conn = self.get_connection()
+        results = conn.execute_batch([
+            ('values', {'values': 1}),
+            ('values', {'values': 'two'}),
+            '3',
+        ])
+        self.assertEqual(results, [1, 'two', 3])
+
+    def test_execute_empty_batch(self):
+        conn = self.get_connection()
+        self.assertEqual(conn.execute_batch([]), [])
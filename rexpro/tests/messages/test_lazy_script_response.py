@@ -0,0 +1,53 @@
+from nose.plugins.attrib import attr
+import msgpack
+
+from rexpro.messages import LazyMsgPackScriptResponse, LazyResultList, MsgPackScriptResponse
+from rexpro.tests.base import BaseRexProTestCase
+
+
+def script_response_body(results, bindings=None):
+    return bytearray(msgpack.dumps([b'\x00' * 16, b'\x01' * 16, {}, results, bindings or {}]))
+
+
+@attr('unit')
+class TestRexProLazyScriptResponseMessage(BaseRexProTestCase):
+
+    def test_list_results_are_lazy(self):
+        results = [{'_id': i, 'name': 'v{}'.format(i)} for i in range(5)]
+        response = LazyMsgPackScriptResponse.deserialize(script_response_body(results, {'x': 1}))
+
+        self.assertIsInstance(response.results, LazyResultList)
+        self.assertEqual(len(response.results), 5)
+        self.assertEqual(response.results[3], results[3])
+        self.assertEqual(response.results[-1], results[-1])
+        self.assertEqual(response.results[1:3], results[1:3])
+        self.assertEqual(list(response.results), results)
+        self.assertEqual(response.results, results)
+        self.assertEqual(response.bindings, {'x': 1})
+
+    def test_matches_eager_response(self):
+        body = script_response_body([1, 'two', [3.0, None]], {'a': 'b'})
+        lazy = LazyMsgPackScriptResponse.deserialize(body)
+        eager = MsgPackScriptResponse.deserialize(body)
+        self.assertEqual(lazy.results, eager.results)
+        self.assertEqual(lazy.bindings, eager.bindings)
+
+    def test_non_list_results_are_decoded(self):
+        response = LazyMsgPackScriptResponse.deserialize(script_response_body({'a': 1}))
+        self.assertEqual(response.results, {'a': 1})
+
+        response = LazyMsgPackScriptResponse.deserialize(script_response_body(None))
+        self.assertIsNone(response.results)
+
+    def test_lazy_execute(self):
+        conn = self.get_connection()
+        results = conn.execute('[1, 2, 3]', lazy=True)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], 1)
+
+    def test_body_larger_than_the_default_unpacker_buffer(self):
+        blob = b'x' * (101 * 1024 * 1024)
+        response = LazyMsgPackScriptResponse.deserialize(script_response_body([blob, 1]))
+        self.assertEqual(len(response.results), 2)
+        self.assertEqual(len(response.results[0]), len(blob))
+        self.assertEqual(response.results[1], 1)
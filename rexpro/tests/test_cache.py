@@ -0,0 +1,347 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+from nose.plugins.attrib import attr
+
+from rexpro.cache import LRUCache, ElementCache, SharedMemoryCache, SQLiteCache, TieredCache, encode_results, \
+    decode_results, result_cache_key
+from rexpro.connectors.base import RexProBaseConnection, RexProBaseConnectionPool
+from rexpro.elements import Vertex, Edge, decode_element
+from rexpro.tests.base import FakeRexster
+
+
+def vertex(vertex_id, **properties):
+    return {'_id': vertex_id, '_type': 'vertex', '_properties': properties}
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeVertexServer(FakeRexster):
+    """ Rexster double answering the pool's vertex helper scripts, and returning ``results`` otherwise """
+
+    def __init__(self, vertices):
+        super(FakeVertexServer, self).__init__(handler=self.answer)
+        self.vertices = vertices
+        self.results = None
+        self.requests = []
+
+    def answer(self, session, meta, script, params):
+        if script == RexProBaseConnectionPool.GET_VERTICES_SCRIPT:
+            self.requests.append(params)
+            return [self.vertices.get(vertex_id) for vertex_id in params['ids']]
+        if script == RexProBaseConnectionPool.UPDATE_VERTEX_SCRIPT:
+            self.requests.append(params)
+            return [vertex(params['id'], **params['properties'])]
+        if 'Transaction' in script:
+            return None
+        self.requests.append(params)
+        return self.results
+
+    def get_pool(self, **kwargs):
+        return self.pool_class()('localhost', 8184, 'graph', element_cache=ElementCache(ttl=5), **kwargs)
+
+
+@attr('unit')
+class TestLRUCache(TestCase):
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = LRUCache(ttl=5, clock=clock)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=10)
+        clock.now = 6
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+
+@attr('unit')
+class TestElementCache(TestCase):
+
+    def test_store_results_finds_nested_elements(self):
+        cache = ElementCache()
+        edge = Edge(7, 'knows', 1, 2)
+        cache.store_results('graph', [vertex(1, name='a'), {'friends': [Vertex(2)]}, [edge], {'count': 3}, None])
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.get_element('graph', 'vertex', 1), vertex(1, name='a'))
+        self.assertEqual(cache.get_element('graph', 'vertex', 2), Vertex(2))
+        self.assertIs(cache.get_element('graph', 'edge', 7), edge)
+        self.assertIsNone(cache.get_element('other', 'vertex', 1))
+
+    def test_invalidate(self):
+        cache = ElementCache()
+        cache.store_element('graph', vertex(1))
+        cache.invalidate('graph', 'vertex', 1)
+        self.assertIsNone(cache.get_element('graph', 'vertex', 1))
+
+
+@attr('unit')
+class TestPoolVertexHelpers(TestCase):
+
+    def test_get_vertices_only_fetches_missing_ids(self):
+        server = FakeVertexServer({1: vertex(1), 2: vertex(2)})
+        pool = server.get_pool()
+        self.assertEqual(pool.get_vertex(1), vertex(1))
+        self.assertEqual(pool.get_vertices([1, 2, 2, 3]), [vertex(1), vertex(2), vertex(2), None])
+        self.assertEqual(server.requests, [{'ids': [1]}, {'ids': [2, 3]}])
+
+    def test_update_vertex_replaces_cached_copy(self):
+        server = FakeVertexServer({1: vertex(1, name='old')})
+        pool = server.get_pool()
+        pool.get_vertex(1)
+        self.assertEqual(pool.update_vertex(1, {'name': 'new'}), vertex(1, name='new'))
+        self.assertEqual(pool.get_vertex(1), vertex(1, name='new'))
+        self.assertEqual(len(server.requests), 2)
+
+    def test_invalidate_vertex(self):
+        server = FakeVertexServer({1: vertex(1)})
+        pool = server.get_pool()
+        pool.get_vertex(1)
+        pool.invalidate_vertex(1)
+        pool.get_vertex(1)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_single_element_results_are_cached(self):
+        server = FakeVertexServer({})
+        server.results = vertex(4)
+        pool = server.get_pool()
+        with pool.connection(transaction=False) as conn:
+            conn.execute('g.v(4)')
+        self.assertEqual(pool.get_vertex(4), vertex(4))
+        self.assertEqual(len(server.requests), 1)
+
+    def test_elements_are_cached_once_the_transaction_commits(self):
+        server = FakeVertexServer({})
+        server.results = [vertex(5)]
+        pool = server.get_pool()
+        with pool.connection() as conn:
+            conn.execute('g.addVertex(5)')
+            self.assertIsNone(pool.element_cache.get_element('graph', 'vertex', 5))
+        self.assertEqual(pool.element_cache.get_element('graph', 'vertex', 5), vertex(5))
+
+    def test_rolled_back_elements_are_not_cached(self):
+        server = FakeVertexServer({})
+        server.results = [vertex(5)]
+        pool = server.get_pool()
+
+        def rolled_back():
+            with pool.connection() as conn:
+                conn.execute('g.addVertex(5)')
+                raise ValueError('rollback')
+        self.assertRaises(ValueError, rolled_back)
+        self.assertIsNone(pool.element_cache.get_element('graph', 'vertex', 5))
+
+
+class FakeResultCacheConnection(RexProBaseConnection):
+
+    def open(self, soft=False):
+        self.requests = []
+
+    def _execute_request(self, request_class, transaction, script_response_class=None, **kwargs):
+        self.requests.append(kwargs['params'])
+        return [vertex(kwargs['params']['id'])]
+
+
+@attr('unit')
+class TestResultCache(TestCase):
+
+    def test_key_ignores_param_order(self):
+        self.assertEqual(result_cache_key('graph', 'g.v(id)', {'id': 1, 'a': 2}),
+                         result_cache_key('graph', 'g.v(id)', {'a': 2, 'id': 1}))
+        self.assertNotEqual(result_cache_key('graph', 'g.v(id)', {'id': 1}),
+                            result_cache_key('other', 'g.v(id)', {'id': 1}))
+
+    def test_results_round_trip(self):
+        results = [Vertex(1, {'name': 'a'}), {'count': 2}]
+        self.assertEqual(decode_results(encode_results(results)), [vertex(1, name='a'), {'count': 2}])
+        self.assertIsInstance(decode_results(encode_results(results), object_hook=decode_element)[0], Vertex)
+
+    def test_execute_refreshes_stale_results_in_background(self):
+        clock = FakeClock()
+        refreshes = []
+        cache = SQLiteCache(':memory:', clock=clock)
+        conn = FakeResultCacheConnection('localhost', 8184, 'graph', result_cache=cache,
+                                         refresh_results=lambda *args: refreshes.append(args))
+        conn.execute('g.v(id)', {'id': 1}, cache_ttl=5)
+        clock.now = 10
+        self.assertEqual(conn.execute('g.v(id)', {'id': 1}, cache_ttl=5), [vertex(1)])
+        self.assertEqual(len(conn.requests), 1)
+        self.assertEqual(refreshes[0][1:], ('g.v(id)', {'id': 1}, 'groovy', 5))
+
+    def test_pool_refresh_caches_fresh_results(self):
+        server = FakeVertexServer({})
+        server.results = [vertex(1, name='new')]
+        pool = server.get_pool(result_cache=LRUCache())
+        pool._join(pool._refresh_results('key', 'g.v(id)', {'id': 1}, 'groovy', 5))
+        self.assertEqual(pool.result_cache.get('key'), encode_results([vertex(1, name='new')]))
+        self.assertEqual(pool._refreshing, set())
+
+    def test_pool_refreshes_each_key_once_at_a_time(self):
+        pool = FakeVertexServer({}).get_pool(result_cache=LRUCache())
+        pool._spawn = lambda func: func
+        refresh = pool._refresh_results('key', 'g.v(id)', {'id': 1}, 'groovy', 5)
+        self.assertIsNone(pool._refresh_results('key', 'g.v(id)', {'id': 1}, 'groovy', 5))
+        refresh()
+        self.assertIsNotNone(pool._refresh_results('key', 'g.v(id)', {'id': 1}, 'groovy', 5))
+
+    def test_execute_uses_result_cache(self):
+        conn = FakeResultCacheConnection('localhost', 8184, 'graph', result_cache=LRUCache())
+        self.assertEqual(conn.execute('g.v(id)', {'id': 1}, cache_ttl=5), [vertex(1)])
+        self.assertEqual(conn.execute('g.v(id)', {'id': 1}, cache_ttl=5), [vertex(1)])
+        conn.execute('g.v(id)', {'id': 1})
+        conn.execute('g.v(id)', {'id': 2}, cache_ttl=5)
+        self.assertEqual(conn.requests, [{'id': 1}, {'id': 1}, {'id': 2}])
+
+
+@attr('unit')
+class TestSharedMemoryCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache')
+        self.clock = FakeClock()
+        self.cache = SharedMemoryCache(self.path, slots=8, slot_size=128, clock=self.clock)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_set_and_get(self):
+        self.assertTrue(self.cache.set('a', b'value', ttl=5))
+        self.assertEqual(self.cache.get('a'), b'value')
+        self.assertIsNone(self.cache.get('b'))
+        self.cache.set('a', b'other')
+        self.assertEqual(self.cache.get('a'), b'other')
+
+    def test_entries_expire(self):
+        self.cache.set('a', b'value', ttl=5)
+        self.clock.now = 6
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_shared_between_instances(self):
+        self.cache.set('a', b'value')
+        other = SharedMemoryCache(self.path, slots=1024, clock=self.clock)
+        try:
+            self.assertEqual((other.slots, other.slot_size), (8, 128))
+            self.assertEqual(other.get('a'), b'value')
+            other.delete('a')
+            self.assertIsNone(self.cache.get('a'))
+        finally:
+            other.close()
+
+    def test_soonest_expiring_entry_is_evicted(self):
+        for i in range(9):
+            self.cache.set(str(i), b'value', ttl=10 + i)
+        self.assertIsNone(self.cache.get('0'))
+        self.assertEqual(self.cache.get('8'), b'value')
+
+    def test_oversized_values_are_not_cached(self):
+        self.assertFalse(self.cache.set('a', b'x' * 128))
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_clear(self):
+        self.cache.set('a', b'value')
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('a'))
+
+
+@attr('unit')
+class TestSQLiteCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+        self.clock = FakeClock()
+        self.cache = SQLiteCache(self.path, max_bytes=16, stale_ttl=60, clock=self.clock)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_survives_reopening(self):
+        self.cache.set('a', b'value', ttl=5)
+        self.cache.close()
+        self.assertEqual(SQLiteCache(self.path, clock=self.clock).get('a'), b'value')
+
+    def test_expired_values_are_stale(self):
+        self.cache.set('a', b'value', ttl=5)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.lookup('a'), (b'value', False))
+        self.clock.now = 100
+        self.assertEqual(self.cache.lookup('a'), (None, True))
+
+    def test_size_cap_evicts_soonest_expiring(self):
+        self.cache.set('a', b'x' * 8, ttl=5)
+        self.cache.set('b', b'x' * 8, ttl=10)
+        self.cache.set('c', b'x' * 8, ttl=20)
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('b'), b'x' * 8)
+        self.assertEqual(self.cache.get('c'), b'x' * 8)
+
+    def test_writes_are_not_synced_one_by_one(self):
+        self.assertEqual(self.cache.db.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        # NORMAL: WAL commits are only synced at checkpoints
+        self.assertEqual(self.cache.db.execute('PRAGMA synchronous').fetchone()[0], 1)
+
+    def test_size_is_tracked_across_writes(self):
+        self.cache.set('a', b'x' * 8)
+        self.cache.set('a', b'x' * 4)
+        self.cache.set('b', b'x' * 8)
+        self.assertEqual(self.cache._size, 12)
+        self.cache.delete('b')
+        self.assertEqual(self.cache._size, 4)
+        self.cache.close()
+        reopened = SQLiteCache(self.path, max_bytes=16, clock=self.clock)
+        reopened.set('c', b'x' * 8)
+        self.assertEqual(reopened._size, 12)
+        reopened.close()
+
+
+@attr('unit')
+class TestTieredCache(TestCase):
+
+    def test_hits_are_copied_into_faster_tiers(self):
+        memory, persistent = LRUCache(), SQLiteCache(':memory:')
+        persistent.set('a', b'value')
+        cache = TieredCache([memory, persistent])
+        self.assertEqual(cache.get('a'), b'value')
+        self.assertEqual(memory.get('a'), b'value')
+        cache.delete('a')
+        self.assertIsNone(persistent.get('a'))
+
+    def test_backfills_do_not_outlive_the_slower_tier(self):
+        clock = FakeClock()
+        memory, persistent = LRUCache(clock=clock), SQLiteCache(':memory:', clock=clock)
+        persistent.set('a', b'value', ttl=2)
+        cache = TieredCache([memory, persistent], backfill_ttl=5)
+        self.assertEqual(cache.get('a'), b'value')
+        self.assertEqual(memory.remaining_ttl('a'), 2)
+        clock.now = 3
+        self.assertIsNone(memory.get('a'))
+
+    def test_stale_values_are_returned_without_fresh_ones(self):
+        clock = FakeClock()
+        persistent = SQLiteCache(':memory:', clock=clock)
+        persistent.set('a', b'value', ttl=5)
+        clock.now = 10
+        cache = TieredCache([LRUCache(), persistent])
+        self.assertEqual(cache.lookup('a'), (b'value', False))
+        self.assertIsNone(cache.get('a'))
@@ -0,0 +1,71 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+import msgpack
+import numpy
+
+from rexpro import exceptions
+from rexpro.columnar import materialize_columns
+from rexpro.messages import LazyMsgPackScriptResponse
+
+
+def lazy_results(rows):
+    body = bytearray(msgpack.dumps([b'\x00' * 16, b'\x01' * 16, {}, rows, {}]))
+    return LazyMsgPackScriptResponse.deserialize(body).results
+
+
+@attr('unit')
+class TestColumnarResults(TestCase):
+
+    ROWS = [
+        {'name': 'saturn', 'age': 10000, 'weight': 1.5, 'god': True},
+        {'name': 'jupiter', 'age': 5000, 'god': False},
+        {'name': 'hercules', 'age': 30, 'weight': 2, 'god': None},
+    ]
+
+    def test_inferred_columns(self):
+        for results in (lazy_results(self.ROWS), self.ROWS):
+            table = materialize_columns(results)
+            self.assertEqual(len(table), 3)
+            self.assertEqual(table['name'], ['saturn', 'jupiter', 'hercules'])
+            self.assertEqual(table['age'].dtype, numpy.int64)
+            self.assertEqual(list(table['age']), [10000, 5000, 30])
+            self.assertEqual(table['weight'].dtype, numpy.float64)
+            self.assertEqual(list(table['weight'].mask), [False, True, False])
+            self.assertEqual(table['weight'][2], 2.0)
+            self.assertEqual(table['god'].dtype, numpy.bool_)
+            self.assertEqual(list(table['god'].mask), [False, False, True])
+
+    def test_schema_selects_and_casts_columns(self):
+        table = materialize_columns(lazy_results(self.ROWS), schema={'age': 'int32', 'name': object})
+        self.assertEqual(sorted(table.keys()), ['age', 'name'])
+        self.assertEqual(table['age'].dtype, numpy.int32)
+
+    def test_mixed_column_falls_back_to_objects(self):
+        table = materialize_columns(lazy_results([{'a': 1}, {'a': 'one'}, {'b': 2}]))
+        self.assertEqual(table['a'], [1, 'one', None])
+        self.assertEqual(list(table['b'].mask), [True, True, False])
+
+    def test_schema_mismatch_raises(self):
+        with self.assertRaises(exceptions.RexProException):
+            materialize_columns([{'a': 'one'}], schema={'a': 'int64'})
+
+    def test_narrowing_schema_raises_instead_of_losing_data(self):
+        for rows, schema in [([{'a': 2 ** 40}], {'a': 'int32'}),
+                             ([{'a': -1}], {'a': 'uint8'}),
+                             ([{'a': 1.5}], {'a': 'int64'}),
+                             ([{'a': 1e300}], {'a': 'float32'}),
+                             ([{'a': 2 ** 24 + 1}], {'a': 'float32'})]:
+            with self.assertRaises(exceptions.RexProException):
+                materialize_columns(lazy_results(rows), schema=schema)
+
+        table = materialize_columns(lazy_results([{'a': 2.0}, {'a': None}, {'a': 2 ** 31 - 1}]), schema={'a': 'int32'})
+        self.assertEqual(list(table['a'].compressed()), [2, 2 ** 31 - 1])
+
+    def test_non_map_results_raise(self):
+        with self.assertRaises(exceptions.RexProScriptException):
+            materialize_columns(lazy_results([1, 2]))
+
+    def test_results_larger_than_the_default_unpacker_buffer(self):
+        blob = b'x' * (101 * 1024 * 1024)
+        table = materialize_columns(lazy_results([{'a': blob}, {'a': b'y'}]))
+        self.assertEqual([len(value) for value in table['a']], [len(blob), 1])
@@ -0,0 +1,75 @@
+from unittest import TestCase, skipIf
+from nose.plugins.attrib import attr
+import os
+import time
+import msgpack
+
+from rexpro.decoding import ProcessPoolDecoder, ParallelMsgPackScriptResponse, shared_memory
+from rexpro.elements import Vertex, decode_element
+
+
+def script_response_body(results, bindings=None):
+    return bytearray(msgpack.dumps([b'\x00' * 16, b'\x01' * 16, {}, results, bindings or {}]))
+
+
+RESULTS = [{'_id': i, '_type': 'vertex', '_properties': {'name': 'v{}'.format(i)}} for i in range(50)]
+
+
+@attr('unit')
+class TestProcessPoolDecoder(TestCase):
+
+    def setUp(self):
+        self.decoder = ProcessPoolDecoder(max_workers=1, threshold=256)
+
+    def tearDown(self):
+        self.decoder.close()
+
+    def test_large_bodies_are_decoded_by_workers(self):
+        body = script_response_body(RESULTS, {'x': 1})
+        self.assertGreater(len(body), self.decoder.threshold)
+        response = ParallelMsgPackScriptResponse.deserialize(body, decoder=self.decoder)
+        self.assertEqual(response.results, RESULTS)
+        self.assertEqual(response.bindings, {'x': 1})
+        self.assertIsNotNone(self.decoder._pool)
+
+    def test_small_bodies_are_decoded_in_place(self):
+        response = ParallelMsgPackScriptResponse.deserialize(script_response_body([1, 'two']), decoder=self.decoder)
+        self.assertEqual(response.results, [1, 'two'])
+        self.assertIsNone(self.decoder._pool)
+
+    def test_object_hook_runs_in_workers(self):
+        response = ParallelMsgPackScriptResponse.deserialize(script_response_body(RESULTS),
+                                                             object_hook=decode_element, decoder=self.decoder)
+        self.assertIsInstance(response.results[0], Vertex)
+        self.assertEqual(response.results[3].properties, {'name': 'v3'})
+
+    def test_waits_run_through_the_given_function(self):
+        waits = []
+
+        def wait(func):
+            waits.append(func)
+            return func()
+        response = ParallelMsgPackScriptResponse.deserialize(script_response_body(RESULTS), decoder=self.decoder,
+                                                             wait=wait)
+        self.assertEqual(response.results, RESULTS)
+        self.assertEqual(len(waits), 1)
+
+    @skipIf(shared_memory is None, "multiprocessing.shared_memory is not available")
+    def test_abandoned_results_are_freed(self):
+        blocks = set(os.listdir('/dev/shm'))
+
+        def give_up(func):
+            raise RuntimeError("stopped waiting")
+
+        def give_up_once_done(func):
+            func()
+            raise RuntimeError("stopped waiting")
+        for wait in (give_up, give_up_once_done):
+            with self.assertRaises(RuntimeError):
+                self.decoder.decode(script_response_body(RESULTS), wait=wait)
+        # the results of the first one are freed once its worker is done
+        self.decoder.decode(script_response_body(RESULTS))
+        deadline = time.time() + 5
+        while set(os.listdir('/dev/shm')) - blocks and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(set(os.listdir('/dev/shm')) - blocks, set())
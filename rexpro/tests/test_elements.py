@@ -0,0 +1,52 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+import msgpack
+
+from rexpro.elements import Vertex, Edge, decode_element
+from rexpro.messages import MsgPackScriptResponse, LazyMsgPackScriptResponse
+
+
+VERTEX = {'_id': 1, '_type': 'vertex', '_properties': {'name': 'saturn', 'age': 10000}}
+EDGE = {'_id': 2, '_type': 'edge', '_label': 'father', '_outV': 3, '_inV': 1, '_properties': {'since': 1}}
+
+
+def script_response_body(results):
+    return bytearray(msgpack.dumps([b'\x00' * 16, b'\x01' * 16, {}, results, {}]))
+
+
+@attr('unit')
+class TestElements(TestCase):
+
+    def test_decode_elements(self):
+        response = MsgPackScriptResponse.deserialize(script_response_body([VERTEX, EDGE, {'_id': 5}]),
+                                                     object_hook=decode_element)
+        vertex, edge, other = response.results
+
+        self.assertIsInstance(vertex, Vertex)
+        self.assertEqual(vertex.id, 1)
+        self.assertEqual(vertex.properties, {'name': 'saturn', 'age': 10000})
+        self.assertEqual(vertex['_properties']['name'], 'saturn')
+        self.assertEqual(vertex['_type'], 'vertex')
+        self.assertEqual(vertex, VERTEX)
+
+        self.assertIsInstance(edge, Edge)
+        self.assertEqual((edge.label, edge.out_v, edge.in_v), ('father', 3, 1))
+        self.assertEqual(edge['_outV'], 3)
+        self.assertEqual(edge, EDGE)
+
+        self.assertEqual(other, {'_id': 5})
+
+    def test_property_keys_are_shared(self):
+        response = MsgPackScriptResponse.deserialize(script_response_body([VERTEX, VERTEX]),
+                                                     object_hook=decode_element)
+        first, second = [list(v.properties) for v in response.results]
+        for key1 in first:
+            self.assertTrue(any(key1 is key2 for key2 in second))
+
+    def test_lazy_decode_elements(self):
+        response = LazyMsgPackScriptResponse.deserialize(script_response_body([EDGE]), object_hook=decode_element)
+        self.assertIsInstance(response.results[0], Edge)
+
+    def test_elements_have_no_instance_dict(self):
+        self.assertFalse(hasattr(Vertex(1), '__dict__'))
+        self.assertFalse(hasattr(Edge(1, 'l', 2, 3), '__dict__'))
@@ -0,0 +1,47 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+
+from rexpro.tests.base import FakeRexster
+
+
+def simulate_fork(pool):
+    # pretend the pool was created by a parent process
+    pool._pid = -1
+
+
+@attr('unit')
+class TestForkSafety(TestCase):
+
+    def test_inherited_connections_are_discarded(self):
+        pool = FakeRexster().pool_class()('localhost', 8184, 'graph')
+        conn = pool.create_connection()
+        pool.close_connection(conn, soft=True)
+        sent = len(conn._conn.frames)
+        simulate_fork(pool)
+
+        child_conn = pool.create_connection()
+        self.assertIsNot(child_conn, conn)
+        self.assertTrue(conn._conn.closed)
+        self.assertEqual(len(conn._conn.frames), sent)
+        self.assertEqual(pool.size, 1)
+
+    def test_connections_checked_out_before_fork_are_not_returned(self):
+        pool = FakeRexster().pool_class()('localhost', 8184, 'graph')
+        conn = pool.create_connection()
+        sent = len(conn._conn.frames)
+        simulate_fork(pool)
+        conn._pid = -1
+
+        pool.close_connection(conn)
+        self.assertTrue(conn._conn.closed)
+        self.assertEqual(len(conn._conn.frames), sent)
+        self.assertTrue(pool.pool.empty())
+
+    def test_pool_session_is_reopened(self):
+        pool = FakeRexster().pool_class()('localhost', 8184, 'graph', with_session=True)
+        parent_session = pool.session_key
+        simulate_fork(pool)
+
+        with pool.connection(transaction=False) as conn:
+            self.assertNotEqual(conn._session_key, parent_session)
+            self.assertEqual(conn._session_key, pool.session_key)
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+
+from rexpro import messages
+from rexpro.tests.base import FakeRexster, split_frames
+
+
+def echo(session, meta, script, params):
+    return [session, meta]
+
+
+@attr('unit')
+class TestLazySession(TestCase):
+
+    def get_connection(self):
+        return FakeRexster(echo).connection_class()('localhost', 8184, 'graph', session_less=False, lazy_session=True)
+
+    def test_open_sends_nothing(self):
+        conn = self.get_connection()
+        self.assertEqual(conn._conn.writes, [])
+        self.assertIsNone(conn._session_key)
+        conn.close()
+        self.assertEqual(conn._conn.writes, [])
+
+    def test_session_request_is_pipelined_with_first_script(self):
+        conn = self.get_connection()
+        session, meta = conn.execute('1', transaction=False)
+        self.assertEqual(len(conn._conn.writes), 1)
+        frames = split_frames(conn._conn.writes[0])
+        self.assertEqual([msg_type for msg_type, _ in frames],
+                         [messages.MessageTypes.SESSION_REQUEST, messages.MessageTypes.SCRIPT_REQUEST])
+        self.assertNotIn('inSession', meta)
+        self.assertEqual(meta['graphName'], 'graph')
+        self.assertEqual(conn._session_key, b'session-00000001')
+
+        session, meta = conn.execute('1', transaction=False)
+        self.assertEqual(len(conn._conn.writes), 2)
+        self.assertTrue(meta['inSession'])
+        self.assertEqual(session, b'session-00000001')
+
+    def test_non_isolated_scripts_open_the_session_first(self):
+        conn = self.get_connection()
+        session, meta = conn.execute('x = 1', isolate=False, transaction=False)
+        self.assertEqual(len(conn._conn.writes), 2)
+        self.assertTrue(meta['inSession'])
+        self.assertEqual(session, b'session-00000001')
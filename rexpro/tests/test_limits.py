@@ -0,0 +1,211 @@
+from unittest import TestCase
+from socket import timeout as SocketTimeout
+from threading import Thread
+from nose.plugins.attrib import attr
+
+from rexpro.exceptions import RexProOverloadException
+from rexpro.limits import AIMDLimiter, CoDelShedder
+from rexpro.tests.base import FakeRexster
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TickingClock(FakeClock):
+    """ Clock advancing by a second every time it's read """
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+
+@attr('unit')
+class TestAIMDLimiter(TestCase):
+
+    def get_limiter(self, **kwargs):
+        self.clock = FakeClock()
+        return AIMDLimiter(clock=self.clock, **kwargs)
+
+    def complete(self, limiter, latency, in_flight=None, dropped=False):
+        self.clock.now += latency
+        limiter.update(latency, limiter.limit if in_flight is None else in_flight, dropped=dropped)
+
+    def test_limit_grows_by_one_per_round_of_healthy_requests(self):
+        limiter = self.get_limiter(initial_limit=4)
+        for _ in range(4):
+            self.complete(limiter, 0.01)
+        self.assertEqual(limiter.limit, 4)
+        self.complete(limiter, 0.01)
+        self.assertEqual(limiter.limit, 5)
+
+    def test_unused_limit_does_not_grow(self):
+        limiter = self.get_limiter(initial_limit=4)
+        for _ in range(20):
+            self.complete(limiter, 0.01, in_flight=1)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_timeouts_and_latency_inflation_back_off_once_per_round(self):
+        limiter = self.get_limiter(initial_limit=16, min_limit=2)
+        self.complete(limiter, 0.01)
+        self.complete(limiter, 1.0, dropped=True)
+        self.assertEqual(limiter.limit, 8)
+        # started before the decrease
+        limiter.update(0.5, 8, dropped=True)
+        self.assertEqual(limiter.limit, 8)
+
+        self.complete(limiter, 0.05)
+        self.assertEqual(limiter.limit, 4)
+        for _ in range(3):
+            self.complete(limiter, 0.05)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_limit_bounds_and_history(self):
+        limiter = self.get_limiter(initial_limit=2, max_limit=3)
+        for _ in range(20):
+            self.complete(limiter, 0.01)
+        self.assertEqual(limiter.limit, 3)
+        self.complete(limiter, 0.01, dropped=True)
+        self.assertEqual(limiter.limit, 1)
+        self.assertEqual([limit for _, limit in limiter.history], [2, 3, 1])
+
+
+@attr('unit', 'pooling')
+class TestLimitedPool(TestCase):
+
+    def get_pool(self, initial_limit=1):
+        self.clock = FakeClock()
+        self.server = FakeRexster(self.answer)
+        self.lost = False
+        return self.server.pool_class()('localhost', 8184, 'graph', session_less=True, pool_size=4,
+                                        limiter=AIMDLimiter(initial_limit=initial_limit, clock=self.clock))
+
+    def answer(self, session, meta, script, params):
+        self.clock.now += params.get('latency', 0)
+        if self.lost:
+            raise SocketTimeout('timed out')
+        return []
+
+    def test_checkouts_wait_for_the_limit(self):
+        pool = self.get_pool(initial_limit=1)
+        order = []
+
+        def checkout():
+            with pool.connection(transaction=False):
+                order.append('second')
+
+        with pool.connection(transaction=False):
+            thread = Thread(target=checkout)
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+            order.append('first')
+        thread.join()
+        self.assertEqual(order, ['first', 'second'])
+        # the connection beyond the limit was never created
+        self.assertEqual(pool.size, 1)
+
+    def test_lowered_limit_parks_connections(self):
+        pool = self.get_pool(initial_limit=2)
+        with pool.connection(transaction=False):
+            with pool.connection(transaction=False):
+                pass
+        self.assertEqual(pool.size, 2)
+        self.assertEqual(pool._permit_count, 2)
+
+        self.lost = True
+        with pool.connection(transaction=False) as conn:
+            self.assertRaises(SocketTimeout, conn.execute, '1')
+        self.assertEqual(pool.limiter.limit, 1)
+        self.assertEqual(pool._permit_count, 1)
+        self.assertEqual(pool.size, 2)
+
+    def test_lowered_limit_retires_queued_permits(self):
+        pool = self.get_pool(initial_limit=4)
+        held = []
+
+        def checkout():
+            with pool.connection(transaction=False):
+                held.append(True)
+
+        with pool.connection(transaction=False) as conn:
+            self.lost = True
+            self.assertRaises(SocketTimeout, conn.execute, '1')
+            self.lost = False
+            self.assertEqual(pool.limiter.limit, 2)
+            with pool.connection(transaction=False):
+                # the permits issued under the previous limit don't let a third checkout through
+                thread = Thread(target=checkout)
+                thread.start()
+                thread.join(0.1)
+                self.assertTrue(thread.is_alive())
+                self.assertEqual(pool._permit_count, 2)
+            thread.join()
+        self.assertEqual(held, [True])
+        self.assertEqual(pool._permit_count, 2)
+
+    def test_request_round_trips_are_measured(self):
+        pool = self.get_pool(initial_limit=2)
+        with pool.connection(transaction=False) as conn:
+            conn.execute('1', {'latency': 0.01})
+            # time spent in the block between requests isn't request latency
+            self.clock.now += 10
+            conn.execute('1', {'latency': 0.01})
+        self.assertAlmostEqual(pool.limiter.baseline, 0.01)
+        self.assertEqual(pool.limiter.limit, 2)
+
+
+@attr('unit')
+class TestCoDelShedder(TestCase):
+
+    def get_shedder(self):
+        self.clock = FakeClock()
+        return CoDelShedder(target=0.05, interval=1.0, clock=self.clock)
+
+    def test_short_bursts_are_not_shed(self):
+        shedder = self.get_shedder()
+        for _ in range(5):
+            self.clock.now += 0.3
+            shedder.check(0.5)
+            shedder.check(0.01)
+        self.assertFalse(shedder.overloaded)
+        self.assertEqual(shedder.shed, 0)
+
+    def test_sustained_waits_are_shed(self):
+        shedder = self.get_shedder()
+        shedder.check(0.1)
+        self.clock.now += 1.0
+        self.assertRaises(RexProOverloadException, shedder.check, 0.2)
+        self.assertTrue(shedder.overloaded)
+        # waits within the target and exempt priorities are served
+        shedder.check(0.01)
+        shedder.check(0.2, priority=1)
+        self.assertEqual(shedder.shed, 1)
+
+        # the queue drained during the next interval
+        self.clock.now += 1.0
+        shedder.check(0.2)
+        self.assertFalse(shedder.overloaded)
+
+
+@attr('unit', 'pooling')
+class TestSheddingPool(TestCase):
+
+    def test_shed_checkouts_restore_their_connection(self):
+        shedder = CoDelShedder(target=0.05, interval=0, clock=TickingClock())
+        pool = FakeRexster().pool_class()('localhost', 8184, 'graph', session_less=True, pool_size=1,
+                                          shedder=shedder)
+
+        def checkout(**kwargs):
+            with pool.connection(transaction=False, **kwargs) as conn:
+                return conn
+
+        self.assertRaises(RexProOverloadException, checkout)
+        self.assertEqual(pool.pool.qsize(), 1)
+        self.assertIsNotNone(checkout(priority=1))
+        self.assertEqual(shedder.shed, 1)
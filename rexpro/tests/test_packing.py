@@ -0,0 +1,76 @@
+from unittest import TestCase
+from array import array
+import ctypes
+from nose.plugins.attrib import attr
+import msgpack
+import numpy
+
+from rexpro import exceptions
+from rexpro.messages import ScriptRequest
+from rexpro.packing import is_packable_array, pack_array
+
+
+@attr('unit')
+class TestPacking(TestCase):
+
+    def assertPacksLike(self, value, expected):
+        self.assertTrue(is_packable_array(value))
+        self.assertEqual(msgpack.loads(bytes(pack_array(value))), expected)
+
+    def test_numpy_arrays(self):
+        self.assertPacksLike(numpy.arange(70000), list(range(70000)))
+        self.assertPacksLike(numpy.arange(-3, 3, dtype=numpy.int8), list(range(-3, 3)))
+        self.assertPacksLike(numpy.arange(3, dtype=numpy.uint32), [0, 1, 2])
+        self.assertPacksLike(numpy.array([0.5, 1.25]), [0.5, 1.25])
+        self.assertPacksLike(numpy.array([0.5, 1.25], dtype=numpy.float32), [0.5, 1.25])
+        self.assertPacksLike(numpy.array([True, False]), [True, False])
+        self.assertPacksLike(numpy.arange(6).reshape(2, 3), [[0, 1, 2], [3, 4, 5]])
+
+    def test_buffer_sequences(self):
+        self.assertPacksLike(array('q', [1, -2, 3]), [1, -2, 3])
+        self.assertPacksLike(array('i', range(-20, 20)), list(range(-20, 20)))
+        self.assertPacksLike(array('B', [1, 255]), [1, 255])
+        self.assertPacksLike(array('d', [1.5]), [1.5])
+        self.assertPacksLike(memoryview(array('h', [1, 2])), [1, 2])
+        self.assertPacksLike(array('l', [-2 ** 40, 2 ** 40]), [-2 ** 40, 2 ** 40])
+        self.assertPacksLike(array('H', [0, 65535]), [0, 65535])
+
+    def test_buffers_are_packed_at_their_own_width(self):
+        # tag byte plus a 2 byte value per element
+        self.assertEqual(len(pack_array(array('h', [1, -1, 300]))), 1 + 3 * 3)
+        self.assertEqual(len(pack_array(array('b', [1, -1]))), 1 + 2 * 2)
+
+    def test_buffers_keep_their_byte_order_and_standard_sizes(self):
+        little = (ctypes.c_int32.__ctype_le__ * 3)(1, -2, 70000)
+        big = (ctypes.c_int32.__ctype_be__ * 3)(1, -2, 70000)
+        self.assertEqual(memoryview(little).format, '<i')
+        self.assertEqual(memoryview(big).format, '>i')
+        self.assertPacksLike(little, [1, -2, 70000])
+        self.assertPacksLike(big, [1, -2, 70000])
+        self.assertPacksLike((ctypes.c_double.__ctype_be__ * 2)(0.5, -1.25), [0.5, -1.25])
+        self.assertPacksLike((ctypes.c_uint16.__ctype_le__ * 2)(1, 65535), [1, 65535])
+        self.assertPacksLike((ctypes.c_bool * 2)(True, False), [True, False])
+
+    def test_non_native_buffers_nested_in_params(self):
+        request = ScriptRequest('x', {'x': {'ids': (ctypes.c_int16.__ctype_be__ * 2)(3, -4)}})
+        message = msgpack.loads(bytes(request.serialize()[11:]))
+        self.assertEqual(message[-1], {'x': {'ids': [3, -4]}})
+
+    def test_strings_are_not_arrays(self):
+        self.assertFalse(is_packable_array(b'abc'))
+        self.assertFalse(is_packable_array(bytearray(b'abc')))
+        self.assertFalse(is_packable_array(u'abc'))
+        self.assertFalse(is_packable_array([1, 2]))
+
+    def test_script_request_params(self):
+        request = ScriptRequest('ids', {'ids': numpy.arange(3), 'scale': numpy.float64(2.5), 'other': [1]})
+        message = msgpack.loads(bytes(request.serialize()[11:]))
+        self.assertEqual(message[-1], {'ids': [0, 1, 2], 'scale': 2.5, 'other': [1]})
+
+    def test_invalid_params(self):
+        with self.assertRaises(exceptions.RexProScriptException):
+            ScriptRequest('x', {'1x': 1}).serialize()
+        with self.assertRaises(exceptions.RexProException):
+            ScriptRequest('x', {'x.y': 1}).serialize()
+        with self.assertRaises(exceptions.RexProScriptException):
+            ScriptRequest('x', {'x': object()}).serialize()
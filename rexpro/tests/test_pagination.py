@@ -0,0 +1,40 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+import os
+
+from rexpro.connectors.sync import RexProSyncConnectionPool
+from rexpro.tests.base import fake_script_pool
+
+
+def get_page_pool(total):
+    """ Returns a pool double serving pages of ``range(total)`` """
+    def page(script, params):
+        return list(range(total))[params['rexpro_page_low']:params['rexpro_page_high'] + 1]
+    return fake_script_pool(page)
+
+
+@attr('unit', 'pooling')
+class TestPagination(TestCase):
+
+    host = os.getenv('TITAN_HOST', 'localhost')
+    port = int(os.getenv('TITAN_REXPRO_PORT', 8184))
+
+    def test_pages_until_short_page(self):
+        pool = get_page_pool(25)
+        pages = list(pool.paginate('g.V', {'a': 1}, page_size=10))
+        self.assertEqual(pages, [list(range(10)), list(range(10, 20)), list(range(20, 25))])
+        self.assertEqual(len(pool.calls), 3)
+        script, params = pool.calls[0]
+        self.assertEqual(script, '(g.V)[rexpro_page_low..rexpro_page_high]')
+        self.assertEqual(params, {'a': 1, 'rexpro_page_low': 0, 'rexpro_page_high': 9})
+
+    def test_exact_multiple_ends_on_empty_page(self):
+        pool = get_page_pool(20)
+        pages = list(pool.paginate('g.V', page_size=10, prefetch=False))
+        self.assertEqual(pages, [list(range(10)), list(range(10, 20))])
+        self.assertEqual(len(pool.calls), 3)
+
+    def test_paginate_live(self):
+        pool = RexProSyncConnectionPool(self.host, self.port, 'graph', username='rexster', password='rexster')
+        for page in pool.paginate('g.V', page_size=2):
+            self.assertLessEqual(len(page), 2)
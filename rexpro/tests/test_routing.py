@@ -0,0 +1,202 @@
+from unittest import TestCase
+from contextlib import contextmanager
+from threading import Event, Thread, current_thread
+from nose.plugins.attrib import attr
+
+from rexpro import exceptions
+from rexpro._compat import Queue
+from rexpro.routing import LatencyTracker, RexProRoutingPool, is_read
+
+
+class FakeEndpointConnection(object):
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.name = pool.name
+
+    def execute(self, script, params=None, **kwargs):
+        self.pool.threads.append(current_thread())
+        if self.pool.stalled is not None:
+            self.pool.stalled.wait(5)
+        if self.pool.error is not None:
+            raise self.pool.error
+        return self.name
+
+
+class FakeEndpointPool(object):
+
+    QUEUE_CLASS = Queue
+
+    def __init__(self, name):
+        self.name = name
+        self.checkouts = 0
+        self.threads = []
+        self.stalled = None
+        self.error = None
+
+    @contextmanager
+    def connection(self, transaction=True, *args, **kwargs):
+        self.checkouts += 1
+        yield FakeEndpointConnection(self)
+
+    def _spawn(self, func, *args, **kwargs):
+        thread = Thread(target=func, args=args, kwargs=kwargs)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def close_all(self, force_commit=False):
+        pass
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@attr('unit')
+class TestRoutingPool(TestCase):
+
+    def get_pool(self, replicas=2, read_your_writes=0.0):
+        self.clock = FakeClock()
+        return RexProRoutingPool(FakeEndpointPool('primary'),
+                                 [FakeEndpointPool('replica-{}'.format(i)) for i in range(replicas)],
+                                 read_your_writes=read_your_writes, clock=self.clock)
+
+    def test_classification(self):
+        self.assertTrue(is_read('g.v(1)', transaction=False))
+        self.assertFalse(is_read('g.v(1)', transaction=True))
+        self.assertTrue(is_read('// @read\ng.v(1)', transaction=True))
+        self.assertFalse(is_read('  //@write\ng.v(1)', transaction=False))
+        self.assertFalse(is_read('// @read\ng.v(1)', read_only=False))
+        self.assertTrue(is_read('g.addVertex()', read_only=True))
+
+    def test_writes_go_to_the_primary(self):
+        pool = self.get_pool()
+        self.assertEqual(pool.execute('g.addVertex()'), 'primary')
+        self.assertEqual(pool.execute('g.v(1)', read_only=False, transaction=False), 'primary')
+
+    def test_reads_are_spread_over_the_replicas(self):
+        pool = self.get_pool()
+        results = [pool.execute('// @read\ng.v(1)') for _ in range(4)]
+        self.assertEqual(sorted(results), ['replica-0', 'replica-0', 'replica-1', 'replica-1'])
+        self.assertEqual(pool.primary.checkouts, 0)
+
+    def test_reads_prefer_the_least_busy_replica(self):
+        pool = self.get_pool()
+        with pool.connection(read_only=True) as busy:
+            for _ in range(3):
+                with pool.connection(read_only=True) as conn:
+                    self.assertNotEqual(conn.name, busy.name)
+
+    def test_reads_go_to_the_primary_without_replicas(self):
+        pool = self.get_pool(replicas=0)
+        self.assertEqual(pool.execute('g.v(1)', read_only=True), 'primary')
+
+    def test_read_your_writes_window(self):
+        pool = self.get_pool(read_your_writes=2.0)
+        pool.execute('g.addVertex()', caller='alice')
+        self.assertEqual(pool.execute('g.v(1)', read_only=True, caller='alice'), 'primary')
+        self.assertTrue(pool.execute('g.v(1)', read_only=True, caller='bob').startswith('replica'))
+        self.assertTrue(pool.execute('g.v(1)', read_only=True).startswith('replica'))
+
+        self.clock.now = 2.5
+        self.assertTrue(pool.execute('g.v(1)', read_only=True, caller='alice').startswith('replica'))
+
+
+@attr('unit', 'concurrency')
+class TestHedgedReads(TestCase):
+
+    def get_pool(self, hedge_budget=1.0):
+        pool = RexProRoutingPool(FakeEndpointPool('primary'),
+                                 [FakeEndpointPool('replica-{}'.format(i)) for i in range(2)],
+                                 hedge_percentile=95, hedge_budget=hedge_budget, hedge_min_samples=5)
+        for _ in range(5):
+            pool.latencies.record('g.v(1)', 0.01)
+        return pool
+
+    def stall(self, pool):
+        """ Stalls the replica the next read will be sent to first """
+        replica = pool.replicas[pool._next]
+        replica.stalled = Event()
+        return replica
+
+    def test_latency_percentiles(self):
+        tracker = LatencyTracker(window=100)
+        self.assertIsNone(tracker.percentile('script', 95))
+        for latency in range(1, 101):
+            tracker.record('script', latency / 100.0)
+        self.assertEqual(tracker.percentile('script', 95), 0.95)
+        self.assertEqual(tracker.percentile('script', 50), 0.5)
+        self.assertIsNone(tracker.percentile('script', 95, min_samples=101))
+
+    def test_slow_reads_are_hedged_on_another_replica(self):
+        pool = self.get_pool()
+        stalled = self.stall(pool)
+        try:
+            result = pool.execute('g.v(1)', read_only=True)
+            self.assertNotEqual(result, stalled.name)
+            self.assertEqual(pool.hedges, 1)
+        finally:
+            stalled.stalled.set()
+
+    def test_reads_without_enough_samples_are_not_hedged(self):
+        pool = self.get_pool()
+        self.assertTrue(pool.execute('g.v(2)', read_only=True).startswith('replica'))
+        self.assertEqual(pool.hedges, 0)
+        # and run in the calling thread
+        self.assertEqual(sum([replica.threads for replica in pool.replicas], []), [current_thread()])
+
+    def test_replicas_must_share_a_connector(self):
+        class OtherEndpointPool(FakeEndpointPool):
+
+            def _spawn(self, func, *args, **kwargs):
+                return func(*args, **kwargs)
+
+        replicas = [FakeEndpointPool('replica-0'), OtherEndpointPool('replica-1')]
+        self.assertRaises(exceptions.RexProException, RexProRoutingPool, FakeEndpointPool('primary'), replicas,
+                          hedge_percentile=95)
+        RexProRoutingPool(FakeEndpointPool('primary'), replicas)
+
+    def test_hedges_are_capped_by_the_budget(self):
+        pool = self.get_pool(hedge_budget=0.5)
+        stalled = self.stall(pool)
+        read = Thread(target=pool.execute, args=('g.v(1)', ), kwargs={'read_only': True})
+        read.start()
+        read.join(0.2)
+        # half a hedge was earned by the first read
+        self.assertTrue(read.is_alive())
+        self.assertEqual(pool.hedges, 0)
+        stalled.stalled.set()
+        read.join()
+
+        stalled = self.stall(pool)
+        try:
+            self.assertNotEqual(pool.execute('g.v(1)', read_only=True), stalled.name)
+            self.assertEqual(pool.hedges, 1)
+        finally:
+            stalled.stalled.set()
+
+    def test_reads_without_budget_left_run_in_the_calling_thread(self):
+        pool = self.get_pool(hedge_budget=0.25)
+        for _ in range(3):
+            self.assertTrue(pool.execute('g.v(1)', read_only=True).startswith('replica'))
+        self.assertEqual(sum([replica.threads for replica in pool.replicas], []), [current_thread()] * 3)
+        # the fourth read earns a hedge, it's run in another thread so it can be hedged
+        pool.execute('g.v(1)', read_only=True)
+        self.assertNotEqual(sum([replica.threads for replica in pool.replicas], [])[-1], current_thread())
+
+    def test_errors_wait_for_the_hedge(self):
+        pool = self.get_pool()
+        failing = self.stall(pool)
+        failing.error = ValueError('failed')
+        try:
+            result = pool.execute('g.v(1)', read_only=True)
+        finally:
+            failing.stalled.set()
+        self.assertNotEqual(result, failing.name)
+        self.assertEqual(pool.hedges, 1)
@@ -0,0 +1,42 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+
+from rexpro.tests.base import FakeRexster
+
+
+@attr('unit', 'pooling')
+class TestSessionShards(TestCase):
+
+    def get_pool(self, session_shards=3):
+        return FakeRexster().pool_class()('localhost', 8184, 'graph', with_session=True, session_shards=session_shards)
+
+    def checkout_session(self, pool, **kwargs):
+        with pool.connection(transaction=False, **kwargs) as conn:
+            return conn._session_key
+
+    def test_shard_sessions_are_opened_once(self):
+        pool = self.get_pool()
+        self.assertEqual(len(set(pool.session_keys)), 3)
+        self.assertEqual(pool.session_key, pool.session_keys[0])
+
+        self.checkout_session(pool)
+        conn = pool.pool.get_nowait()
+        self.assertEqual(conn._conn.session_requests(), 3)
+
+    def test_checkouts_are_spread_round_robin(self):
+        pool = self.get_pool()
+        sessions = [self.checkout_session(pool) for _ in range(6)]
+        self.assertEqual(sorted(set(sessions)), sorted(pool.session_keys))
+        self.assertEqual(sessions[:3], sessions[3:])
+
+    def test_affinity_keys_stick_to_a_session(self):
+        pool = self.get_pool(session_shards=8)
+        session = self.checkout_session(pool, affinity='user-1')
+        for _ in range(4):
+            self.checkout_session(pool)
+            self.assertEqual(self.checkout_session(pool, affinity='user-1'), session)
+
+    def test_single_shard_keeps_the_pool_session(self):
+        pool = self.get_pool(session_shards=1)
+        self.assertEqual(pool.session_keys, [pool.session_key])
+        self.assertEqual(self.checkout_session(pool), pool.session_key)
@@ -0,0 +1,79 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+from nose.plugins.attrib import attr
+
+from rexpro.sessions import SessionStore, session_fingerprint
+from rexpro.tests.base import FakeRexster
+
+
+SETUP = ['def answer() { 42 }']
+
+
+@attr('unit', 'pooling')
+class TestSessionStore(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'sessions.json')
+        self.server = FakeRexster()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_pool(self, setup=SETUP, session_shards=2):
+        return self.server.pool_class()('localhost', 8184, 'graph', with_session=True, session_shards=session_shards,
+                               session_setup=setup, session_store=SessionStore(self.path))
+
+    def setup_runs(self):
+        return len([script for _, script in self.server.scripts if script in SETUP])
+
+    def test_store_round_trip(self):
+        store = SessionStore(self.path)
+        self.assertEqual(store.load('graph'), [])
+        store.save('graph', [b'\x00\x01', b'\xff' * 16])
+        store.save('other', [b'\x02'])
+        self.assertEqual(SessionStore(self.path).load('graph'), [b'\x00\x01', b'\xff' * 16])
+        store.save('graph', [])
+        self.assertEqual(store.load('graph'), [])
+        self.assertEqual(store.load('other'), [b'\x02'])
+
+    def test_store_is_only_readable_by_its_owner(self):
+        umask = os.umask(0o022)
+        try:
+            SessionStore(self.path).save('graph', [b'\x00'])
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        self.assertEqual([name for name in os.listdir(self.tmp_dir) if name.endswith('.tmp')], [])
+
+    def test_new_sessions_are_set_up_and_stored(self):
+        pool = self.get_pool()
+        self.assertEqual(self.server.opened, 2)
+        self.assertEqual(self.setup_runs(), 2)
+        fingerprint = session_fingerprint('localhost', 8184, 'graph', setup=SETUP)
+        self.assertEqual(SessionStore(self.path).load(fingerprint), pool.session_keys)
+
+    def test_restarted_pool_resumes_the_stored_sessions(self):
+        session_keys = self.get_pool().session_keys
+        pool = self.get_pool()
+        self.assertEqual(pool.session_keys, session_keys)
+        self.assertEqual(self.server.opened, 2)
+        self.assertEqual(self.setup_runs(), 2)
+
+    def test_expired_sessions_are_replaced(self):
+        session_keys = self.get_pool().session_keys
+        self.server.live.discard(session_keys[0])
+        pool = self.get_pool()
+        self.assertEqual(pool.session_keys[0], session_keys[1])
+        self.assertNotIn(session_keys[0], pool.session_keys)
+        self.assertEqual(self.setup_runs(), 3)
+        fingerprint = session_fingerprint('localhost', 8184, 'graph', setup=SETUP)
+        self.assertEqual(SessionStore(self.path).load(fingerprint), pool.session_keys)
+
+    def test_changed_setup_opens_new_sessions(self):
+        session_keys = self.get_pool().session_keys
+        pool = self.get_pool(setup=SETUP + ['def question() { null }'])
+        self.assertFalse(set(pool.session_keys) & set(session_keys))
+        self.assertEqual(self.server.opened, 4)
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+
+from rexpro.subgraph import CSRGraph, fetch_subgraph
+from rexpro.tests.base import fake_script_pool
+
+
+ADJACENCY = [('a', ['b', 'c']), ('b', ['c', 'x']), ('c', ['a']), ('d', [])]
+
+
+def answer(script, params):
+    if 'rexpro_page_low' in params:
+        ids = ['a', 'b', 'c', 'd']
+        return ids[params['rexpro_page_low']:params['rexpro_page_high'] + 1]
+    adjacency = dict(ADJACENCY)
+    return [[vertex_id, adjacency[vertex_id]] for vertex_id in params['ids']]
+
+
+@attr('unit')
+class TestCSRGraph(TestCase):
+
+    def test_induced_graph(self):
+        graph = CSRGraph.from_adjacency(ADJACENCY)
+        self.assertEqual(len(graph), 4)
+        self.assertEqual(graph.num_edges, 4)
+        self.assertEqual(list(graph.neighbors('b')), ['c'])
+        self.assertEqual(graph.degree('a'), 2)
+        self.assertEqual(graph.degree('d'), 0)
+        self.assertNotIn('x', graph)
+
+    def test_open_graph_adds_neighbors(self):
+        graph = CSRGraph.from_adjacency(ADJACENCY, induced=False)
+        self.assertIn('x', graph)
+        self.assertEqual(list(graph.neighbors('b')), ['c', 'x'])
+        self.assertEqual(graph.degree('x'), 0)
+
+    def test_bfs(self):
+        graph = CSRGraph.from_adjacency(ADJACENCY)
+        self.assertEqual(list(graph.bfs('a')), [('a', 0), ('b', 1), ('c', 1)])
+        self.assertEqual(list(graph.bfs('a', max_depth=0)), [('a', 0)])
+
+    def test_fetch_subgraph(self):
+        graph = fetch_subgraph(fake_script_pool(answer, pool_size=2), 'g.V.id', page_size=3, batch_size=2)
+        self.assertEqual(graph.vertex_ids, ['a', 'b', 'c', 'd'])
+        self.assertEqual(list(graph.neighbors('a')), ['b', 'c'])
+        self.assertEqual(graph.num_edges, 4)
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from nose.plugins.attrib import attr
+
+from rexpro import exceptions
+from rexpro.tests.base import fake_script_pool
+from rexpro.traversal import KHopExpander
+
+
+GRAPH = {1: [2, 3], 2: [1, 4], 3: [4], 4: [5], 5: []}
+
+
+def neighbours(script, params):
+    return [[vertex_id, GRAPH.get(vertex_id, [])] for vertex_id in params['ids']]
+
+
+def get_graph_pool():
+    return fake_script_pool(neighbours, pool_size=2)
+
+
+@attr('unit')
+class TestKHopExpander(TestCase):
+
+    def test_expands_hop_by_hop_without_revisiting(self):
+        pool = get_graph_pool()
+        expander = KHopExpander(pool, direction='out', max_depth=3, batch_size=1)
+        hops = list(expander.expand([1, 1]))
+        self.assertEqual(hops, [
+            (1, 1, [2, 3]),
+            (2, 2, [1, 4]),
+            (2, 3, [4]),
+            (3, 4, [5]),
+        ])
+        self.assertEqual([params['ids'] for _, params in pool.calls], [[1], [2], [3], [4]])
+
+    def test_frontier_is_capped(self):
+        pool = get_graph_pool()
+        expander = KHopExpander(pool, max_depth=2, max_frontier=1)
+        hops = list(expander.expand([1]))
+        self.assertEqual([hop[1] for hop in hops], [1, 2])
+        self.assertTrue(expander.truncated)
+
+    def test_script_is_parameterized(self):
+        expander = KHopExpander(get_graph_pool(), direction='in', labels=['knows'])
+        self.assertIn('v.in(*labels)', expander.script)
+        with self.assertRaises(exceptions.RexProException):
+            KHopExpander(get_graph_pool(), direction='sideways')
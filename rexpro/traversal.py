@@ -0,0 +1,105 @@
+from collections import deque
+
+from rexpro import exceptions
+
+
+class KHopExpander(object):
+    """ Client driven breadth-first neighborhood expansion
+
+    The frontier is kept client side and visited vertex ids are deduplicated, each hop sends the frontier in batches of
+    ids through a parameterized expansion script, running up to ``concurrency`` batches at once on separate pooled
+    connections. This keeps server memory bounded for deep traversals that would blow up as a single gremlin loop.
+
+    Example::
+
+        expander = KHopExpander(pool, direction='out', labels=['knows'], max_depth=3, max_frontier=10000)
+        for depth, vertex_id, neighbor_ids in expander.expand([seed_id]):
+            handle(depth, vertex_id, neighbor_ids)
+    """
+
+    DIRECTIONS = ('out', 'in', 'both')
+
+    EXPANSION_SCRIPT = """
+    ids.collect { id ->
+        def v = g.v(id)
+        [id, v == null ? [] : v.{direction}(*labels).id.toList()]
+    }
+    """
+
+    def __init__(self, pool, direction='both', labels=None, max_depth=2, max_frontier=None, batch_size=100,
+                 concurrency=None):
+        """
+        :param pool: the connection pool to run the expansion batches on
+        :type pool: RexProSyncConnectionPool | RexProGeventConnectionPool | RexProEventletConnectionPool
+        :param direction: the edge direction to follow, one of 'out', 'in' or 'both'
+        :type direction: str
+        :param labels: only follow edges with these labels (default: all edges)
+        :type labels: list
+        :param max_depth: the number of hops to expand
+        :type max_depth: int
+        :param max_frontier: the maximum number of vertices expanded per hop, extra vertices are dropped and
+                             ``truncated`` is set (default: unbounded)
+        :type max_frontier: int
+        :param batch_size: the number of vertex ids sent per request
+        :type batch_size: int
+        :param concurrency: the number of batches in flight at once (defaults to the pool size)
+        :type concurrency: int
+        """
+        if direction not in self.DIRECTIONS:
+            raise exceptions.RexProException("direction must be one of {}".format(', '.join(self.DIRECTIONS)))
+        self.pool = pool
+        self.direction = direction
+        self.labels = list(labels or [])
+        self.max_depth = max_depth
+        self.max_frontier = max_frontier
+        self.batch_size = batch_size
+        self.concurrency = concurrency or pool.pool_size
+        self.script = self.EXPANSION_SCRIPT.replace('{direction}', direction)
+        self.truncated = False
+
+    def _expand_batch(self, ids):
+        with self.pool.connection(transaction=False) as conn:
+            return conn.execute(self.script, {'ids': ids, 'labels': self.labels}) or []
+
+    def _expand_frontier(self, frontier):
+        """ Generator yielding (vertex id, neighbor ids) for the frontier, in frontier order """
+        batches = (frontier[i:i + self.batch_size] for i in range(0, len(frontier), self.batch_size))
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append(self.pool._spawn(self._expand_batch, batch))
+            if len(in_flight) >= self.concurrency:
+                for result in self.pool._join(in_flight.popleft()):
+                    yield result
+        while in_flight:
+            for result in self.pool._join(in_flight.popleft()):
+                yield result
+
+    def expand(self, seeds):
+        """ Generator yielding (depth, vertex id, neighbor ids) for every expanded vertex, hop by hop
+
+        :param seeds: the vertex ids to start from
+        :type seeds: list
+        """
+        visited = set()
+        frontier = []
+        for seed in seeds:
+            if seed not in visited:
+                visited.add(seed)
+                frontier.append(seed)
+        self.truncated = False
+
+        for depth in range(1, self.max_depth + 1):
+            if not frontier:
+                return
+            if self.max_frontier is not None and len(frontier) > self.max_frontier:
+                frontier = frontier[:self.max_frontier]
+                self.truncated = True
+
+            next_frontier = []
+            for vertex_id, neighbor_ids in self._expand_frontier(frontier):
+                yield depth, vertex_id, neighbor_ids
+                for neighbor_id in neighbor_ids:
+                    if neighbor_id not in visited:
+                        visited.add(neighbor_id)
+                        next_frontier.append(neighbor_id)
+            frontier = next_frontier
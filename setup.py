@@ -14,6 +14,11 @@ long_desc = """
 Python RexPro interface
 """
 
+install_requires = ['msgpack-python>=0.4.0', 'six>=1.6.1']
+if sys.version_info < (3, 2):
+    # concurrent.futures backport for the sync pool's submit/map
+    install_requires.append('futures>=2.1.6')
+
 setup(
     name='rexpro',
     version=version,
@@ -30,13 +35,14 @@ setup(
         "Topic :: Software Development :: Libraries :: Python Modules",
     ],
     keywords='rexster,tinkerpop,rexpro,graphdb',
-    install_requires=['msgpack-python>=0.4.0', 'six>=1.6.1'],
+    install_requires=install_requires,
     extras_require={
         'develop': ['nose==1.3.0', 'coverage==3.7.1', 'tox==1.7.1', 'celery==3.1.11', 'redis==2.9.1', 'tox>=1.7.1',
                     'detox>=0.9.3', 'gevent>=1.0', 'eventlet>=0.14.0', 'Sphinx>=1.2.2', 'watchdog>=0.7.1',
-                    'sphinx-rtd-theme>=0.1.6'],
+                    'sphinx-rtd-theme>=0.1.6', 'numpy>=1.7'],
         'gevent': ['gevent>=1.0', ],
         'eventlet': ['eventlet>=0.14.0', ],
+        'numpy': ['numpy>=1.7', ],
         'docs': ['Sphinx>=1.2.2', 'watchdog>=0.7.1', 'sphinx-rtd-theme>=0.1.6']
     },
     scripts=['run_coverage.sh', 'doc_builder.sh'],